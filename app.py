@@ -4,158 +4,273 @@ import streamlit as st
 import pandas as pd
 # Importa a biblioteca numpy para operações numéricas, embora não explicitamente usada na seleção, é comum com pandas
 import numpy as np
-# Importa o módulo io para trabalhar com fluxos de bytes/arquivos em memória
-import io
-# Importa o módulo re para expressões regulares, usado em funções de utilidade
-import re
-# Importa a biblioteca chardet para detecção de codificação de arquivos
-import chardet
-# Importa o parser de data da biblioteca dateutil para análise flexível de datas
-from dateutil import parser
+# Importa o módulo os para saber o número de CPUs
+import os
+# Importa o módulo tempfile para gravar a saída do modo streaming em disco
+import tempfile
+# Importa o módulo uuid para identificar a sessão no gerenciador de memória
+import uuid
+
+# Importa as etapas de limpeza (funções puras sobre DataFrames) e utilitários
+from cleaning import iqr_bounds, is_categorical, is_text_dtype, low_cardinality_columns, normalize_colname, outlier_flags
+# Importa a leitura de CSV e a detecção de encoding
+from loading import detect_encoding, pa, read_csv_bytes, resolve_dialect, sniff_dialect
+# Importa o pipeline em blocos para arquivos maiores que a memória
+from streaming import StreamingPipeline
+# Importa o cache de diagnósticos chaveado pela versão do DataFrame
+from diagnostics import DiagnosticsCache
+# Importa a gravação/leitura de receitas (etapas reaplicáveis pela linha de comando)
+from recipe import dumps_recipe, loads_recipe, make_recipe, yaml
+# Importa o histórico de etapas (original + deltas, com desfazer/refazer)
+from history import History
+# Importa o número padrão de workers do executor por coluna
+from parallel import default_workers
+# Importa a amostra uniforme de linhas (modo amostra)
+from sketches import RowReservoir
+# Importa a medição das fases (tempo, CPU, linhas, memória, perfil)
+from instrumentation import Measure, dumps_metrics, frame_memory_mb, metrics_frame
+# Importa o plano lógico (etapas registradas, otimizadas e executadas de uma vez)
+from plan import describe_step, optimize, run_plan
+# Importa os motores de execução das etapas (pandas ou Polars)
+from engines import ENGINES, available_engines, get_engine, pl
+# Importa a leitura em lote (vários CSVs ou um .zip)
+from batch import REPORT_COLUMNS, is_zip, read_batch
+# Importa o cache em disco dos datasets lidos (chave = hash do conteúdo + opções de leitura)
+from dataset_cache import DEFAULT_CACHE_MB, DatasetCache
+# Importa os formatos de exportação e o cache dos arquivos exportados
+from export import EXPORT_FORMATS, ExportCache, available_formats, export_filename
+# Importa o gerenciador de memória compartilhado pelas sessões do servidor
+from governor import GOVERNOR
+# Importa a execução em segundo plano (progresso, ETA e cancelamento) das leituras e etapas
+import tasks
+from tasks import BackgroundTask
+
+# Copy-on-write: etapas que não alteram uma coluna continuam compartilhando a memória dela com a versão anterior
+pd.options.mode.copy_on_write = True
 
 # Configurações iniciais da página Streamlit, como título e layout
 st.set_page_config(page_title="Limpeza de Dados CSV", layout="wide")
 
 
-# Utilitários
-
-
-# Define uma função para detectar a codificação de um arquivo a partir de seus bytes
-def detect_encoding(file_bytes: bytes) -> str:
-    # Usa a biblioteca chardet para detectar a codificação dos bytes do arquivo
-    result = chardet.detect(file_bytes)
-    # Extrai a codificação do resultado, ou assume "utf-8" se não for detectada
-    enc = result.get("encoding") or "utf-8"
-    # Retorna a codificação detectada ou padrão
-    return enc
-
-# Define uma função para normalizar o nome de uma coluna
-def normalize_colname(name: str) -> str:
-    # Importa a biblioteca re para expressões regulares (já importada no topo, mas re-importada aqui localmente)
-    import re
-    # Converte o nome para string, remove espaços extras no início/fim e converte para minúsculas
-    name = str(name).strip().lower()
-    # Substitui um ou mais espaços por um único underscore
-    name = re.sub(r"\s+", "_", name)
-    # Remove todos os caracteres que não são letras, números ou underscores
-    name = re.sub(r"[^\w_]", "", name)
-    # Substitui múltiplos underscores consecutivos por um único underscore e remove underscores no início/fim
-    name = re.sub(r"_+", "_", name).strip("_")
-    # Se o nome resultar em uma string vazia após a normalização, define como "col"
-    if name == "":
-        name = "col"
-    # Retorna o nome da coluna normalizado
-    return name
-
-
-
-# Define uma função chamada make_unique que recebe uma lista de nomes
-def make_unique(names):
-    """Garante nomes únicos: a, a_2, a_3...""" # Docstring: explica o propósito da função
-    seen = {} # Inicializa um dicionário vazio para armazenar a contagem de cada nome
-    out = [] # Inicializa uma lista vazia para armazenar os nomes únicos resultantes
-    # Itera sobre cada nome na lista de nomes de entrada
-    for n in names:
-        # Verifica se o nome atual ainda não foi visto (não está no dicionário seen)
-        if n not in seen:
-            seen[n] = 1 # Se não foi visto, adiciona-o ao dicionário com contagem 1
-            out.append(n) # Adiciona o nome original à lista de saída
-        # Se o nome já foi visto
-        else:
-            seen[n] += 1 # Incrementa a contagem desse nome no dicionário
-            out.append(f"{n}_{seen[n]}") # Adiciona o nome com um sufixo numérico (ex: "nome_2") à lista de saída
-    return out # Retorna a lista de nomes únicos
-
-def try_parse_datetime(series: pd.Series, sample_size=200) -> bool:
-    # Define uma função para tentar inferir se uma série Pandas contém datas
-    # A função recebe uma série Pandas e um tamanho de amostra (padrão 200)
-    # E retorna True se uma alta porcentagem da amostra for convertível para data, False caso contrário
-
-    # Extrai valores não nulos da série e converte-os para string
-    s = series.dropna().astype(str)
-    # Se a série resultante estiver vazia após remover nulos, não há o que verificar, retorna False
-    if s.empty:
-        return False
-    # Seleciona uma amostra aleatória dos valores (ou todos se o tamanho da série for menor que sample_size)
-    # O random_state garante reprodutibilidade da amostra
-    s = s.sample(min(sample_size, len(s)), random_state=42)
-    # Inicializa um contador para o número de valores que puderam ser parseados como data
-    ok = 0
-    # Itera sobre cada valor na amostra
-    for v in s:
-        try:
-            # Tenta fazer o parse do valor para datetime usando o parser flexível da dateutil
-            # fuzzy=True permite ignorar partes da string que não são datas (ex: "relatório 2023-01-01")
-            _ = parser.parse(v, fuzzy=True)
-            # Se o parse for bem-sucedido, incrementa o contador 'ok'
-            ok += 1
-        except Exception:
-            # Se ocorrer um erro ao tentar o parse (o valor não é uma data válida), ignora
-            pass
-    # Retorna True se pelo menos 70% (0.7) dos valores da amostra puderam ser parseados como data, caso contrário False
-    return (ok / len(s)) >= 0.7
-
-# Define uma função chamada to_datetime_safe que recebe uma série Pandas
-def to_datetime_safe(series: pd.Series) -> pd.Series:
-    # Tenta converter a série para o tipo datetime do Pandas
-    # errors="coerce" fará com que valores que não podem ser convertidos se tornem NaT (Not a Time)
-    # infer_datetime_format=True permite que o Pandas tente inferir o formato da data para uma conversão mais rápida
-    return pd.to_datetime(series, errors="coerce", infer_datetime_format=True)
-
-def coerce_numeric(series: pd.Series) -> pd.Series:
-    # tenta converter removendo separadores comuns
-    s = series.astype(str).str.strip()
-    # troca vírgula decimal por ponto quando parece numérico
-    s = s.str.replace(".", "", regex=False)  # remove separador de milhar comum (.)
-    s = s.str.replace(",", ".", regex=False)  # decimal vírgula -> ponto
-    return pd.to_numeric(s, errors="coerce")
-
-# Define uma função chamada download_button_csv que recebe um DataFrame, um nome de arquivo e um separador
-def download_button_csv(df: pd.DataFrame, filename="dados_tratados.csv", sep=";"):
-    # Converte o DataFrame para uma string CSV, sem o índice, usando o separador especificado, e codifica para bytes com BOM (para Excel)
-    csv_bytes = df.to_csv(index=False, sep=sep).encode("utf-8-sig")  # <- utf-8-sig pro Excel
-    # Cria um botão de download no Streamlit
-    st.download_button(
-        "⬇️ Baixar CSV tratado (Excel)", # Texto exibido no botão
-        data=csv_bytes,                 # Dados a serem baixados
-        file_name=filename,             # Nome do arquivo quando baixado
-        mime="text/csv",                # Tipo MIME do arquivo
-        use_container_width=True        # O botão ocupa a largura total do contêiner
-    )
-
-
-# Define uma função chamada df_info_summary que recebe um DataFrame e retorna um novo DataFrame com um resumo das colunas
-def df_info_summary(df: pd.DataFrame) -> pd.DataFrame:
-    # Retorna um novo DataFrame com informações sumarizadas de cada coluna do DataFrame de entrada
-    return pd.DataFrame({
-        "coluna": df.columns,                                       # Lista os nomes das colunas
-        "dtype": [str(df[c].dtype) for c in df.columns],            # Lista os tipos de dados de cada coluna (como string)
-        "nulos": [int(df[c].isna().sum()) for c in df.columns],     # Conta o número de valores nulos em cada coluna
-        "percent_nulos": [float(df[c].isna().mean() * 100) for c in df.columns], # Calcula o percentual de nulos em cada coluna
-        "unicos": [int(df[c].nunique(dropna=True)) for c in df.columns], # Conta o número de valores únicos (ignorando nulos) em cada coluna
-    })
-
-
 # Estado
 
-# Verifica se a chave 'df_original' não existe no st.session_state (estado da sessão do Streamlit)
-if "df_original" not in st.session_state:
-    # Se não existir, inicializa 'df_original' como None no estado da sessão
-    st.session_state.df_original = None
-# Verifica se a chave 'df' não existe no st.session_state
-if "df" not in st.session_state:
-    # Se não existir, inicializa 'df' como None no estado da sessão (este será o DataFrame atual modificado)
-    st.session_state.df = None
+# Verifica se a chave 'history' não existe no st.session_state (estado da sessão do Streamlit)
+if "history" not in st.session_state:
+    # Histórico das etapas: guarda o DataFrame original uma única vez e o delta de cada etapa (None antes do upload);
+    # é o único dono dos DataFrames da sessão (o atual é history.current), para o gerenciador de memória poder
+    # descarregá-los em disco quando a sessão fica ociosa
+    st.session_state.history = None
+# Verifica se a chave 'session_id' não existe no st.session_state
+if "session_id" not in st.session_state:
+    # Identificador da sessão no gerenciador de memória
+    st.session_state.session_id = uuid.uuid4().hex
 # Verifica se a chave 'log' não existe no st.session_state
 if "log" not in st.session_state:
-    # Se não existir, inicializa 'log' como uma lista vazia no estado da sessão (para registrar as ações)
+    # Se não existir, inicializa 'log' como uma lista vazia (avisos fora das etapas: carregamento, processamento em streaming)
     st.session_state.log = []
+# Verifica se a chave 'df_version' não existe no st.session_state
+if "df_version" not in st.session_state:
+    # Contador incrementado a cada alteração do DataFrame; chave do cache de diagnósticos
+    st.session_state.df_version = 0
+    # Cache dos diagnósticos (resumo, nulos, duplicadas) da versão atual
+    st.session_state.diag = DiagnosticsCache()
+# Verifica se a chave 'export' não existe no st.session_state
+if "export" not in st.session_state:
+    # Arquivos exportados em disco, gerados só quando pedidos e reaproveitados por versão do DataFrame
+    st.session_state.export = ExportCache()
+# Verifica se a chave 'plan' não existe no st.session_state
+if "plan" not in st.session_state:
+    # Etapas registradas no modo plano e ainda não executadas
+    st.session_state.plan = []
+# Verifica se a chave 'metrics' não existe no st.session_state
+if "metrics" not in st.session_state:
+    # Métricas de cada fase medida (leitura, etapas, exportação) e o último perfil cProfile
+    st.session_state.metrics = []
+    st.session_state.profile_dump = None
+# Verifica se a chave 'sample_source' não existe no st.session_state
+if "sample_source" not in st.session_state:
+    # Modo amostra: opções de leitura do arquivo completo e total de linhas (None fora desse modo)
+    st.session_state.sample_source = None
+# Verifica se a chave 'stream_source' não existe no st.session_state
+if "stream_source" not in st.session_state:
+    # Configurações de leitura do arquivo completo no modo streaming (None fora desse modo)
+    st.session_state.stream_source = None
+# Verifica se a chave 'batch_report' não existe no st.session_state
+if "batch_report" not in st.session_state:
+    # Leitura em lote: relatório por arquivo e colunas com tipos unificados (None quando foi enviado um CSV só)
+    st.session_state.batch_report = None
+# Verifica se a chave 'task' não existe no st.session_state
+if "task" not in st.session_state:
+    # Tarefa em segundo plano (leitura ou etapa) e a função que aplica o resultado dela à sessão (None sem tarefa)
+    st.session_state.task = None
 
 # Define uma função chamada 'log_step' que aceita uma mensagem (string)
 def log_step(msg: str):
     # Adiciona a mensagem fornecida à lista 'log' no estado da sessão
     st.session_state.log.append(msg)
 
+# Define uma função que inicia a medição de uma fase com as opções de instrumentação da barra lateral
+def measure_phase(phase: str, rows_in=None, mem_before=None) -> Measure:
+    return Measure(phase, rows_in, mem_before, trace_memory=trace_memory, profile=profile_steps)
+
+
+# Define uma função que inicia a medição de uma etapa sobre o DataFrame atual
+def measure_step(spec: dict, df: pd.DataFrame) -> Measure:
+    # Memória antes: soma do perfil em cache da versão atual (sem varrer o DataFrame de novo)
+    mem = st.session_state.diag.summary(df, st.session_state.df_version)["memoria_mb"].sum()
+    return measure_phase(describe_step(spec), df.shape[0], mem)
+
+
+# Define uma função que guarda as métricas de uma fase medida (e o perfil cProfile, se houver)
+def record_measure(measure: Measure):
+    st.session_state.metrics.append(measure.record)
+    if measure.profiler is not None:
+        # Guarda só o perfil da última fase perfilada
+        st.session_state.profile_dump = {"fase": measure.phase, "text": measure.profile_text(),
+                                         "bytes": measure.profile_bytes()}
+
+
+# Define uma função que grava o resultado de uma etapa na sessão e registra spec, mensagem e delta no histórico
+def commit_step(df: pd.DataFrame, spec: dict, info: dict, msg: str, measure=None):
+    # Nova versão do DataFrame
+    st.session_state.df_version += 1
+    # Atualiza os diagnósticos em cache a partir da etapa, em vez de recalcular tudo
+    st.session_state.diag.advance(st.session_state.history.current, df, spec, info, st.session_state.df_version)
+    # Memória depois: perfil da nova versão, o mesmo que a próxima execução da página usaria (fica em cache)
+    if measure is not None:
+        record_measure(measure.done(df, mem_after=st.session_state.diag.summary(df, st.session_state.df_version)
+                                    ["memoria_mb"].sum()))
+    # No modo amostra, as contagens da mensagem (ex: linhas removidas) se referem à amostra
+    if st.session_state.sample_source is not None:
+        msg += " 🔬 (na amostra)"
+    # Guarda no histórico só o que a etapa mudou (o log e a receita saem das etapas aplicadas)
+    # O DataFrame atual da sessão passa a ser o resultado da etapa
+    st.session_state.history.push(df, spec, info, msg)
+
+
+# Define uma função que inicia a sessão com o DataFrame recém-carregado (arquivo único ou lote)
+def start_dataset(df: pd.DataFrame, load_measure: Measure, rows_in=None):
+    # Nova versão do DataFrame e cache de diagnósticos vazio
+    st.session_state.df_version += 1
+    st.session_state.diag = DiagnosticsCache()
+    # Reinicia o plano pendente, o resultado de um processamento anterior e as exportações do arquivo anterior
+    st.session_state.plan = []
+    st.session_state.stream_output = None
+    st.session_state.export.clear()
+    # Memória ocupada pelo DataFrame ao carregar, para comparar com a atual no resumo
+    st.session_state.load_memory_mb = df.memory_usage(deep=True).sum() / 2**20
+    # Métricas da leitura: linhas lidas (no modo amostra, as do arquivo inteiro) e linhas mantidas
+    load_measure.rows_in = rows_in
+    record_measure(load_measure.done(df, mem_after=st.session_state.load_memory_mb))
+    # Guarda o DataFrame original uma única vez; com copy-on-write o atual o compartilha até uma etapa alterá-lo
+    st.session_state.history = History(df)
+    # Reinicia o log de ações
+    st.session_state.log = []
+
+
+# Define uma função que registra uma etapa no plano pendente (modo plano), sem executá-la
+def queue_step(spec: dict):
+    st.session_state.plan.append(spec)
+    st.success(f"Adicionada ao plano: {describe_step(spec)}")
+
+
+# Define uma função que otimiza e executa de uma vez as etapas pendentes, registrando-as como uma entrada do histórico
+def run_pending_plan(workers: int, then=None):
+    """Roda em segundo plano; 'then()' continua no script depois do plano registrado (ou direto, sem plano pendente).
+    Retorna o que 'then' retornar (True sem 'then'), ou None se o plano foi cancelado ou falhou."""
+    steps = st.session_state.plan
+    if not steps:
+        return then() if then is not None else True
+    spec = {"op": "plan", "steps": steps}
+    current = st.session_state.history.current
+    measure = measure_step(spec, current)
+
+    def work():
+        with measure:
+            return run_plan(current, steps, workers, engine)
+
+    def finish(result):
+        df, info = result
+        commit_step(df, spec, info,
+                    f"Plano executado: {len(steps)} etapas em {info['passes']} passadas "
+                    f"({'; '.join(describe_step(s) for s in steps)}). Linhas removidas: {info['removed']}; "
+                    f"colunas convertidas: {len(info['converted'])}.", measure=measure)
+        st.session_state.plan = []
+        return then() if then is not None else True
+
+    return run_task(f"Plano ({len(steps)} etapas)", work, finish)
+
+
+# Define uma função que marca a troca do DataFrame atual por outra posição do histórico (desfazer/refazer)
+def move_history():
+    # Nova versão: o cache de diagnósticos é recalculado para o DataFrame reconstruído
+    st.session_state.df_version += 1
+
+
+# Define uma função que roda uma fase longa em segundo plano e aplica o resultado quando ela termina
+def run_task(label: str, func, on_done):
+    """'func' roda numa thread própria e não mexe na sessão; 'on_done(resultado)' roda no script, só se a tarefa
+    terminar bem, e é a única parte que altera a sessão. Retorna o que 'on_done' retornar, ou None."""
+    st.session_state.task = {"task": BackgroundTask(label, func), "on_done": on_done}
+    return wait_task()
+
+
+# Define uma função que descreve o andamento da tarefa: última unidade concluída, contagem, tempo e ETA
+def task_text(task: BackgroundTask) -> str:
+    p = task.progress
+    text = task.label + (f" — {p.label}" if p.label else "") + (f" ({p.done}/{p.total})" if p.total else "")
+    text += f" · {p.elapsed:.0f} s"
+    eta = p.eta()
+    if eta is not None and p.done < p.total:
+        text += f" · faltam ≈ {eta:.0f} s"
+    return text + (" · cancelando..." if p.cancel_requested.is_set() else "")
+
+
+# Define uma função que acompanha a tarefa pendente (barra de progresso, ETA e botão de cancelar) até ela terminar
+def wait_task():
+    job = st.session_state.task
+    if job is None:
+        return None
+    task = job["task"]
+    # Um clique na página enquanto espera reinicia o script: a tarefa continua e é acompanhada de novo aqui
+    box = st.empty()
+    with box.container():
+        bar = st.progress(task.progress.fraction, text=task_text(task))
+        if st.button("⏹️ Cancelar", key=f"cancel_task_{task.id}"):
+            task.cancel()
+        while not task.wait(0.25):
+            bar.progress(task.progress.fraction, text=task_text(task))
+            # A tarefa usa os DataFrames da sessão: enquanto ela roda, a sessão não conta como ociosa
+            GOVERNOR.keep_alive(st.session_state.session_id)
+    box.empty()
+    # O resultado é aplicado de uma vez: cancelada ou com erro, a sessão fica como estava
+    st.session_state.task = None
+    if task.status == "done":
+        return job["on_done"](task.result)
+    if task.status == "cancelled":
+        st.warning(f"{task.label}: cancelada. Nada foi alterado.")
+    else:
+        st.error(f"{task.label}: {task.error}")
+    return None
+
+
+# Define uma função que aplica uma etapa em segundo plano e a registra no histórico quando termina
+def run_step(df: pd.DataFrame, spec: dict, message, **kwargs):
+    """'message' é o texto do log ou uma função (DataFrame resultante, informações) -> texto.
+    Retorna (DataFrame, informações) se a etapa terminou, ou None (cancelada ou com erro)."""
+    measure = measure_step(spec, df)
+
+    def work():
+        with measure:
+            return engine.apply_step(df, spec, **kwargs)
+
+    def finish(result):
+        out, info = result
+        commit_step(out, spec, info, message(out, info) if callable(message) else message, measure=measure)
+        return result
+
+    return run_task(describe_step(spec), work, finish)
+
 
 # UI
 
@@ -169,102 +284,312 @@ with st.sidebar:
     # Adiciona um cabeçalho para a seção de upload na barra lateral
     st.header("📥 Upload")
     # Cria um widget de upload de arquivo para arquivos CSV
-    uploaded = st.file_uploader("Selecione um arquivo CSV", type=["csv"])
+    # Cria um widget de upload para um ou mais CSVs, ou um .zip com vários (ex: partições diárias)
+    uploaded = st.file_uploader("Selecione um ou mais CSVs (ou um .zip)", type=["csv", "zip"],
+                                accept_multiple_files=True)
+    # Cria uma caixa de seleção para identificar, no lote, de que arquivo veio cada linha
+    add_source = st.checkbox("Coluna com o arquivo de origem (lote)", value=False,
+                             help="Adiciona a coluna categórica 'arquivo_origem' ao juntar vários arquivos.")
 
     # Adiciona um divisor visual na barra lateral
     st.divider()
     # Adiciona um cabeçalho para a seção de configurações de leitura
     st.header("⚙️ Configurações de leitura")
-    # Cria um seletor para o separador de colunas do CSV, com "," como padrão
-    sep = st.selectbox("Separador", options=[",", ";", "\t", "|"], index=0)
-    # Cria um seletor para o separador decimal (apenas para referência na UI, não afeta leitura diretamente aqui)
-    decimal = st.selectbox("Decimal (apenas referência)", options=[".", ","], index=0)
-    # Cria uma caixa de seleção para indicar se o CSV tem cabeçalho, marcada como verdadeira por padrão
-    has_header = st.checkbox("Arquivo tem cabeçalho?", value=True)
+    # Cria um seletor para o separador de colunas do CSV; "Automático" detecta a partir do início do arquivo
+    sep = st.selectbox("Separador", options=["Automático", ",", ";", "\t", "|"], index=0,
+                       help="Automático: detectado pelo csv.Sniffer e pela contagem de campos nas primeiras linhas.")
+    # Cria um seletor para o separador decimal, usado pela tipagem automática para desempatar números ambíguos (ex: "1.234")
+    decimal = st.selectbox("Decimal (desempate em números ambíguos)", options=[".", ","], index=0,
+                           help="A tipagem detecta o separador decimal de cada coluna; este valor só decide quando os dois são possíveis.")
+    # Cria um seletor para indicar se o CSV tem cabeçalho; "Automático" compara a primeira linha com as seguintes
+    has_header = {"Automático": "auto", "Sim": True, "Não": False}[
+        st.selectbox("Arquivo tem cabeçalho?", options=["Automático", "Sim", "Não"], index=0)]
     # Cria um campo de texto para o usuário inserir valores a serem considerados como NA (Not Applicable/Nulo)
     na_values_text = st.text_input("Valores para considerar como NA (separe por vírgula)", "NA,NaN,null,NULL,")
     # Processa a string de NA_values para criar uma lista de strings, removendo espaços e entradas vazias
     na_values = [x.strip() for x in na_values_text.split(",") if x.strip() != ""]
+    # Cria uma caixa de seleção para carregar com o PyArrow: colunas em memória Arrow (string[pyarrow]) em vez de objetos Python
+    arrow = st.checkbox("Carregar com PyArrow (menos memória em colunas de texto)", value=False, disabled=pa is None,
+                        help="Leitura multithread; textos ficam como string[pyarrow] em todas as etapas e na exportação."
+                        if pa is not None else "Instale o PyArrow para habilitar (pip install pyarrow).")
+    # Cria uma caixa de seleção para guardar em disco os datasets lidos: o mesmo arquivo, com as mesmas opções,
+    # carrega de novo sem detecção nem leitura do CSV (também depois de reiniciar o servidor)
+    use_cache = st.checkbox("Cache em disco dos arquivos lidos", value=pa is not None, disabled=pa is None,
+                            help="Guarda o dataset lido em Arrow, chaveado pelo conteúdo do arquivo e pelas opções de "
+                                 "leitura; não vale nos modos streaming e amostra." if pa is not None
+                            else "Instale o PyArrow para habilitar (pip install pyarrow).")
+    cache_mb = int(st.number_input("Tamanho máximo do cache (MB)", min_value=0, value=DEFAULT_CACHE_MB, step=256,
+                                   disabled=not use_cache))
+    dataset_cache = DatasetCache(max_mb=cache_mb if use_cache else 0)
+    if dataset_cache.enabled:
+        cache_used = dataset_cache.size_bytes() / 2**20
+        st.caption(f"Cache em disco: {cache_used:.0f} MB de {cache_mb} MB")
+        if st.button("Limpar cache em disco", key="clear_cache", disabled=cache_used == 0):
+            dataset_cache.clear()
+            st.success("Cache em disco limpo.")
+    # Cria uma caixa de seleção para estimar os valores únicos com HyperLogLog (mais rápido em colunas de alta cardinalidade)
+    approx_distinct = st.checkbox("Contagem aproximada de únicos (HyperLogLog, erro ≈ 1,6%)", value=False)
+    # Cria uma caixa de seleção para processar o arquivo em blocos, sem carregá-lo inteiro na memória
+    streaming = st.checkbox("Modo streaming (arquivo maior que a memória)", value=False,
+                            help="Mostra só o primeiro bloco como prévia; as etapas são reaplicadas bloco a bloco no arquivo completo ao exportar.")
+    # Cria uma caixa de seleção para trabalhar sobre uma amostra uniforme do arquivo (cliques rápidos em arquivos grandes)
+    sample_preview = st.checkbox("Prévia por amostra (arquivo grande)", value=False,
+                                 help="As etapas rodam sobre uma amostra aleatória das linhas; na exportação são "
+                                      "reaplicadas ao arquivo completo.")
+    # Cria um campo numérico para o tamanho da amostra
+    sample_rows = int(st.number_input("Linhas da amostra", min_value=1_000, value=100_000, step=10_000,
+                                      disabled=not sample_preview))
+    # Cria um campo numérico para o tamanho de cada bloco lido no modo streaming (e na leitura da amostra)
+    chunksize = int(st.number_input("Linhas por bloco (streaming)", min_value=1_000, value=100_000, step=10_000,
+                                    disabled=not (streaming or sample_preview)))
+    # Cria um campo numérico para o número de colunas processadas em paralelo (perfil, limpeza de texto e tipagem)
+    workers = int(st.number_input("Núcleos (colunas em paralelo)", min_value=1, max_value=default_workers(),
+                                  value=default_workers(),
+                                  help="Colunas Arrow/numéricas e limpeza de texto em threads; tipagem de colunas "
+                                       "de objetos Python em processos. Abaixo de 2 milhões de células roda em série."))
+    # Cria um seletor para o motor que executa as etapas (Polars só se estiver instalado)
+    engine_labels = {ENGINES[name].label: name for name in available_engines()}
+    engine = get_engine(engine_labels[st.selectbox(
+        "Motor de execução", options=list(engine_labels),
+        help="Polars calcula duplicadas, nulos, quartis do IQR e limpeza de texto em paralelo, com o mesmo resultado "
+             "do pandas; tipagem e categorias continuam no pandas." if pl is not None
+        else "Instale o Polars para habilitar outro motor (pip install polars).")])
+    # Cria uma caixa de seleção para só registrar as etapas e executá-las de uma vez (prévia ou exportação)
+    plan_mode = st.checkbox("Modo plano (executar as etapas de uma vez)", value=False,
+                            help="As etapas são registradas sem rodar; ao executar, o plano é otimizado: colunas removidas "
+                                 "saem antes, filtros viram uma máscara só e etapas por coluna uma passada só.")
+    # Cria uma caixa de seleção para medir o pico de memória alocada em cada fase (tracemalloc)
+    trace_memory = st.checkbox("Medir pico de memória (tracemalloc; deixa as etapas mais lentas)", value=False)
+    # Cria uma caixa de seleção para gravar um perfil cProfile das fases (o último fica disponível para download)
+    profile_steps = st.checkbox("Perfilar etapas com cProfile", value=False,
+                                help="Guarda o perfil da última fase executada; baixe-o no painel de log.")
     # Adiciona outro divisor visual na barra lateral
     st.divider()
 
     # Cria um botão "Resetar tudo" na barra lateral
     if st.button("🔄 Resetar tudo", use_container_width=True):
-        # Quando clicado, redefine o DataFrame original para None no estado da sessão
-        st.session_state.df_original = None
-        # Redefine o DataFrame atual para None no estado da sessão
-        st.session_state.df = None
+        # Cancela a tarefa em segundo plano, se houver (o resultado dela é descartado)
+        if st.session_state.task is not None:
+            st.session_state.task["task"].cancel()
+            st.session_state.task = None
+        # Quando clicado, descarta o histórico (original e deltas) no estado da sessão
+        # (o DataFrame atual vai junto: ele é a posição atual do histórico)
+        st.session_state.history = None
         # Limpa o log de ações no estado da sessão
         st.session_state.log = []
+        # Descarta o plano pendente
+        st.session_state.plan = []
+        # Limpa a configuração dos modos streaming e amostra e apaga as exportações em disco
+        st.session_state.stream_source = None
+        st.session_state.sample_source = None
+        st.session_state.export.clear()
+        st.session_state.stream_output = None
+        # Descarta as métricas e o perfil das fases
+        st.session_state.metrics = []
+        st.session_state.profile_dump = None
+        # Descarta o relatório da leitura em lote
+        st.session_state.batch_report = None
         # Força o Streamlit a reroduzir o script desde o início, limpando a UI e o estado
         st.rerun()
 
 
 # Carregar CSV
 
-# Verifica se um arquivo foi carregado (uploaded é diferente de None) E se o DataFrame atual ainda não foi carregado na sessão
-if uploaded is not None and st.session_state.df is None:
+# Tarefa de uma execução anterior (a página foi reiniciada por um clique enquanto ela rodava): acompanha e aplica
+wait_task()
+
+# Vários arquivos ou um .zip: lidos em paralelo, com nomes padronizados e tipos unificados, e juntados de uma vez
+batch = bool(uploaded) and (len(uploaded) > 1 or is_zip(uploaded[0].name, uploaded[0].getvalue()))
+if batch and st.session_state.history is None:
+    # Opções de leitura escolhidas na barra lateral ("auto" = detectar em cada arquivo)
+    chosen = {"sep": "auto" if sep == "Automático" else sep, "has_header": has_header, "quotechar": "auto"}
+    if streaming or sample_preview:
+        st.warning("Os modos streaming e amostra valem para um arquivo só; o lote é carregado inteiro.")
+    # Métricas do arquivo anterior dão lugar às deste lote
+    st.session_state.metrics = []
+    st.session_state.profile_dump = None
+    files = [(f.name, f.getvalue()) for f in uploaded]
+    source_column = "arquivo_origem" if add_source else None
+    # Cache em disco: o mesmo lote (conteúdo e nomes dos arquivos) com as mesmas opções não é lido de novo
+    cache_key = dataset_cache.key([data for _, data in files], dict(
+        chosen, na_values=na_values, arrow=arrow, names=[name for name, _ in files], source=source_column)) \
+        if dataset_cache.enabled else None
+    cached = dataset_cache.get(cache_key) if cache_key else None
+    load_measure = measure_phase(f"Leitura do lote ({len(uploaded)} envios)" + (" do cache" if cached else ""))
+
+    # Leitura em segundo plano: cada arquivo lido avança o progresso
+    def load_batch():
+        with load_measure:
+            if cached:
+                df, meta = cached
+                report, converted = pd.DataFrame(meta["report"], columns=REPORT_COLUMNS), meta["converted"]
+            else:
+                df, report, converted = read_batch(files, chosen, na_values, arrow, workers, source_column)
+        if cache_key and not cached:
+            dataset_cache.put(cache_key, df, {"report": report.to_dict("records"), "converted": converted})
+        return df, report, converted
+
+    # Inicia a sessão com o lote lido (só quando a leitura termina)
+    def finish_batch(result):
+        df, report, converted = result
+        # Receita: as opções da barra lateral; os nomes padronizados entram como primeira etapa ao gravá-la
+        st.session_state.read_opts = dict(chosen, na_values=na_values, arrow=arrow)
+        st.session_state.stream_source = None
+        st.session_state.sample_source = None
+        st.session_state.batch_report = {"report": report, "converted": converted}
+        start_dataset(df, load_measure)
+        failed = int(report["erro"].notna().sum())
+        log_step(
+            f"Lote carregado{' do cache em disco' if cached else ''}: {len(report) - failed} de {len(report)} arquivos, {df.shape[0]} linhas e {df.shape[1]} "
+            f"colunas (nomes padronizados; {len(converted)} colunas com tipos unificados"
+            + (f"; {failed} arquivos com erro" if failed else "") + f"; leitura em {report['tempo_s'].sum():.2f} s "
+            f"somando os arquivos; {st.session_state.load_memory_mb:.1f} MB em memória)"
+        )
+
+    run_task("Leitura do lote", load_batch, finish_batch)
+
+# Verifica se um arquivo foi carregado E se o DataFrame atual ainda não foi carregado na sessão
+elif uploaded and st.session_state.history is None:
     # Obtém o conteúdo do arquivo carregado como bytes
-    file_bytes = uploaded.getvalue()
-    # Detecta a codificação do arquivo usando a função 'detect_encoding'
-    enc = detect_encoding(file_bytes)
-
-    try:
-        # Tenta ler o arquivo CSV usando pandas.read_csv
-        df = pd.read_csv(
-            # Cria um fluxo de bytes em memória a partir dos bytes do arquivo
-            io.BytesIO(file_bytes),
-            # Define o separador de colunas conforme selecionado na UI
-            sep=sep,
-            # Define a codificação detectada
-            encoding=enc,
-            # Define o cabeçalho: 0 se 'has_header' for True, None caso contrário
-            header=0 if has_header else None,
-            # Define os valores a serem considerados como NA (nulos)
-            na_values=na_values
+    file_bytes = uploaded[0].getvalue()
+    # Opções de leitura escolhidas na barra lateral ("auto" = detectar)
+    chosen = {"sep": "auto" if sep == "Automático" else sep, "has_header": has_header, "quotechar": "auto"}
+    # Cache em disco (só na leitura inteira): o mesmo conteúdo com as mesmas opções volta já lido e detectado
+    cache_key = None if streaming or sample_preview or not dataset_cache.enabled else \
+        dataset_cache.key([file_bytes], dict(chosen, na_values=na_values, arrow=arrow))
+    cached = dataset_cache.get(cache_key) if cache_key else None
+
+    # Métricas do arquivo anterior dão lugar às deste
+    st.session_state.metrics = []
+    st.session_state.profile_dump = None
+    load_measure = measure_phase("Leitura do CSV" + (" do cache" if cached else ""))
+
+    # Detecção e leitura em segundo plano: cada fase (ou cada bloco, no modo amostra) avança o progresso
+    def load_file():
+        if cached:
+            # Encoding, dialeto e opções resolvidas vêm da entrada do cache
+            enc_info, dialect, read_opts = (cached[1][k] for k in ("enc_info", "dialect", "read_opts"))
+        else:
+            tasks.add_total(2)
+            # Detecta a codificação do arquivo usando a função 'detect_encoding' (prefixo + blocos amostrados)
+            enc_info = detect_encoding(file_bytes)
+            tasks.advance(label=f"encoding {enc_info['encoding']}")
+            # Detecta separador, aspas e cabeçalho num prefixo do arquivo: a leitura completa acerta de primeira
+            dialect = sniff_dialect(file_bytes, enc_info["encoding"])
+            # Dicionário com as opções de leitura resolvidas (as escolhas da barra lateral prevalecem sobre a detecção)
+            read_opts = dict(resolve_dialect(chosen, dialect), encoding=enc_info["encoding"], na_values=na_values,
+                             arrow=arrow)
+            tasks.advance(label="dialeto detectado")
+        # Linhas do arquivo inteiro (só no modo amostra)
+        rows = None
+        try:
+            with load_measure:
+                if cached:
+                    # Acerto no cache: o arquivo Arrow é mapeado em memória, sem ler o CSV
+                    df = cached[0]
+                elif sample_preview:
+                    # Modo amostra: percorre o arquivo em blocos guardando uma amostra uniforme das linhas
+                    # (total de blocos estimado pelas quebras de linha)
+                    tasks.add_total(file_bytes.count(b"\n") // chunksize + 1)
+                    reservoir = RowReservoir(sample_rows)
+                    for chunk in read_csv_bytes(file_bytes, chunksize=chunksize, **read_opts):
+                        reservoir.update(chunk)
+                        tasks.advance(label=f"{reservoir.count} linhas lidas")
+                    df, rows = reservoir.result(), reservoir.count
+                elif streaming:
+                    # Modo streaming: carrega só o primeiro bloco como prévia; o arquivo completo é lido na exportação
+                    df = next(iter(read_csv_bytes(file_bytes, chunksize=chunksize, **read_opts)))
+                else:
+                    # Lê o arquivo CSV uma única vez
+                    tasks.add_total(1)
+                    df = read_csv_bytes(file_bytes, **read_opts)
+                    tasks.advance(label="CSV lido")
+        except tasks.Cancelled:
+            raise
+        except Exception as e:
+            # Em caso de erro (ex: separador errado), a mensagem diz o encoding usado
+            raise ValueError(f"Não foi possível ler o CSV (encoding {enc_info['encoding']}): {e}") from e
+        # Leitura inteira nova: guarda o DataFrame e o que foi detectado para a próxima vez
+        if cache_key and not cached:
+            dataset_cache.put(cache_key, df, {"enc_info": enc_info, "dialect": dialect, "read_opts": read_opts})
+        return df, enc_info, dialect, read_opts, rows
+
+    # Inicia a sessão com o DataFrame lido (só quando a leitura termina)
+    def finish_file(result):
+        df, enc_info, dialect, read_opts, rows = result
+        # Separador escolhido à mão que deixa o arquivo com uma coluna só, quando a detecção acha mais colunas
+        if df.shape[1] == 1 and chosen["sep"] != "auto" and dialect["columns"] > 1:
+            st.warning(f"O arquivo ficou com uma coluna só; o separador detectado seria '{dialect['sep']}' "
+                       f"({dialect['columns']} colunas). Escolha 'Automático' ou outro separador e resete.")
+        # Guarda as opções de leitura (sem o encoding, detectado a cada arquivo) para gravar na receita;
+        # o que estava em "Automático" continua "auto" e é detectado de novo em cada arquivo do lote
+        st.session_state.read_opts = dict(chosen, na_values=na_values, arrow=arrow)
+        # Guarda as opções de leitura para reler o arquivo completo em blocos (só no modo streaming)
+        st.session_state.stream_source = dict(read_opts, chunksize=chunksize) if streaming else None
+        # Guarda as opções de leitura e o total de linhas do arquivo (só no modo amostra)
+        st.session_state.sample_source = (
+            {"read": read_opts, "rows": rows, "sample": df.shape[0]} if sample_preview else None
         )
-    except Exception:
-        # Em caso de erro na leitura com a codificação detectada, tenta um fallback simples
-        df = pd.read_csv(
-            # Cria um fluxo de bytes em memória a partir dos bytes do arquivo
-            io.BytesIO(file_bytes),
-            # Define o separador de colunas conforme selecionado na UI
-            sep=sep,
-            # Usa "utf-8" como codificação de fallback
-            encoding="utf-8",
-            # Define o cabeçalho: 0 se 'has_header' for True, None caso contrário
-            header=0 if has_header else None,
-            # Define os valores a serem considerados como NA (nulos)
-            na_values=na_values
+        st.session_state.batch_report = None
+        # Inicia a sessão com o DataFrame lido (no modo amostra, as linhas lidas são as do arquivo inteiro)
+        start_dataset(df, load_measure, rows)
+        # Registra a ação de carregamento do arquivo no log
+        log_step(
+            (f"Modo amostra ({rows} linhas no arquivo): amostra com " if sample_preview else
+             "Modo streaming: prévia com " if streaming else
+             "Arquivo carregado do cache em disco com " if cached else "Arquivo carregado com ") +
+            f"{df.shape[0]} linhas e {df.shape[1]} colunas. "
+            f"(encoding detectado: {enc_info['encoding']}, confiança {enc_info['confidence']:.0%}, "
+            f"{enc_info['bytes_scanned']} bytes analisados via {enc_info['method']}; "
+            f"separador {read_opts['sep']!r}, aspas {read_opts['quotechar']!r}, "
+            f"{'com' if read_opts['has_header'] else 'sem'} cabeçalho"
+            f" (detecção: {dialect['method']}); "
+            f"{'PyArrow' if arrow else 'pandas'}, {st.session_state.load_memory_mb:.1f} MB em memória)"
         )
 
-    # Se o arquivo não tiver cabeçalho (has_header é False)
-    if not has_header:
-        # Atribui nomes de coluna genéricos (ex: "col_0", "col_1")
-        df.columns = [f"col_{i}" for i in range(df.shape[1])]
-
-    # Armazena uma cópia do DataFrame original no estado da sessão
-    st.session_state.df_original = df.copy()
-    # Armazena uma cópia do DataFrame atual (que será modificado) no estado da sessão
-    st.session_state.df = df.copy()
-    # Reinicia o log de ações
-    st.session_state.log = []
-    # Registra a ação de carregamento do arquivo no log
-    log_step(f"Arquivo carregado com {df.shape[0]} linhas e {df.shape[1]} colunas. (encoding detectado: {enc})")
+    run_task("Leitura do CSV", load_file, finish_file)
 
-# Atribui o DataFrame atual da sessão (st.session_state.df) à variável local 'df'
-df = st.session_state.df
+# Atribui o DataFrame atual da sessão (posição atual do histórico) à variável local 'df'; se a sessão ficou ociosa e
+# foi descarregada em disco, o acesso recarrega os DataFrames
+df = st.session_state.history.current if st.session_state.history is not None else None
 
 # Verifica se o DataFrame 'df' é None (o que significa que nenhum arquivo foi carregado ainda)
 if df is None:
     # Exibe uma mensagem informativa na interface do Streamlit
-    st.info("Faça o upload de um CSV na barra lateral para começar.")
+    st.info("Faça o upload de um CSV (ou de vários, ou de um .zip) na barra lateral para começar.")
     # Interrompe a execução do script Streamlit neste ponto, aguardando o upload do arquivo
     st.stop()
 
 
 # Visão geral
 
+# Cache de diagnósticos e versão atual do DataFrame: só recalculam quando uma etapa altera o DataFrame
+diag, version = st.session_state.diag, st.session_state.df_version
+# Aplica as opções do perfil de colunas (aproximação de únicos, colunas em paralelo)
+diag.configure(approx_distinct, workers)
+# Perfil por coluna da versão atual (nulos, únicos, mín/máx...), compartilhado pelo resumo e pelas etapas
+profile = diag.summary(df, version)
+
+# Registra o acesso desta sessão no gerenciador de memória: atual (perfil em cache) + deltas + original, se já não
+# for o atual. Passando do orçamento, sessões ociosas (de outras abas ou usuários) vão para o disco
+history = st.session_state.history
+session_bytes = (profile["memoria_mb"].sum() * 2**20 + history.nbytes()
+                 + (st.session_state.get("load_memory_mb", 0) * 2**20 if history.current is not history.original else 0))
+GOVERNOR.touch(st.session_state.session_id, history, session_bytes)
+with st.sidebar:
+    st.divider()
+    st.header("🧠 Memória")
+    usage = GOVERNOR.usage(st.session_state.session_id)
+    st.caption(f"Esta sessão: {usage['session_bytes'] / 2**20:.0f} MB · todas as sessões em memória: "
+               f"{usage['in_memory_bytes'] / 2**20:.0f} MB de {usage['budget_bytes'] / 2**20:.0f} MB "
+               f"({usage['sessions']} sessões)")
+    if usage["spilled_sessions"]:
+        st.caption(f"{usage['spilled_sessions']} sessões ociosas em disco ({usage['spilled_bytes'] / 2**20:.0f} MB); "
+                   "voltam para a memória no próximo acesso.")
+    if usage["session_bytes"] > usage["budget_bytes"]:
+        st.warning("Esta sessão sozinha passa do orçamento de memória do servidor: considere o modo amostra, "
+                   "o modo streaming ou carregar com PyArrow.")
+
 # Cria duas colunas na interface do Streamlit, com proporções de largura 2 para 1 e um espaçamento "large"
 colA, colB = st.columns([2, 1], gap="large")
 
@@ -279,27 +604,63 @@ with colA:
 with colB:
     # Adiciona um subtítulo à coluna
     st.subheader("📊 Resumo")
-    # Exibe o número de linhas do DataFrame
-    st.write(f"**Linhas:** {df.shape[0]}")
-    # Exibe o número de colunas do DataFrame
-    st.write(f"**Colunas:** {df.shape[1]}")
-    # Exibe o número de linhas duplicadas no DataFrame (convertido para inteiro)
-    st.write(f"**Duplicadas (linhas):** {int(df.duplicated().sum())}")
-    # Exibe o número total de células nulas em todo o DataFrame (convertido para inteiro)
-    st.write(f"**Células nulas (total):** {int(df.isna().sum().sum())}")
+    sample = st.session_state.sample_source
+    if sample is not None:
+        # Modo amostra: contagens proporcionais são extrapoladas para o arquivo inteiro e marcadas com 🔬
+        scale = sample["rows"] / sample["sample"] if sample["sample"] else 1.0
+        st.caption(f"🔬 Modo amostra: {sample['sample']} de {sample['rows']} linhas ({sample['sample'] / max(sample['rows'], 1):.1%}). "
+                   "Valores com ≈ são estimados a partir da amostra.")
+        st.write(f"**Linhas:** ≈ {round(df.shape[0] * scale)} 🔬 (amostra: {df.shape[0]})")
+        st.write(f"**Colunas:** {df.shape[1]}")
+        # Duplicadas não crescem proporcionalmente ao tamanho: mostra só a contagem da amostra
+        st.write(f"**Duplicadas na amostra:** {diag.duplicate_count(df, version)} 🔬 (o arquivo inteiro pode ter mais)")
+        st.write(f"**Células nulas (total):** ≈ {round(diag.null_total(df, version) * scale)} 🔬")
+        st.write(f"**Memória:** {profile['memoria_mb'].sum():.1f} MB na amostra "
+                 f"(arquivo inteiro ≈ {profile['memoria_mb'].sum() * scale:.0f} MB 🔬)")
+    else:
+        # No modo streaming, os números se referem apenas ao bloco de prévia
+        if st.session_state.stream_source is not None:
+            st.caption("Modo streaming: números referentes ao primeiro bloco do arquivo.")
+        # Exibe o número de linhas do DataFrame
+        st.write(f"**Linhas:** {df.shape[0]}")
+        # Exibe o número de colunas do DataFrame
+        st.write(f"**Colunas:** {df.shape[1]}")
+        # Exibe o número de linhas duplicadas no DataFrame (convertido para inteiro)
+        st.write(f"**Duplicadas (linhas):** {diag.duplicate_count(df, version)}")
+        # Exibe o número total de células nulas em todo o DataFrame (convertido para inteiro)
+        st.write(f"**Células nulas (total):** {diag.null_total(df, version)}")
+        # Exibe a memória atual do DataFrame (soma do perfil por coluna) e a ocupada ao carregar o arquivo
+        st.write(f"**Memória:** {profile['memoria_mb'].sum():.1f} MB "
+                 f"(ao carregar: {st.session_state.get('load_memory_mb', 0):.1f} MB)")
     # Adiciona uma linha vazia para espaçamento visual
     st.write("")
     # Adiciona uma legenda para a tabela de resumo por coluna
-    st.caption("Detalhe por coluna:")
+    st.caption("Detalhe por coluna" + (" (🔬 calculado sobre a amostra):" if sample is not None else ":"))
     # Exibe um DataFrame com um resumo detalhado por coluna (criado pela função df_info_summary)
     # usando a largura total do contêiner e com altura fixa de 260 pixels
-    st.dataframe(df_info_summary(df), use_container_width=True, height=260)
+    # (mín/máx misturam números e datas; exibidos como texto)
+    st.dataframe(profile.astype({"min": str, "max": str}), use_container_width=True, height=260)
+
+# Leitura em lote: linhas, colunas e tempo de leitura de cada arquivo, e as colunas cujo tipo foi unificado
+if st.session_state.batch_report is not None:
+    with st.expander(f"📚 Arquivos do lote ({len(st.session_state.batch_report['report'])})", expanded=False):
+        st.dataframe(st.session_state.batch_report["report"], use_container_width=True, hide_index=True)
+        for col, change in st.session_state.batch_report["converted"].items():
+            st.caption(f"Tipo unificado: **{col}** ({change})")
 
 # Adiciona um divisor visual horizontal na interface do Streamlit
 st.divider()
 
 # Etapas (Acordeões)
 
+# Rótulos das estratégias de nulos na interface e o código correspondente nos specs das etapas
+NUM_STRATEGIES = {"Não mexer": "keep", "Remover linhas com NA": "drop", "Preencher com 0": "zero",
+                  "Preencher com média": "mean", "Preencher com mediana": "median"}
+CAT_STRATEGIES = {"Não mexer": "keep", "Remover linhas com NA": "drop",
+                  "Preencher com 'DESCONHECIDO'": "unknown", "Preencher com moda (mais frequente)": "mode"}
+DT_STRATEGIES = {"Não mexer": "keep", "Remover linhas com NA": "drop",
+                 "Preencher com data mínima": "min", "Preencher com data máxima": "max"}
+
 # 1) Padronizar nomes de colunas
 with st.expander("1) 🏷️ Padronizar nomes de colunas", expanded=False):
     # Exibe uma mensagem de sugestão para o usuário sobre como padronizar nomes de colunas
@@ -307,9 +668,9 @@ with st.expander("1) 🏷️ Padronizar nomes de colunas", expanded=False):
     # Cria um DataFrame temporário para pré-visualizar a mudança dos nomes das colunas
     preview_cols = pd.DataFrame({
         # Coluna "antes" mostra os nomes atuais das colunas do DataFrame
-        "antes": st.session_state.df.columns,
+        "antes": df.columns,
         # Coluna "depois" mostra como os nomes ficariam após a normalização usando a função normalize_colname
-        "depois": [normalize_colname(c) for c in st.session_state.df.columns]
+        "depois": [normalize_colname(c) for c in df.columns]
     })
     # Exibe o DataFrame de pré-visualização na interface do Streamlit, ocupando a largura total do contêiner
     st.dataframe(preview_cols, use_container_width=True)
@@ -321,146 +682,159 @@ with st.expander("1) 🏷️ Padronizar nomes de colunas", expanded=False):
 
     # Cria um botão para aplicar a padronização dos nomes das colunas
     if st.button("Aplicar padronização de nomes", key="apply_colnames"):
-        # Armazena os nomes das colunas atuais em uma lista
-        old_cols = list(df.columns)
-        # Gera uma nova lista de nomes de colunas padronizados usando a função normalize_colname
-        new_cols = [normalize_colname(c) for c in old_cols]
-        # Garante que os novos nomes de colunas sejam únicos, adicionando sufixos se necessário (ex: "col_2")
-        new_cols = make_unique(new_cols)
-
-        # Cria uma cópia do DataFrame para evitar modificar o DataFrame original diretamente em caso de re-execução
-        df = df.copy()
-        # Atribui os novos nomes padronizados e únicos às colunas do DataFrame
-        df.columns = new_cols
-        # Atualiza o DataFrame na sessão do Streamlit com as colunas renomeadas
-        st.session_state.df = df
-
-        # Registra a ação no log de passos
-        log_step("Nomes de colunas padronizados e tornados únicos.")
-        # Exibe uma mensagem de sucesso para o usuário
-        st.success("Aplicado!")
-        # Força o Streamlit a reroduzir o script para atualizar a interface com os novos nomes de colunas
-        st.rerun()
+        # Padroniza os nomes (minúsculas, "_" no lugar de espaços) e garante que sejam únicos (ex: "col_2")
+        spec = {"op": "standardize_colnames"}
+        # Modo plano: só registra a etapa; ela roda junto com as demais ao executar o plano
+        if plan_mode:
+            queue_step(spec)
+        else:
+            # Roda em segundo plano; ao terminar, atualiza a sessão e registra a ação no log de passos
+            if run_step(df, spec, "Nomes de colunas padronizados e tornados únicos."):
+                # Exibe uma mensagem de sucesso para o usuário
+                st.success("Aplicado!")
+                # Força o Streamlit a reroduzir o script para atualizar a interface com os novos nomes de colunas
+                st.rerun()
 
 
 # 2) Remover espaços extras em textos
 with st.expander("2) ✂️ Limpar textos (trim, espaços duplicados)", expanded=False):
-    # Filtra as colunas do DataFrame que possuem o tipo de dado 'object' (geralmente strings/textos)
-    text_cols = [c for c in df.columns if df[c].dtype == "object"]
+    # Filtra as colunas de texto do DataFrame ('object', "string", string[pyarrow] ou categóricas)
+    text_cols = [c for c in df.columns if is_text_dtype(df[c]) or is_categorical(df[c])]
     # Cria um multiselect no Streamlit para o usuário selecionar quais colunas de texto aplicar a limpeza
     # Por padrão, pré-seleciona as primeiras 10 colunas de texto (ou todas se houver menos de 10)
     selected = st.multiselect("Selecione colunas de texto", options=text_cols, default=text_cols[:10])
     # Cria uma caixa de seleção para permitir ao usuário decidir se deseja substituir múltiplos espaços por um único
     replace_multi_space = st.checkbox("Trocar múltiplos espaços por 1 espaço", value=True)
+    # Normalizações opcionais, aplicadas junto com o strip (uma vez por valor distinto)
+    text_casefold = st.checkbox("Converter para minúsculas (casefold)", value=False)
+    text_accents = st.checkbox("Remover acentos", value=False)
+    text_na = st.checkbox("Tratar marcadores de NA como nulos", value=False,
+                          help="Valores iguais aos marcadores de NA da barra lateral (após a limpeza, sem diferenciar "
+                               "maiúsculas) viram nulos.")
     # Cria um botão para aplicar as operações de limpeza de texto
     if st.button("Aplicar limpeza de texto", key="apply_text"):
-        # Itera sobre cada coluna selecionada pelo usuário para aplicar a limpeza
-        for c in selected:
-            # Converte a coluna para o tipo de string do pandas (permite valores nulos)
-            s = df[c].astype("string")
-            # Remove espaços em branco do início e do fim de cada string na série
-            s = s.str.strip()
-            # Verifica se a opção de substituir múltiplos espaços foi selecionada
-            if replace_multi_space:
-                # Substitui um ou mais espaços consecutivos por um único espaço
-                s = s.str.replace(r"\s+", " ", regex=True)
-            # Atualiza a coluna original no DataFrame com a série de strings limpa
-            df[c] = s
-        # Atualiza o DataFrame na sessão do Streamlit com as alterações
-        st.session_state.df = df
-        # Registra a ação de limpeza de texto no log de passos
-        log_step(f"Limpeza de texto aplicada em {len(selected)} colunas (strip + normalização de espaços).")
-        # Exibe uma mensagem de sucesso para o usuário
-        st.success("Aplicado!")
+        # Aplica strip (e, se marcado, a troca de múltiplos espaços por um) nas colunas selecionadas
+        spec = {"op": "clean_text", "columns": selected, "collapse_spaces": replace_multi_space}
+        # Opções extras só entram na etapa quando marcadas
+        if text_casefold:
+            spec["casefold"] = True
+        if text_accents:
+            spec["strip_accents"] = True
+        if text_na:
+            spec["na_tokens"] = na_values
+        # Modo plano: só registra a etapa; ela roda junto com as demais ao executar o plano
+        if plan_mode:
+            queue_step(spec)
+        else:
+            # Roda em segundo plano (coluna a coluna); ao terminar, atualiza a sessão e registra a ação no log de passos
+            if run_step(df, spec, f"Limpeza de texto aplicada em {len(selected)} colunas (strip + normalização de espaços).",
+                        workers=workers):
+                # Exibe uma mensagem de sucesso para o usuário
+                st.success("Aplicado!")
 
 # 3) Tipagem automática (datas e números)
 with st.expander("3) 🔢 Tipagem automática (detectar datas e números)", expanded=False):
     # Exibe uma mensagem informativa para o usuário sobre o propósito desta seção.
-    st.write("Converte colunas `object` que parecem números/datas.")
+    st.write("Converte colunas de texto que parecem números/datas.")
     # Cria uma caixa de seleção para permitir ao usuário decidir se tenta converter colunas para números.
     # O valor padrão é True (marcado).
     convert_numbers = st.checkbox("Tentar converter números (ex: '1.234,56')", value=True)
     # Cria uma caixa de seleção para permitir ao usuário decidir se tenta converter colunas para datas.
     # O valor padrão é True (marcado).
     convert_dates = st.checkbox("Tentar converter datas", value=True)
+    # Cria uma caixa de seleção para guardar os números no menor tipo que os representa (ex: int16, Int64 com nulos)
+    downcast = st.checkbox("Usar o menor tipo numérico possível (economiza memória)", value=True)
+    # Cria uma caixa de seleção para aceitar float32 (metade da memória, ~7 dígitos significativos)
+    allow_float32 = st.checkbox("Permitir float32 (≈ 7 dígitos de precisão)", value=False, disabled=not downcast)
 
     # Cria um botão para aplicar as operações de tipagem automática.
     if st.button("Aplicar tipagem automática", key="apply_types"):
-        # Inicializa um contador para o número de colunas cujo tipo de dado foi alterado.
-        changed = 0
-
-        # Bloco de código para tentar converter colunas para números.
-        # Verifica se o usuário optou por converter números.
-        if convert_numbers:
-            # Itera sobre cada coluna no DataFrame.
-            for c in df.columns:
-                # Verifica se o tipo de dado da coluna atual é 'object' (geralmente strings).
-                if df[c].dtype == "object":
-                    # Tenta converter a coluna para um tipo numérico usando a função `coerce_numeric`.
-                    converted = coerce_numeric(df[c])
-                    # Calcula o número de valores não nulos na coluna original.
-                    non_null = df[c].notna().sum()
-                    # Verifica se há valores não nulos na coluna.
-                    if non_null > 0:
-                        # Calcula a proporção de valores que foram convertidos com sucesso para numéricos (não nulos na série convertida)
-                        # em relação aos valores não nulos da série original.
-                        ratio = converted.notna().sum() / non_null
-                        # Se a proporção for 70% ou mais (o que significa que a maioria dos valores é numérica),
-                        # aplica a conversão ao DataFrame.
-                        if ratio >= 0.7:
-                            # Atualiza a coluna no DataFrame com a série numérica convertida.
-                            df[c] = converted
-                            # Incrementa o contador de colunas alteradas.
-                            changed += 1
-
-        # Bloco de código para tentar converter colunas para datas.
-        # Verifica se o usuário optou por converter datas.
-        if convert_dates:
-            # Itera sobre cada coluna no DataFrame.
-            for c in df.columns:
-                # Verifica se o tipo de dado da coluna atual é 'object' (geralmente strings que podem conter datas).
-                if df[c].dtype == "object":
-                    # Tenta inferir se a coluna contém datas utilizando a função `try_parse_datetime`.
-                    # Se `try_parse_datetime` retornar True, significa que a coluna provavelmente é de data.
-                    # Se a função try_parse_datetime retornar True (indicando que a coluna parece conter datas)
-                    if try_parse_datetime(df[c]):
-                        # Tenta converter a coluna para o tipo datetime de forma segura, tratando erros
-                        dt = to_datetime_safe(df[c])
-                        # Verifica se a proporção de valores não nulos após a conversão para datetime é >= 70% dos valores não nulos originais
-                        if dt.notna().sum() >= 0.7 * df[c].notna().sum():
-                            # Atribui a série de datetime convertida de volta à coluna original no DataFrame
-                            df[c] = dt
-                            # Incrementa o contador de colunas alteradas com sucesso
-                            changed += 1
-
-
-        # Atualiza o DataFrame na sessão do Streamlit com as alterações de tipagem.
-        st.session_state.df = df
-        # Registra a ação de tipagem automática no log, indicando quantas colunas foram alteradas.
-        log_step(f"Tipagem automática aplicada. Colunas convertidas: {changed}.")
-        # Exibe uma mensagem de sucesso na interface do Streamlit, mostrando o número de colunas convertidas.
-        st.success(f"Aplicado! Colunas convertidas: {changed}")
+        # Converte colunas 'object' em números (se >= 70% dos valores converterem) e depois em datas.
+        # O separador decimal da barra lateral só desempata colunas em que "." e "," são ambos possíveis.
+        spec = {"op": "auto_types", "convert_numbers": convert_numbers, "convert_dates": convert_dates,
+                "decimal": decimal, "downcast": downcast, "allow_float32": allow_float32 and downcast}
+        # Modo plano: só registra a etapa; ela roda junto com as demais ao executar o plano
+        if plan_mode:
+            queue_step(spec)
+        else:
+            # Roda em segundo plano (coluna a coluna); ao terminar, atualiza a sessão e registra a ação de tipagem
+            # automática no log, indicando quantas colunas foram alteradas.
+            result = run_step(df, spec, lambda out, info: f"Tipagem automática aplicada. Colunas convertidas: "
+                                                          f"{len(info['converted'])}.", workers=workers)
+            if result:
+                df, info = result
+                # Conta o número de colunas cujo tipo de dado foi alterado.
+                changed = len(info["converted"])
+                # Exibe uma mensagem de sucesso na interface do Streamlit, mostrando o número de colunas convertidas.
+                st.success(f"Aplicado! Colunas convertidas: {changed}")
+                # Mostra os separadores detectados em cada coluna numérica e o dtype escolhido
+                if info["number_formats"]:
+                    st.dataframe(pd.DataFrame([{"coluna": c, "decimal": f["decimal"], "milhar": f["thousands"], "dtype": str(df[c].dtype)}
+                                               for c, f in info["number_formats"].items()]), use_container_width=True)
+                # Mostra os formatos escolhidos para cada coluna de data e a fração dos valores que converteu
+                if info["datetime_formats"]:
+                    st.dataframe(pd.DataFrame([{"coluna": c, "formatos": " | ".join(f["format"]), "fração convertida": f["parsed"]}
+                                               for c, f in info["datetime_formats"].items()]), use_container_width=True)
+
+    # Conversão opcional de colunas de texto com poucos valores distintos (ex: UF, status) em 'category'
+    st.markdown("**Categorias (baixa cardinalidade):**")
+    # Cria um slider para a razão máxima entre valores únicos e valores não nulos de uma coluna candidata
+    max_ratio = st.slider("Razão máxima únicos / linhas", min_value=0.001, max_value=0.5, value=0.05, step=0.001,
+                          format="%.3f")
+    # Candidatas escolhidas a partir do perfil em cache (contagem de únicos e nulos por coluna)
+    cat_candidates = low_cardinality_columns(df, profile, max_ratio)
+    if cat_candidates:
+        st.dataframe(profile.set_index("coluna").loc[cat_candidates, ["unicos", "nulos", "memoria_mb"]],
+                     use_container_width=True)
+    else:
+        st.caption("Nenhuma coluna de texto abaixo dessa razão.")
+    # Cria um botão para converter as candidatas, desabilitado se não houver nenhuma
+    if st.button("Converter em categoria", key="apply_categorize", disabled=not cat_candidates):
+        # Guarda cada coluna como códigos inteiros + lista de valores distintos
+        spec = {"op": "categorize", "columns": cat_candidates}
+        # Modo plano: só registra a etapa; ela roda junto com as demais ao executar o plano
+        if plan_mode:
+            queue_step(spec)
+        else:
+            mem_before = profile.set_index("coluna").loc[cat_candidates, "memoria_mb"].sum()
+
+            # Memória das colunas convertidas (categorias: códigos + valores distintos, rápido de medir)
+            def categories_mb(out: pd.DataFrame) -> float:
+                return out[cat_candidates].memory_usage(deep=True, index=False).sum() / 2**20
+
+            # Roda em segundo plano; ao terminar, atualiza a sessão e registra no log as colunas convertidas e a
+            # memória antes/depois
+            result = run_step(df, spec, lambda out, info: f"Colunas convertidas em categoria: {cat_candidates} "
+                                                          f"(memória {mem_before:.1f} MB → {categories_mb(out):.1f} MB).")
+            if result:
+                st.success(f"Aplicado! Memória das colunas: {mem_before:.1f} MB → {categories_mb(result[0]):.1f} MB")
 
 # 4) Duplicadas
 with st.expander("4) 🧩 Remover linhas duplicadas", expanded=False):
-    # Calcula o número de linhas duplicadas no DataFrame e armazena em 'dups'
-    dups = int(df.duplicated().sum())
+    # Cria um multiselect para deduplicar só por algumas colunas (ex: id do cliente); vazio = linha inteira
+    key_cols = st.multiselect("Colunas-chave (vazio = linha inteira)", options=list(df.columns), default=[])
+    # Conta as duplicadas a partir dos hashes das linhas em cache (calculados uma vez por versão do DataFrame)
+    dups = diag.duplicate_count(df, version, key_cols)
     # Exibe na interface do Streamlit o número de duplicadas detectadas
-    st.write(f"Duplicadas detectadas: **{dups}**")
+    st.write(f"Duplicadas detectadas: **{dups}**" + (f" (colunas-chave: {', '.join(map(str, key_cols))})" if key_cols else ""))
     # Cria um seletor no Streamlit para escolher qual ocorrência de duplicata manter (primeira ou última)
     keep = st.selectbox("Manter qual ocorrência?", options=["first", "last"], index=0)
     # Cria um botão para remover duplicadas, que é desabilitado se não houver duplicatas (dups == 0)
     if st.button("Remover duplicadas", key="apply_dups", disabled=(dups == 0)):
-        # Armazena o número de linhas antes da remoção para calcular quantas foram removidas
-        before = df.shape[0]
         # Remove as linhas duplicadas do DataFrame, mantendo a ocorrência especificada pelo usuário
-        df = df.drop_duplicates(keep=keep)
-        # Atualiza o DataFrame no estado da sessão do Streamlit com as duplicadas removidas
-        st.session_state.df = df
-        # Registra a ação no log, informando quantas linhas foram removidas e qual estratégia foi usada
-        log_step(f"Linhas duplicadas removidas (keep='{keep}'). {before - df.shape[0]} linhas removidas.")
-        # Exibe uma mensagem de sucesso na interface do Streamlit
-        st.success("Aplicado!")
+        spec = {"op": "drop_duplicates", "keep": keep, "subset": key_cols or None}
+        # Modo plano: só registra a etapa; ela roda junto com as demais ao executar o plano
+        if plan_mode:
+            queue_step(spec)
+        else:
+            # Reaproveita os mesmos hashes usados na contagem acima; roda em segundo plano e, ao terminar, atualiza a
+            # sessão e registra a ação no log, informando quantas linhas foram removidas e qual estratégia foi usada
+            if run_step(df, spec, lambda out, info: f"Linhas duplicadas removidas (keep='{keep}'"
+                                                    + (f", colunas-chave: {key_cols}" if key_cols else "")
+                                                    + f"). {info['removed']} linhas removidas.",
+                        fingerprints=diag.row_fingerprints(df, version, key_cols)):
+                # Exibe uma mensagem de sucesso na interface do Streamlit
+                st.success("Aplicado!")
 
 # 5) Valores nulos
 with st.expander("5) 🕳️ Tratamento de valores nulos", expanded=False):
@@ -468,121 +842,54 @@ with st.expander("5) 🕳️ Tratamento de valores nulos", expanded=False):
     st.write("Escolha uma estratégia por tipo de coluna.")
     # Filtra as colunas do DataFrame que são de tipo numérico.
     num_cols = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
-    # Filtra as colunas do DataFrame que são de tipo 'object' ou string (categóricas/textos).
-    cat_cols = [c for c in df.columns if df[c].dtype == "object" or pd.api.types.is_string_dtype(df[c])]
+    # Filtra as colunas do DataFrame que são de tipo 'object', string ou 'category' (categóricas/textos).
+    cat_cols = [c for c in df.columns if is_text_dtype(df[c]) or is_categorical(df[c])]
     # Filtra as colunas do DataFrame que são de tipo datetime.
     dt_cols  = [c for c in df.columns if pd.api.types.is_datetime64_any_dtype(df[c])]
+    # Colunas com pelo menos um nulo, segundo o perfil em cache (as demais não precisam de tratamento)
+    with_nulls = set(profile.loc[profile["nulos"] > 0, "coluna"])
+    st.caption(f"Colunas com nulos: {len(with_nulls)} de {df.shape[1]}.")
 
     # Exibe um markdown para categorizar as opções de colunas numéricas.
     st.markdown("**Numéricas:**")
     # Cria um seletor para a estratégia de tratamento de nulos para colunas numéricas.
-    num_strategy = st.selectbox("Estratégia (numéricas)", ["Não mexer", "Remover linhas com NA", "Preencher com 0", "Preencher com média", "Preencher com mediana"], index=0)
+    num_strategy = st.selectbox("Estratégia (numéricas)", list(NUM_STRATEGIES), index=0)
     # Cria um multiselect para o usuário escolher quais colunas numéricas aplicar a estratégia.
-    num_sel = st.multiselect("Colunas numéricas", options=num_cols, default=num_cols)
+    num_sel = st.multiselect("Colunas numéricas", options=num_cols, default=[c for c in num_cols if c in with_nulls])
 
     # Exibe um markdown para categorizar as opções de colunas categóricas/textos.
     st.markdown("**Categóricas/Textos:**")
     # Cria um seletor para a estratégia de tratamento de nulos para colunas categóricas.
-    cat_strategy = st.selectbox("Estratégia (categóricas)", ["Não mexer", "Remover linhas com NA", "Preencher com 'DESCONHECIDO'", "Preencher com moda (mais frequente)"], index=0)
+    cat_strategy = st.selectbox("Estratégia (categóricas)", list(CAT_STRATEGIES), index=0)
     # Cria um multiselect para o usuário escolher quais colunas categóricas aplicar a estratégia.
-    cat_sel = st.multiselect("Colunas categóricas", options=cat_cols, default=cat_cols)
+    cat_sel = st.multiselect("Colunas categóricas", options=cat_cols, default=[c for c in cat_cols if c in with_nulls])
 
     # Exibe um markdown para categorizar as opções de colunas de datas.
     st.markdown("**Datas:**")
     # Cria um seletor para a estratégia de tratamento de nulos para colunas de datas.
-    dt_strategy = st.selectbox("Estratégia (datas)", ["Não mexer", "Remover linhas com NA", "Preencher com data mínima", "Preencher com data máxima"], index=0)
+    dt_strategy = st.selectbox("Estratégia (datas)", list(DT_STRATEGIES), index=0)
     # Cria um multiselect para o usuário escolher quais colunas de data aplicar a estratégia.
-    dt_sel = st.multiselect("Colunas datetime", options=dt_cols, default=dt_cols)
+    dt_sel = st.multiselect("Colunas datetime", options=dt_cols, default=[c for c in dt_cols if c in with_nulls])
 
     # Cria um botão para aplicar o tratamento de nulos selecionado.
     if st.button("Aplicar tratamento de nulos", key="apply_na"):
-        # Armazena o número de linhas antes do tratamento para calcular as removidas.
-        before = df.shape[0]
-
-        # Inicia o tratamento para colunas numéricas.
-        # Verifica se uma estratégia foi selecionada e se há colunas numéricas escolhidas.
-        if num_strategy != "Não mexer" and len(num_sel) > 0:
-            # Se a estratégia for remover linhas com NA.
-            if num_strategy == "Remover linhas com NA":
-                # Remove linhas onde as colunas numéricas selecionadas têm valores nulos.
-                df = df.dropna(subset=num_sel)
-            # Se a estratégia for preencher valores nulos.
-            else:
-                # Itera sobre cada coluna numérica selecionada.
-                for c in num_sel:
-                    # Se a estratégia for preencher com 0.
-                    if num_strategy == "Preencher com 0":
-                        # Preenche os valores nulos da coluna com 0.
-                        df[c] = df[c].fillna(0)
-                    # Se a estratégia for preencher com a média.
-                    elif num_strategy == "Preencher com média":
-                        # Preenche os valores nulos da coluna com a média.
-                        df[c] = df[c].fillna(df[c].mean())
-                    # Se a estratégia for preencher com a mediana.
-                    elif num_strategy == "Preencher com mediana":
-                        # Preenche os valores nulos da coluna com a mediana.
-                        df[c] = df[c].fillna(df[c].median())
-
-        # Inicia o tratamento para colunas categóricas.
-        # Verifica se uma estratégia foi selecionada e se há colunas categóricas escolhidas.
-        if cat_strategy != "Não mexer" and len(cat_sel) > 0:
-            # Se a estratégia for remover linhas com NA.
-            if cat_strategy == "Remover linhas com NA":
-                # Remove linhas onde as colunas categóricas selecionadas têm valores nulos.
-                df = df.dropna(subset=cat_sel)
-            # Se a estratégia for preencher valores nulos.
-            else:
-                # Itera sobre cada coluna categórica selecionada.
-                for c in cat_sel:
-                    # Se a estratégia for preencher com 'DESCONHECIDO'.
-                    if cat_strategy == "Preencher com 'DESCONHECIDO'":
-                        # Preenche os valores nulos da coluna com a string "DESCONHECIDO".
-                        df[c] = df[c].fillna("DESCONHECIDO")
-                    # Se a estratégia for preencher com a moda (valor mais frequente).
-                    elif cat_strategy == "Preencher com moda (mais frequente)":
-                        # Calcula a moda da coluna, ignorando nulos.
-                        moda = df[c].mode(dropna=True)
-                        # Define o valor de preenchimento como a primeira moda ou "DESCONHECIDO" se não houver moda.
-                        fill = moda.iloc[0] if len(moda) else "DESCONHECIDO"
-                        # Preenche os valores nulos da coluna com o valor de preenchimento.
-                        df[c] = df[c].fillna(fill)
-
-        # Inicia o tratamento para colunas de datas.
-        # Verifica se uma estratégia foi selecionada e se há colunas de datas escolhidas.
-        if dt_strategy != "Não mexer" and len(dt_sel) > 0:
-            # Se a estratégia for remover linhas com NA.
-            if dt_strategy == "Remover linhas com NA":
-                # Remove linhas onde as colunas de data selecionadas têm valores nulos.
-                df = df.dropna(subset=dt_sel)
-            # Se a estratégia for preencher valores nulos.
-            else:
-                # Itera sobre cada coluna de data selecionada.
-                for c in dt_sel:
-                    # Se a estratégia for preencher com a data mínima.
-                    if dt_strategy == "Preencher com data mínima":
-                        # Verifica se há valores não nulos na coluna para calcular a data mínima.
-                        if df[c].dropna().empty:
-                            # Se a coluna estiver vazia após remover nulos, pula para a próxima.
-                            continue
-                        # Preenche os valores nulos da coluna com a data mínima.
-                        df[c] = df[c].fillna(df[c].min())
-                    # Se a estratégia for preencher com a data máxima.
-                    elif dt_strategy == "Preencher com data máxima":
-                        # Verifica se há valores não nulos na coluna para calcular a data máxima.
-                        if df[c].dropna().empty:
-                            # Se a coluna estiver vazia após remover nulos, pula para a próxima.
-                            continue
-                        # Preenche os valores nulos da coluna com a data máxima.
-                        df[c] = df[c].fillna(df[c].max())
-
-        # Atualiza o DataFrame na sessão do Streamlit com as alterações.
-        st.session_state.df = df
-        # Calcula o número de linhas removidas.
-        removed = before - df.shape[0]
-        # Registra a ação no log, informando o número de linhas removidas.
-        log_step(f"Tratamento de nulos aplicado. Linhas removidas: {removed}.")
-        # Exibe uma mensagem de sucesso na interface do Streamlit.
-        st.success(f"Aplicado! Linhas removidas: {removed}")
+        # Monta o spec com a estratégia e as colunas de cada grupo (aplicados na ordem: numéricas, categóricas, datas).
+        spec = {
+            "op": "fill_na",
+            "numeric": {"strategy": NUM_STRATEGIES[num_strategy], "columns": num_sel},
+            "categorical": {"strategy": CAT_STRATEGIES[cat_strategy], "columns": cat_sel},
+            "datetime": {"strategy": DT_STRATEGIES[dt_strategy], "columns": dt_sel},
+        }
+        # Modo plano: só registra a etapa; ela roda junto com as demais ao executar o plano
+        if plan_mode:
+            queue_step(spec)
+        else:
+            # Aplica o tratamento de nulos em segundo plano; ao terminar, atualiza a sessão e registra a ação no log,
+            # informando o número de linhas removidas.
+            result = run_step(df, spec, lambda out, info: f"Tratamento de nulos aplicado. Linhas removidas: {info['removed']}.")
+            if result:
+                # Exibe uma mensagem de sucesso na interface do Streamlit.
+                st.success(f"Aplicado! Linhas removidas: {result[1]['removed']}")
 
 # 6) Outliers (opcional)
 with st.expander("6) 📉 Outliers (IQR) - opcional", expanded=False):
@@ -594,39 +901,42 @@ with st.expander("6) 📉 Outliers (IQR) - opcional", expanded=False):
     cols_out = st.multiselect("Colunas para avaliar outliers", options=num_cols, default=[])
     # Cria um slider para o usuário ajustar o fator IQR (multiplicador para o intervalo interquartil).
     iqr_factor = st.slider("Fator IQR", min_value=1.0, max_value=3.0, value=1.5, step=0.1)
+    # Quartis aproximados: sketch KLL em blocos, sem ordenar colunas muito grandes
+    iqr_approx = st.checkbox("Quartis aproximados (KLL, arquivos grandes)", value=False,
+                             help="Estima Q1 e Q3 com um sketch de poucos milhares de valores por coluna; "
+                                  "os limites podem diferir levemente dos exatos.")
+    # Prévia: quartis em cache por versão; mover o fator só refaz as comparações
+    if cols_out:
+        quart = diag.column_quartiles(df, version, cols_out, iqr_approx)
+        bounds = iqr_bounds(df, cols_out, iqr_factor, quartiles_=quart)
+        flags = outlier_flags(df, cols_out, bounds)
+        preview = profile.set_index("coluna").loc[cols_out, ["min", "max", "nulos"]]
+        preview.insert(0, "Q1", [quart[c][0] for c in cols_out])
+        preview.insert(1, "Q3", [quart[c][1] for c in cols_out])
+        preview.insert(2, "limite_inferior", [bounds[c][0] for c in cols_out])
+        preview.insert(3, "limite_superior", [bounds[c][1] for c in cols_out])
+        preview["linhas_fora"] = flags.sum(axis=0)
+        st.dataframe(preview, use_container_width=True)
+        # Uma linha sai se estiver fora dos limites em qualquer coluna escolhida
+        n_out = int(flags.any(axis=1).sum())
+        st.caption(f"{n_out} linhas seriam removidas ({n_out / max(len(df), 1):.1%}).")
 
     # Cria um botão para aplicar a remoção de outliers, desabilitado se nenhuma coluna for selecionada.
     if st.button("Remover outliers", key="apply_outliers", disabled=(len(cols_out) == 0)):
-        # Armazena o número de linhas antes da remoção para calcular quantas foram removidas.
-        before = df.shape[0]
-        # Inicializa uma máscara booleana com True para todas as linhas.
-        mask = pd.Series(True, index=df.index)
-        # Itera sobre cada coluna selecionada para avaliação de outliers.
-        for c in cols_out:
-            # Seleciona a série (coluna) atual do DataFrame.
-            s = df[c]
-            # Calcula o primeiro quartil (Q1).
-            q1 = s.quantile(0.25)
-            # Calcula o terceiro quartil (Q3).
-            q3 = s.quantile(0.75)
-            # Calcula o intervalo interquartil (IQR).
-            iqr = q3 - q1
-            # Calcula o limite inferior para detecção de outliers.
-            low = q1 - iqr_factor * iqr
-            # Calcula o limite superior para detecção de outliers.
-            high = q3 + iqr_factor * iqr
-            # Atualiza a máscara para incluir apenas os valores dentro dos limites IQR ou que são nulos.
-            mask &= s.between(low, high) | s.isna()
-        # Filtra o DataFrame usando a máscara atualizada e cria uma cópia.
-        df = df[mask].copy()
-        # Atualiza o DataFrame no estado da sessão do Streamlit.
-        st.session_state.df = df
-        # Calcula o número de linhas removidas.
-        removed = before - df.shape[0]
-        # Registra a ação no log de passos.
-        log_step(f"Outliers removidos por IQR em {len(cols_out)} colunas. Linhas removidas: {removed}.")
-        # Exibe uma mensagem de sucesso na interface do Streamlit.
-        st.success(f"Aplicado! Linhas removidas: {removed}")
+        # Remove as linhas fora de [Q1 - k*IQR, Q3 + k*IQR] em qualquer coluna selecionada (nulos são mantidos).
+        spec = {"op": "remove_outliers", "columns": cols_out, "factor": iqr_factor}
+        if iqr_approx:
+            spec["approx"] = True
+        # Modo plano: só registra a etapa; ela roda junto com as demais ao executar o plano
+        if plan_mode:
+            queue_step(spec)
+        else:
+            # Roda em segundo plano; ao terminar, atualiza a sessão e registra a ação no log de passos.
+            result = run_step(df, spec, lambda out, info: f"Outliers removidos por IQR em {len(cols_out)} colunas. "
+                                                          f"Linhas removidas: {info['removed']}.")
+            if result:
+                # Exibe uma mensagem de sucesso na interface do Streamlit.
+                st.success(f"Aplicado! Linhas removidas: {result[1]['removed']}")
 
 # 7) Remover colunas (opcional)
 
@@ -638,14 +948,34 @@ with st.expander("7) 🧹 Remover colunas desnecessárias - opcional", expanded=
     # O botão é desabilitado se a lista `drop_cols` estiver vazia (ou seja, nenhuma coluna selecionada).
     if st.button("Remover colunas selecionadas", key="apply_dropcols", disabled=(len(drop_cols) == 0)):
         # Remove as colunas especificadas na lista `drop_cols` do DataFrame.
-        # `errors="ignore"` evita que um erro seja levantado se uma coluna em `drop_cols` não existir no DataFrame.
-        df = df.drop(columns=drop_cols, errors="ignore")
-        # Atualiza o DataFrame armazenado no estado da sessão do Streamlit com as colunas removidas.
-        st.session_state.df = df
-        # Registra a ação de remoção de colunas no log de passos da aplicação.
-        log_step(f"Colunas removidas: {drop_cols}")
-        # Exibe uma mensagem de sucesso na interface do Streamlit.
-        st.success("Aplicado!")
+        spec = {"op": "drop_columns", "columns": drop_cols}
+        # Modo plano: só registra a etapa; ela roda junto com as demais ao executar o plano
+        if plan_mode:
+            queue_step(spec)
+        else:
+            # Roda em segundo plano; ao terminar, atualiza a sessão e registra a ação de remoção de colunas no log
+            # de passos da aplicação.
+            if run_step(df, spec, f"Colunas removidas: {drop_cols}"):
+                # Exibe uma mensagem de sucesso na interface do Streamlit.
+                st.success("Aplicado!")
+
+# Plano pendente (modo plano): etapas registradas, o plano otimizado e a execução
+if st.session_state.plan:
+    with st.expander(f"⏳ Plano pendente ({len(st.session_state.plan)} etapas)", expanded=True):
+        st.markdown("**Etapas registradas:**")
+        for i, spec in enumerate(st.session_state.plan, 1):
+            st.write(f"{i}. {describe_step(spec)}")
+        # Plano reescrito pelo otimizador: o que de fato vai rodar, em ordem
+        st.markdown("**Plano otimizado:**")
+        for i, node in enumerate(optimize(st.session_state.plan), 1):
+            st.write(f"{i}. {describe_step(node)}")
+        st.caption("O plano também é executado automaticamente ao exportar.")
+        p1, p2 = st.columns(2)
+        if p1.button("▶️ Executar plano", key="run_plan", use_container_width=True) and run_pending_plan(workers):
+            st.rerun()
+        if p2.button("🗑️ Descartar plano", key="discard_plan", use_container_width=True):
+            st.session_state.plan = []
+            st.rerun()
 
 st.divider()
 
@@ -659,25 +989,244 @@ left, right = st.columns([1, 1], gap="large")
 with left:
     # Adiciona um subtítulo à coluna para o log de ações
     st.subheader("🧾 Log do que foi feito")
-    # Verifica se a lista de log no estado da sessão está vazia
-    if len(st.session_state.log) == 0:
-        # Se estiver vazia, exibe uma mensagem informativa
+    history = st.session_state.history
+    # Avisos fora das etapas (carregamento do arquivo, processamento em streaming)
+    for msg in st.session_state.log:
+        st.caption(msg)
+    # Verifica se há etapas aplicadas no histórico
+    if not history.applied:
+        # Se não houver, exibe uma mensagem informativa
         st.info("Nenhuma etapa aplicada ainda.")
-    # Se houver itens no log
+    # Se houver etapas aplicadas
     else:
-        # Itera sobre cada mensagem no log, com um contador começando de 1
-        for i, msg in enumerate(st.session_state.log, start=1):
+        # Itera sobre a mensagem de cada etapa aplicada, com um contador começando de 1
+        for i, msg in enumerate(history.messages, start=1):
             # Exibe cada mensagem do log formatada com seu número
             st.write(f"{i}. {msg}")
 
+    # Botões de desfazer/refazer: reconstroem o DataFrame a partir do original e dos deltas guardados
+    u1, u2 = st.columns(2)
+    if u1.button("↩️ Desfazer", key="undo", use_container_width=True, disabled=not history.can_undo()):
+        history.undo()
+        move_history()
+        st.rerun()
+    if u2.button("↪️ Refazer", key="redo", use_container_width=True, disabled=not history.can_redo()):
+        history.redo()
+        move_history()
+        st.rerun()
+    # Métricas de cada fase (leitura, etapas, exportação): tempo, CPU, linhas, vazão e memória
+    if st.session_state.metrics:
+        st.markdown("**Métricas por fase**")
+        st.dataframe(metrics_frame(st.session_state.metrics), use_container_width=True, hide_index=True)
+        st.download_button("📈 Baixar métricas (JSON)", data=dumps_metrics(st.session_state.metrics),
+                           file_name="metricas.json", mime="application/json", use_container_width=True)
+    # Perfil cProfile da última fase perfilada
+    prof = st.session_state.profile_dump
+    if prof is not None:
+        with st.expander(f"Perfil cProfile: {prof['fase']}"):
+            st.code(prof["text"])
+            st.download_button("🧪 Baixar perfil (.prof)", data=prof["bytes"], file_name="etapa.prof",
+                               mime="application/octet-stream")
+    st.caption(f"Histórico: {len(history.entries)} etapas guardadas em {history.nbytes() / 2**20:.1f} MB de deltas "
+               f"(além do original).")
+
+    # Monta a receita (opções de leitura + etapas aplicadas) para reaplicar em lote com `python cleancsv.py run`
+    # (no lote os nomes saem padronizados na leitura: a receita começa padronizando, para reproduzir os mesmos nomes)
+    recipe_steps = history.steps
+    if st.session_state.batch_report is not None:
+        recipe_steps = [{"op": "standardize_colnames"}] + list(recipe_steps)
+    recipe = make_recipe(recipe_steps, **st.session_state.get("read_opts", {}))
+    # Botões de download da receita em JSON (e em YAML, se o PyYAML estiver instalado)
+    rc1, rc2 = st.columns(2)
+    rc1.download_button("📜 Baixar receita (JSON)", data=dumps_recipe(recipe), file_name="receita.json",
+                        mime="application/json", use_container_width=True, disabled=not history.steps)
+    if yaml is not None:
+        rc2.download_button("📜 Baixar receita (YAML)", data=dumps_recipe(recipe, "yaml"), file_name="receita.yaml",
+                            mime="application/x-yaml", use_container_width=True, disabled=not history.steps)
+
+    # Permite reaplicar uma receita salva sobre o dataset atual
+    recipe_file = st.file_uploader("Aplicar receita salva", type=["json", "yaml", "yml"])
+    if recipe_file is not None and st.button("▶️ Aplicar receita", key="apply_recipe"):
+        try:
+            # Lê a receita no formato indicado pela extensão do arquivo
+            fmt = "yaml" if recipe_file.name.lower().endswith((".yaml", ".yml")) else "json"
+            loaded = loads_recipe(recipe_file.getvalue().decode("utf-8"), fmt)
+        except Exception as e:
+            # Arquivo inválido, versão desconhecida etc.
+            st.error(f"Não foi possível aplicar a receita: {e}")
+        else:
+            if plan_mode:
+                # No modo plano, as etapas só são registradas
+                st.session_state.plan.extend(loaded["steps"])
+                st.rerun()
+            current = st.session_state.history.current
+            first_measure = measure_step(loaded["steps"][0], current) if loaded["steps"] else None
+
+            # Aplica as etapas em segundo plano, em sequência; nada é registrado até a última terminar
+            def apply_recipe():
+                df, results = current, []
+                tasks.add_total(len(loaded["steps"]))
+                for i, spec in enumerate(loaded["steps"]):
+                    measure = first_measure if i == 0 else measure_phase(describe_step(spec), df.shape[0])
+                    with measure:
+                        df, info = engine.apply_step(df, spec, workers=workers)
+                    results.append((df, spec, info, measure))
+                    tasks.advance(label=describe_step(spec))
+                return results
+
+            # Registra cada etapa, como se tivesse sido clicada na interface (uma entrada do histórico por etapa)
+            def finish_recipe(results):
+                for i, (df, spec, info, measure) in enumerate(results):
+                    if i > 0:
+                        # Memória antes: a de depois da etapa anterior
+                        measure.mem_before = results[i - 1][3].mem_after
+                    commit_step(df, spec, info,
+                                f"Receita: etapa '{spec['op']}' aplicada. Linhas removidas: {info['removed']}.",
+                                measure=measure)
+                return True
+
+            # Etapas que referenciam colunas inexistentes etc.: a tarefa falha e nada é aplicado
+            if run_task(f"Receita ({len(loaded['steps'])} etapas)", apply_recipe, finish_recipe):
+                st.rerun()
+
 # Inicia um bloco de código que será renderizado na segunda coluna (right)
 with right:
     # Adiciona um subtítulo à coluna para a seção de exportação
     st.subheader("✅ Exportar")
     # Cria um campo de texto para o usuário definir o nome do arquivo de saída, com um valor padrão
     nome_saida = st.text_input("Nome do arquivo de saída", value="dados_tratados.csv")
-    # Chama a função download_button_csv para criar um botão de download com o DataFrame atual e o nome/separador especificados
-    download_button_csv(st.session_state.df, filename=nome_saida, sep=";")
+    # Modo streaming grava bloco a bloco: só os formatos CSV (puro ou compactado)
+    streaming_export = st.session_state.stream_source is not None
+    formats = available_formats(text_only=streaming_export)
+    # Cria um seletor para o formato do arquivo exportado
+    labels = {EXPORT_FORMATS[f]["label"]: f for f in formats}
+    export_fmt = labels[st.selectbox("Formato", options=list(labels))]
+    # Nome do arquivo com a extensão do formato escolhido
+    nome_saida = export_filename(nome_saida, export_fmt)
+    # Modo streaming: reaplica as etapas registradas bloco a bloco sobre o arquivo completo
+    sample = st.session_state.sample_source
+    if sample is not None:
+        st.caption(f"🔬 Modo amostra: a exportação reaplica as etapas ao arquivo completo ({sample['rows']} linhas).")
+    if streaming_export:
+        # Mostra quantas etapas serão reaplicadas
+        n_steps = len(st.session_state.history.steps) + len(st.session_state.plan)
+        st.caption(f"As {n_steps} etapas registradas serão aplicadas ao arquivo completo, bloco a bloco.")
+        # O arquivo completo precisa continuar disponível no upload
+        if st.button("⚙️ Processar arquivo completo", use_container_width=True, disabled=not uploaded):
+            # Processa o arquivo completo em segundo plano, depois das etapas ainda pendentes no modo plano
+            def process_full_file():
+                # Opções de leitura guardadas no carregamento (separador, encoding, cabeçalho, NA, tamanho do bloco)
+                source = dict(st.session_state.stream_source)
+                chunk_rows = source.pop("chunksize")
+                # Bytes do arquivo completo enviado
+                file_bytes = uploaded[0].getvalue()
+                steps = st.session_state.history.steps
+                columns = list(st.session_state.history.original.columns)
+                # Cada passagem lê o arquivo inteiro: o total cresce uma passagem por vez (blocos estimados pelas
+                # quebras de linha)
+                n_chunks, passes = file_bytes.count(b"\n") // chunk_rows + 1, set()
+                measure = measure_phase(f"Streaming + exportação ({export_fmt})")
+
+                def show_progress(p, n_passes, rows):
+                    if p not in passes:
+                        passes.add(p)
+                        tasks.add_total(n_chunks)
+                    tasks.advance(label=f"passagem {p}/{n_passes}: {rows} linhas lidas")
+
+                # Passagens de coleta (médias, quartis, tipos...) e a passagem final, que grava a saída em disco
+                def work():
+                    out_path = tempfile.NamedTemporaryFile(suffix=EXPORT_FORMATS[export_fmt]["ext"], delete=False).name
+                    try:
+                        with measure:
+                            report = StreamingPipeline(steps, workers=workers).run(
+                                lambda: read_csv_bytes(file_bytes, chunksize=chunk_rows, **source), out_path,
+                                sep=";", progress=show_progress, fmt=export_fmt, columns=columns,
+                            )
+                    except BaseException:
+                        # Cancelado ou com erro: a saída incompleta é apagada
+                        os.remove(out_path)
+                        raise
+                    return out_path, report
+
+                def finish(result):
+                    out_path, report = result
+                    # Linhas lidas e gravadas vêm do relatório; a memória fica de fora (nenhum DataFrame inteiro)
+                    measure.rows_in = report["rows_in"]
+                    record_measure(measure.done(rows_out=report["rows_out"]))
+                    # Guarda o caminho e o formato do resultado para o botão de download
+                    st.session_state.stream_output = {"path": out_path, "fmt": export_fmt}
+                    # Registra a ação no log
+                    log_step(
+                        f"Arquivo completo processado em streaming: {report['rows_in']} linhas lidas, "
+                        f"{report['rows_out']} gravadas ({report['chunks']} blocos, {report['passes']} passagens)."
+                    )
+
+                run_task("Processamento do arquivo completo", work, finish)
+
+            run_pending_plan(workers, then=process_full_file)
+        # Se já existe um resultado processado, oferece o download do arquivo gravado em disco
+        output = st.session_state.get("stream_output")
+        if output:
+            with open(output["path"], "rb") as f:
+                st.download_button("⬇️ Baixar arquivo tratado", data=f, file_name=export_filename(nome_saida, output["fmt"]),
+                                   mime=EXPORT_FORMATS[output["fmt"]]["mime"], use_container_width=True)
+    else:
+        exports = st.session_state.export
+        # O arquivo só é gerado quando pedido; enquanto o DataFrame não muda, o arquivo gerado é reaproveitado
+        path = exports.get(st.session_state.df_version, export_fmt, member=export_filename(nome_saida, "csv"))
+        if path is None and st.button("📦 Preparar arquivo", use_container_width=True):
+            label = EXPORT_FORMATS[export_fmt]["label"]
+            member = export_filename(nome_saida, "csv")
+
+            # Gera o arquivo em segundo plano, depois do plano pendente (modo plano): sai com todas as etapas
+            def prepare_export():
+                # Modo amostra: relê o arquivo completo e reaplica as etapas registradas num plano otimizado
+                if sample is not None and not uploaded:
+                    st.error(f"Não foi possível exportar em {label}: envie o arquivo novamente para processar o "
+                             f"arquivo completo")
+                    return None
+                version, current, steps = (st.session_state.df_version, st.session_state.history.current,
+                                           st.session_state.history.steps)
+                full_bytes = uploaded[0].getvalue() if sample is not None else None
+                # A memória do resultado é a mesma antes e depois: a exportação não o altera
+                current_mb = (st.session_state.diag.summary(current, version)["memoria_mb"].sum()
+                              if sample is None else None)
+                read_measure = measure_phase("Arquivo completo: leitura + plano") if sample is not None else None
+                export_measure = measure_phase(f"Exportação ({export_fmt})", current.shape[0], current_mb)
+
+                def work():
+                    result, result_mb = current, current_mb
+                    if sample is not None:
+                        tasks.add_total(1)
+                        with read_measure:
+                            full = read_csv_bytes(full_bytes, **sample["read"])
+                            tasks.advance(label="arquivo completo lido")
+                            result, _ = run_plan(full, steps, workers, engine)
+                        result_mb = frame_memory_mb(result)
+                        export_measure.rows_in, export_measure.mem_before = result.shape[0], result_mb
+                    tasks.add_total(1)
+                    with export_measure:
+                        path = exports.write(result, export_fmt, member=member)
+                    tasks.advance(label="arquivo gravado")
+                    return path, result, result_mb
+
+                def finish(result):
+                    path, result, result_mb = result
+                    if read_measure is not None:
+                        record_measure(read_measure.done(result))
+                    record_measure(export_measure.done(rows_out=result.shape[0], mem_after=result_mb))
+                    return exports.add(path, version, export_fmt, member=member)
+
+                # Ex: coluna com tipos misturados que o Parquet não aceita: a tarefa falha com a mensagem do erro
+                return run_task(f"Exportação em {label}", work, finish)
+
+            path = run_pending_plan(workers, then=prepare_export)
+        # Arquivo pronto: o download lê direto do disco
+        if path is not None:
+            st.caption(f"Arquivo pronto: {os.path.getsize(path) / 2**20:.1f} MB.")
+            with open(path, "rb") as f:
+                st.download_button("⬇️ Baixar arquivo tratado", data=f, file_name=nome_saida,
+                                   mime=EXPORT_FORMATS[export_fmt]["mime"], use_container_width=True)
 
 # Adiciona uma pequena dica/legenda na parte inferior da interface
-st.caption("Dica: se quiser voltar ao início, use **Resetar tudo** na barra lateral.")
+st.caption("Dica: use **Desfazer** para voltar uma etapa, ou **Resetar tudo** na barra lateral para recomeçar.")
@@ -0,0 +1,178 @@
+# Leitura em lote: vários CSVs (ou um .zip com CSVs) lidos em paralelo, com esquemas reconciliados e uma só concatenação
+
+# Importa o pool de threads para ler os arquivos ao mesmo tempo
+from concurrent.futures import ThreadPoolExecutor
+# Importa o módulo io para abrir o .zip em memória
+import io
+# Importa o módulo time para medir o tempo de leitura de cada arquivo
+import time
+# Importa o módulo zipfile para extrair os CSVs de um .zip
+import zipfile
+
+# Importa a biblioteca numpy para os valores nulos das colunas convertidas em texto
+import numpy as np
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+
+# Importa a padronização dos nomes de colunas
+from cleaning import make_unique, normalize_colname
+# Importa a detecção de encoding e de dialeto e a leitura do CSV
+from loading import detect_encoding, pa, read_csv_bytes, resolve_dialect, sniff_dialect
+# Importa o progresso da tarefa em segundo plano (uma unidade por arquivo)
+import tasks
+
+# Extensões aceitas dentro de um .zip
+BATCH_EXTENSIONS = (".csv", ".txt", ".tsv")
+# Colunas do relatório por arquivo, na ordem exibida
+REPORT_COLUMNS = ["arquivo", "linhas", "colunas", "colunas_ausentes", "encoding", "separador", "tempo_s", "erro"]
+
+
+# Define uma função que diz se os bytes enviados são um .zip
+def is_zip(name: str, data: bytes) -> bool:
+    return name.lower().endswith(".zip") or data[:4] == b"PK\x03\x04"
+
+
+# Define uma função que expande os arquivos enviados: cada .zip vira a lista dos CSVs que ele contém
+def expand_uploads(files) -> list:
+    """Recebe [(nome, bytes)] e devolve [(nome, bytes)] só com CSVs, na ordem (membros do .zip em ordem alfabética)."""
+    out = []
+    for name, data in files:
+        if not is_zip(name, data):
+            out.append((name, data))
+            continue
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            members = sorted(
+                m.filename for m in zf.infolist()
+                if not m.is_dir() and not m.filename.startswith("__MACOSX/")
+                and not m.filename.rsplit("/", 1)[-1].startswith(".")
+                and m.filename.lower().endswith(BATCH_EXTENSIONS)
+            )
+            out.extend((f"{name}/{m}", zf.read(m)) for m in members)
+    return out
+
+
+# Define uma função que torna únicos os nomes dos arquivos do lote (ex: dois envios "a.csv" viram "a.csv" e "a.csv (2)")
+def unique_names(files) -> list:
+    """Recebe e devolve [(nome, bytes)]: o nome identifica o arquivo no relatório e na coluna de origem."""
+    seen, out = set(), []
+    for name, data in files:
+        unique, i = name, 1
+        while unique in seen:
+            i += 1
+            unique = f"{name} ({i})"
+        seen.add(unique)
+        out.append((unique, data))
+    return out
+
+
+# Define uma função que lê um arquivo do lote (encoding e dialeto detectados por arquivo) e mede o tempo
+def read_one(name: str, data: bytes, chosen: dict, na_values=None, arrow=False):
+    """Retorna (DataFrame ou None, linha do relatório). Os nomes das colunas já saem padronizados e únicos."""
+    t0 = time.perf_counter()
+    row = {"arquivo": name, "linhas": 0, "colunas": 0, "colunas_ausentes": 0, "encoding": None,
+           "separador": None, "tempo_s": None, "erro": None}
+    try:
+        enc = detect_encoding(data)["encoding"]
+        read = dict(resolve_dialect(chosen, sniff_dialect(data, enc)), encoding=enc, na_values=na_values, arrow=arrow)
+        df = read_csv_bytes(data, **read)
+        df.columns = make_unique([normalize_colname(c) for c in df.columns])
+        row.update(linhas=df.shape[0], colunas=df.shape[1], encoding=enc, separador=read["sep"])
+    except Exception as e:
+        # Um arquivo com problema não derruba o lote: o erro fica no relatório
+        df = None
+        row["erro"] = str(e)
+    row["tempo_s"] = round(time.perf_counter() - t0, 4)
+    return df, row
+
+
+# Define uma função que devolve o tipo de texto da leitura: string do Arrow (como o read_csv com PyArrow) ou 'object'
+def text_dtype(arrow=False):
+    return pd.ArrowDtype(pa.string()) if arrow else np.dtype(object)
+
+
+# Define uma função que escolhe um tipo comum para uma coluna que veio com tipos diferentes nos arquivos
+def union_dtype(dtypes: list, missing=False, arrow=False):
+    """Inteiros com floats viram float; números e datas de tipos diferentes, ou mistura com texto, viram texto.
+    'missing' indica que a coluna falta em algum arquivo: inteiros e booleanos do NumPy não guardam nulos."""
+    uniq = list(dict.fromkeys(dtypes))
+    is_num = [pd.api.types.is_numeric_dtype(d) and not pd.api.types.is_bool_dtype(d) for d in uniq]
+    if len(uniq) == 1:
+        dtype = uniq[0]
+    elif all(is_num):
+        ints = all(pd.api.types.is_integer_dtype(d) for d in uniq)
+        dtype = ("int64[pyarrow]" if ints else "double[pyarrow]") if arrow else ("int64" if ints else "float64")
+    elif all(pd.api.types.is_datetime64_any_dtype(d) and not isinstance(d, pd.DatetimeTZDtype) for d in uniq):
+        dtype = "timestamp[ns][pyarrow]" if arrow else "datetime64[ns]"
+    else:
+        return text_dtype(arrow)
+    dtype = pd.api.types.pandas_dtype(dtype)
+    if missing and isinstance(dtype, np.dtype) and dtype.kind in "iub":
+        return np.dtype("float64") if dtype.kind in "iu" else np.dtype(object)
+    return dtype
+
+
+# Define uma função que converte uma coluna para o tipo comum do lote
+def _cast(s: pd.Series, dtype) -> pd.Series:
+    if s.dtype == dtype:
+        return s
+    # Texto: números e datas viram o texto que tinham no arquivo (nulos continuam nulos)
+    if dtype == object or (isinstance(dtype, pd.ArrowDtype) and pa.types.is_string(dtype.pyarrow_dtype)):
+        text = s.astype("string").to_numpy(dtype=object, na_value=np.nan if dtype == object else None)
+        return pd.Series(text, index=s.index, name=s.name, dtype=dtype)
+    return s.astype(dtype)
+
+
+# Define uma função que reconcilia os esquemas e concatena os arquivos numa única operação
+def combine_frames(frames: list, names: list, arrow=False, source_column=None):
+    """Colunas na ordem em que aparecem pela primeira vez; a que falta num arquivo fica nula nas linhas dele.
+    Cada arquivo é convertido para o tipo comum e tudo é concatenado de uma vez (uma cópia só, sem concatenações
+    sucessivas). Retorna (DataFrame, {coluna: "tipos nos arquivos → tipo comum"}, {arquivo: colunas ausentes})."""
+    columns = list(dict.fromkeys(c for df in frames for c in df.columns))
+    targets, converted = {}, {}
+    for c in columns:
+        dtypes = [df[c].dtype for df in frames if c in df.columns]
+        missing = any(c not in df.columns for df in frames)
+        targets[c] = union_dtype(dtypes, missing, arrow)
+        if any(d != targets[c] for d in dtypes):
+            converted[c] = " + ".join(dict.fromkeys(map(str, dtypes))) + f" → {targets[c]}"
+    aligned, absent = [], {}
+    # Nome do arquivo de origem como categoria: um código por linha, mesmas categorias em todos os arquivos
+    source_dtype = pd.CategoricalDtype(names)
+    for i, (df, name) in enumerate(zip(frames, names)):
+        absent[name] = [c for c in columns if c not in df.columns]
+        data = {c: _cast(df[c], targets[c]) if c in df.columns else pd.Series(None, index=df.index, dtype=targets[c])
+                for c in columns}
+        if source_column:
+            codes = np.full(df.shape[0], i, dtype=np.int32)
+            data[source_column] = pd.Series(pd.Categorical.from_codes(codes, dtype=source_dtype), index=df.index)
+        aligned.append(pd.DataFrame(data, index=df.index, copy=False))
+    return pd.concat(aligned, ignore_index=True, copy=False), converted, absent
+
+
+# Define uma função que lê um lote de arquivos (CSVs e/ou .zip) e devolve um único DataFrame e o relatório
+def read_batch(files, chosen: dict, na_values=None, arrow=False, workers=1, source_column=None):
+    """'files' é [(nome, bytes)]; 'chosen' são as opções de leitura da barra lateral ("auto" = detectar por arquivo).
+    Os arquivos são lidos em paralelo por threads (o parser do pandas e o do PyArrow liberam o GIL).
+    Retorna (DataFrame, relatório por arquivo, colunas convertidas para um tipo comum)."""
+    files = unique_names(expand_uploads(files))
+    if not files:
+        raise ValueError("Nenhum CSV encontrado nos arquivos enviados.")
+    tasks.add_total(len(files))
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(files)))) as pool:
+        for result in pool.map(lambda f: read_one(f[0], f[1], chosen, na_values, arrow), files):
+            results.append(result)
+            # Ponto de controle: cancelado, os arquivos que ainda não começaram não são lidos
+            try:
+                tasks.advance(label=result[1]["arquivo"])
+            except tasks.Cancelled:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+    ok = [(df, row) for df, row in results if df is not None]
+    if not ok:
+        raise ValueError("Nenhum arquivo do lote pôde ser lido: " + "; ".join(r["erro"] for _, r in results))
+    df, converted, absent = combine_frames([d for d, _ in ok], [r["arquivo"] for _, r in ok], arrow, source_column)
+    for _, row in results:
+        row["colunas_ausentes"] = len(absent.get(row["arquivo"], []))
+    report = pd.DataFrame([row for _, row in results], columns=REPORT_COLUMNS)
+    return df, report, converted
@@ -0,0 +1,261 @@
+# Benchmarks reprodutíveis: cronometra utilitários e etapas sobre CSVs sujos sintéticos e compara com a linha de base
+#
+# Uso:
+#   python bench.py                                   # 10 mil e 100 mil linhas, compara com bench_baseline.json
+#   python bench.py --rows 1000000 --repeat 5 --cases auto_types,fill_na
+#   python bench.py --save-baseline                   # grava (ou atualiza) a linha de base desta máquina
+#
+# Código de saída: 0 sem regressões, 1 com regressões, 2 em erro de execução.
+
+# Importa o módulo argparse para ler os argumentos da linha de comando
+import argparse
+# Importa o módulo json para ler e gravar a linha de base
+import json
+# Importa o módulo os para caminhos e número de CPUs
+import os
+# Importa o módulo platform para registrar a máquina e as versões na linha de base
+import platform
+# Importa o módulo statistics para a mediana das repetições
+import statistics
+# Importa o módulo sys para o código de saída
+import sys
+# Importa o módulo tempfile para a pasta dos CSVs gerados
+import tempfile
+
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+
+# Importa as funções medidas
+from cleaning import apply_step, coerce_numeric, df_info_summary, normalize_colname, try_parse_datetime
+# Importa os motores de execução das etapas
+from engines import available_engines, get_engine
+# Importa a medição de tempo, CPU e memória das fases
+from instrumentation import Measure
+# Importa a detecção de encoding e a leitura do CSV
+from loading import detect_encoding_file, read_csv_file
+# Importa a reaplicação das etapas em sequência
+from recipe import replay
+# Importa o gerador de CSVs sujos
+from synthetic import NA_TOKENS, write_dirty_csv
+
+# Linha de base padrão, versionada junto com o código
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+# Tamanhos padrão (o gerador vai até 10 milhões de linhas: use --rows)
+DEFAULT_ROWS = [10_000, 100_000]
+# Regressão de tempo: mais lento que a linha de base além desta fração e desta diferença absoluta (ruído)
+TIME_TOLERANCE = 0.5
+MIN_TIME_DELTA_S = 0.05
+# Regressão de memória: pico do tracemalloc acima da linha de base além desta fração e desta diferença absoluta
+MEMORY_TOLERANCE = 0.2
+MIN_MEMORY_DELTA_MB = 1.0
+
+# Opções de leitura do CSV gerado (as mesmas que um usuário escolheria na barra lateral)
+READ_OPTS = {"sep": ";", "has_header": True, "na_values": [t for t in NA_TOKENS if t]}
+# Colunas do CSV gerado, já padronizadas
+TEXT_COLUMNS = ["nome_completo", "cidade", "uf", "valor_r", "quantidade", "data_compra", "status", "observação"]
+NUMERIC_COLUMNS = ["valor_r", "quantidade"]
+
+# Etapas do pipeline completo, na ordem da interface
+PIPELINE = [
+    {"op": "standardize_colnames"},
+    {"op": "clean_text", "columns": TEXT_COLUMNS, "collapse_spaces": True},
+    {"op": "auto_types", "convert_numbers": True, "convert_dates": True, "decimal": ","},
+    {"op": "drop_duplicates", "keep": "first"},
+    {"op": "fill_na", "numeric": {"strategy": "median", "columns": NUMERIC_COLUMNS},
+     "categorical": {"strategy": "unknown", "columns": ["nome_completo", "status", "observação"]},
+     "datetime": {"strategy": "drop", "columns": ["data_compra"]}},
+    {"op": "remove_outliers", "columns": ["valor_r"], "factor": 1.5},
+]
+
+
+# Define uma função que prepara as entradas dos casos: o arquivo e o DataFrame em cada ponto do pipeline
+def prepare_inputs(path, workers=1) -> dict:
+    enc = detect_encoding_file(path)["encoding"]
+    raw = read_csv_file(path, encoding=enc, **READ_OPTS)
+    std, _ = apply_step(raw, PIPELINE[0])
+    cleaned, _ = apply_step(std, PIPELINE[1], workers=workers)
+    typed, _ = apply_step(cleaned, PIPELINE[2], workers=workers)
+    return {"path": path, "encoding": enc, "raw": raw, "std": std, "clean": cleaned, "typed": typed}
+
+
+# Define uma função que monta os casos: nome -> (entrada, função que recebe a entrada)
+def build_cases(inputs: dict, workers=1, engine="pandas") -> dict:
+    valor, data = normalize_colname("Valor (R$)"), normalize_colname("Data Compra")
+    step = {spec["op"]: spec for spec in PIPELINE}
+    run_step = get_engine(engine).apply_step
+    return {
+        # Utilitários
+        "leitura": ("path", lambda p: read_csv_file(p, encoding=detect_encoding_file(p)["encoding"], **READ_OPTS)),
+        "df_info_summary": ("raw", lambda df: df_info_summary(df, workers=workers)),
+        "coerce_numeric": ("clean", lambda df: coerce_numeric(df[valor], decimal_hint=",")),
+        "try_parse_datetime": ("clean", lambda df: try_parse_datetime(df[data])),
+        # Etapas, cada uma sobre a saída da anterior
+        "standardize_colnames": ("raw", lambda df: run_step(df, step["standardize_colnames"])[0]),
+        "clean_text": ("std", lambda df: run_step(df, step["clean_text"], workers=workers)[0]),
+        "auto_types": ("clean", lambda df: run_step(df, step["auto_types"], workers=workers)[0]),
+        "drop_duplicates": ("typed", lambda df: run_step(df, step["drop_duplicates"])[0]),
+        "fill_na": ("typed", lambda df: run_step(df, step["fill_na"])[0]),
+        "remove_outliers": ("typed", lambda df: run_step(df, step["remove_outliers"])[0]),
+        # Pipeline completo, do CSV lido ao resultado final
+        "pipeline": ("raw", lambda df: replay(df, PIPELINE, workers, engine)[0]),
+    }
+
+
+# Define uma função que mede um caso: mediana de 'repeat' execuções e, à parte, o pico de memória
+def run_case(name: str, func, arg, rows: int, repeat=3, memory=True) -> dict:
+    runs = []
+    for _ in range(repeat):
+        with Measure(name, rows_in=rows) as m:
+            out = func(arg)
+        runs.append(m)
+    wall = statistics.median(m.wall for m in runs)
+    result = {
+        "caso": name,
+        "linhas": rows,
+        "tempo_s": round(wall, 4),
+        "tempo_min_s": round(min(m.wall for m in runs), 4),
+        "cpu_s": round(statistics.median(m.cpu for m in runs), 4),
+        "linhas_por_s": round(rows / wall) if wall else None,
+        "linhas_saida": len(out) if hasattr(out, "__len__") else None,
+        "pico_mb": None,
+    }
+    # O tracemalloc deixa a execução mais lenta: roda uma vez a mais, fora da medição de tempo
+    if memory:
+        with Measure(name, trace_memory=True) as m:
+            func(arg)
+        result["pico_mb"] = round(m.peak_mb, 2)
+    return result
+
+
+# Define uma função que gera (ou reaproveita) os CSVs e mede os casos escolhidos em cada tamanho
+def run_benchmarks(rows_list, cases=None, repeat=3, memory=True, workers=1, data_dir=None, seed=0, log=print,
+                   engine="pandas") -> list:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = data_dir or tmp
+        os.makedirs(folder, exist_ok=True)
+        for rows in rows_list:
+            # Arquivos já gerados numa pasta informada são reaproveitados (a geração é determinística)
+            path = os.path.join(folder, f"sujo_{rows}_{seed}.csv")
+            if not os.path.exists(path):
+                log(f"Gerando {path} ({rows} linhas)...")
+                write_dirty_csv(path, rows, seed)
+            inputs = prepare_inputs(path, workers)
+            for name, (key, func) in build_cases(inputs, workers, engine).items():
+                if cases and name not in cases:
+                    continue
+                r = run_case(name, func, inputs[key], rows, repeat, memory)
+                r["motor"] = engine
+                log(f"{name:>22} @ {rows:>9}: {r['tempo_s']:>8.3f}s  {r['linhas_por_s'] or 0:>11} linhas/s"
+                    + (f"  pico {r['pico_mb']:.1f} MB" if r["pico_mb"] is not None else ""))
+                results.append(r)
+    return results
+
+
+# Define uma função que identifica cada resultado na linha de base
+def result_key(result: dict) -> str:
+    # Resultados do motor padrão mantêm a chave sem o motor (linhas de base anteriores continuam valendo)
+    engine = result.get("motor", "pandas")
+    return f"{result['caso']}@{result['linhas']}" + ("" if engine == "pandas" else f"@{engine}")
+
+
+# Define uma função que compara os resultados com a linha de base e lista as regressões
+def compare(results: list, baseline: dict, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE) -> list:
+    """Só tempo e pico de memória contam; casos sem linha de base são ignorados."""
+    regressions = []
+    for r in results:
+        base = baseline.get("results", {}).get(result_key(r))
+        if base is None:
+            continue
+        if (r["tempo_s"] > base["tempo_s"] * (1 + time_tolerance)
+                and r["tempo_s"] - base["tempo_s"] > MIN_TIME_DELTA_S):
+            regressions.append(f"{result_key(r)}: tempo {base['tempo_s']:.3f}s -> {r['tempo_s']:.3f}s "
+                               f"(+{r['tempo_s'] / base['tempo_s'] - 1:.0%})")
+        if (r["pico_mb"] is not None and base.get("pico_mb") is not None
+                and r["pico_mb"] > base["pico_mb"] * (1 + memory_tolerance)
+                and r["pico_mb"] - base["pico_mb"] > MIN_MEMORY_DELTA_MB):
+            regressions.append(f"{result_key(r)}: pico de memória {base['pico_mb']:.1f} MB -> {r['pico_mb']:.1f} MB "
+                               f"(+{r['pico_mb'] / base['pico_mb'] - 1:.0%})")
+    return regressions
+
+
+# Define uma função que descreve o ambiente da medição (tempos só se comparam na mesma máquina)
+def environment() -> dict:
+    return {"python": platform.python_version(), "pandas": pd.__version__, "maquina": platform.machine(),
+            "sistema": platform.system(), "cpus": os.cpu_count()}
+
+
+# Define uma função que lê a linha de base (vazia se o arquivo não existir)
+def load_baseline(path) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Define uma função que grava os resultados na linha de base, mantendo os casos que não foram medidos agora
+def save_baseline(path, results: list):
+    baseline = load_baseline(path)
+    baseline["ambiente"] = environment()
+    baseline.setdefault("results", {}).update({result_key(r): r for r in results})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+# Define o analisador de argumentos da linha de comando
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="bench", description="Benchmarks das etapas de limpeza sobre CSVs sintéticos.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS,
+                        help="tamanhos dos CSVs gerados (padrão: 10000 100000; até 10 milhões)")
+    parser.add_argument("--cases", default=None, help="casos separados por vírgula (padrão: todos)")
+    parser.add_argument("--repeat", type=int, default=3, help="repetições por caso; vale a mediana (padrão: 3)")
+    parser.add_argument("--workers", type=int, default=1, help="colunas em paralelo (padrão: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="semente do gerador (padrão: 0)")
+    parser.add_argument("--engine", default="pandas", choices=available_engines(),
+                        help="motor das etapas (padrão: pandas)")
+    parser.add_argument("--no-memory", action="store_true", help="não mede o pico de memória (tracemalloc)")
+    parser.add_argument("--data-dir", default=None, help="pasta onde guardar e reaproveitar os CSVs gerados")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="arquivo da linha de base (JSON)")
+    parser.add_argument("--save-baseline", action="store_true", help="grava os resultados como linha de base")
+    parser.add_argument("--tolerance", type=float, default=TIME_TOLERANCE,
+                        help=f"fração de lentidão tolerada (padrão: {TIME_TOLERANCE})")
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE,
+                        help=f"fração de aumento do pico de memória tolerada (padrão: {MEMORY_TOLERANCE})")
+    parser.add_argument("--output", default=None, help="grava os resultados desta execução em JSON")
+    return parser
+
+
+# Define o ponto de entrada da linha de comando
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    cases = set(args.cases.split(",")) if args.cases else None
+    try:
+        results = run_benchmarks(args.rows, cases, args.repeat, not args.no_memory, args.workers,
+                                 args.data_dir, args.seed, engine=args.engine)
+    except Exception as e:
+        print(f"ERRO  {e}", file=sys.stderr)
+        return 2
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"ambiente": environment(), "results": results}, f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Linha de base gravada em {args.baseline}.")
+        return 0
+    baseline = load_baseline(args.baseline)
+    if not baseline:
+        print(f"Sem linha de base em {args.baseline}: rode com --save-baseline para criar uma.")
+        return 0
+    # Tempos de outra máquina não são comparáveis: avisa, mas compara mesmo assim
+    if baseline.get("ambiente", {}).get("cpus") != os.cpu_count():
+        print("Aviso: linha de base gravada em outra máquina; tempos podem não ser comparáveis.")
+    regressions = compare(results, baseline, args.tolerance, args.memory_tolerance)
+    for msg in regressions:
+        print(f"REGRESSÃO  {msg}", file=sys.stderr)
+    print(f"{len(results)} medições, {len(regressions)} regressões.")
+    return 1 if regressions else 0
+
+
+# Executa o ponto de entrada quando chamado como script
+if __name__ == "__main__":
+    sys.exit(main())
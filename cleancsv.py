@@ -0,0 +1,106 @@
+# Linha de comando: reaplica uma receita gravada no app sobre vários CSVs, em paralelo e sem navegador
+#
+# Uso:
+#   python cleancsv.py run receita.json entrada/*.csv --out-dir saida --workers 8
+#   python -m cleancsv run receita.yaml dados.csv --chunksize 200000
+
+# Importa o módulo argparse para ler os argumentos da linha de comando
+import argparse
+# Importa o módulo glob para expandir padrões (ex: no Windows, onde o shell não expande *.csv)
+import glob
+# Importa o módulo os para lidar com caminhos e número de CPUs
+import os
+# Importa o módulo sys para o código de saída
+import sys
+# Importa o pool de processos para processar vários arquivos ao mesmo tempo
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Importa os motores de execução das etapas
+from engines import available_engines
+# Importa os formatos de saída
+from export import EXPORT_FORMATS, available_formats
+# Importa a leitura e a aplicação de receitas
+from recipe import load_recipe, run_file
+
+
+# Define uma função que expande os padrões recebidos em uma lista de arquivos (sem repetições)
+def expand_inputs(patterns) -> list:
+    files = []
+    for pattern in patterns:
+        # Se o padrão não casar com nada, mantém o texto (o erro aparece ao abrir o arquivo)
+        matches = sorted(glob.glob(pattern)) or [pattern]
+        files.extend(m for m in matches if m not in files)
+    return files
+
+
+# Define uma função que monta o caminho de saída de cada arquivo de entrada
+def output_path(in_path, out_dir, suffix, fmt="csv") -> str:
+    base, _ = os.path.splitext(os.path.basename(in_path))
+    return os.path.join(out_dir, f"{base}{suffix}{EXPORT_FORMATS[fmt]['ext']}")
+
+
+# Define o comando "run": aplica a receita a cada arquivo num pool de processos
+def cmd_run(args) -> int:
+    recipe = load_recipe(args.recipe)
+    # Em blocos, a saída é gravada incrementalmente: só os formatos CSV
+    if args.chunksize and not EXPORT_FORMATS[args.format]["text"]:
+        print(f"ERRO  o formato {args.format} não é suportado com --chunksize (use csv, csv.gz ou zip).", file=sys.stderr)
+        return 2
+    inputs = expand_inputs(args.inputs)
+    os.makedirs(args.out_dir, exist_ok=True)
+    # Um processo por arquivo, até o número de workers (padrão: todas as CPUs)
+    workers = min(args.workers or os.cpu_count() or 1, len(inputs))
+    # Colunas em paralelo dentro de cada arquivo: só quando pedido (os arquivos já ocupam os núcleos em paralelo)
+    column_workers = args.column_workers or 1
+    failures = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(run_file, recipe, path, output_path(path, args.out_dir, args.suffix, args.format),
+                        args.chunksize, fmt=args.format, workers=column_workers, engine=args.engine): path
+            for path in inputs
+        }
+        # Mostra cada resultado assim que o arquivo termina
+        for fut in as_completed(futures):
+            path = futures[fut]
+            try:
+                r = fut.result()
+                print(f"OK    {path} -> {r['output']}: {r['rows_in']} -> {r['rows_out']} linhas "
+                      f"({r['encoding']}, {r['seconds']}s)")
+            except Exception as e:
+                failures += 1
+                print(f"ERRO  {path}: {e}", file=sys.stderr)
+    print(f"{len(inputs) - failures}/{len(inputs)} arquivos processados.")
+    return 1 if failures else 0
+
+
+# Define o analisador de argumentos da linha de comando
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cleancsv", description="Limpeza de CSVs em lote a partir de uma receita.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="aplica uma receita (JSON/YAML) a um ou mais CSVs")
+    run.add_argument("recipe", help="arquivo de receita baixado no app (.json, .yaml)")
+    run.add_argument("inputs", nargs="+", help="arquivos CSV de entrada (aceita padrões como in/*.csv)")
+    run.add_argument("--out-dir", default="saida", help="pasta de saída (padrão: saida)")
+    run.add_argument("--suffix", default="_tratado", help="sufixo do nome dos arquivos gerados (padrão: _tratado)")
+    run.add_argument("--workers", type=int, default=None, help="processos em paralelo (padrão: número de CPUs)")
+    run.add_argument("--column-workers", type=int, default=None,
+                     help="colunas processadas em paralelo em cada arquivo (padrão: 1; compensa em arquivos grandes)")
+    run.add_argument("--chunksize", type=int, default=None,
+                     help="processa cada arquivo em blocos de N linhas (arquivos maiores que a memória)")
+    run.add_argument("--format", default="csv", choices=available_formats(),
+                     help="formato de saída (padrão: csv; Parquet/Feather exigem o PyArrow)")
+    run.add_argument("--engine", default="pandas", choices=available_engines(),
+                     help="motor das etapas (padrão: pandas; polars exige o Polars instalado)")
+    run.set_defaults(func=cmd_run)
+    return parser
+
+
+# Define o ponto de entrada da linha de comando
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+# Executa o ponto de entrada quando chamado como script ou com "python -m cleancsv"
+if __name__ == "__main__":
+    sys.exit(main())
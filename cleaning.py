@@ -0,0 +1,671 @@
+# Utilitários e etapas de limpeza como funções puras sobre DataFrames (sem Streamlit)
+
+# Importa o módulo unicodedata para remover acentos
+import unicodedata
+
+# Importa a biblioteca numpy para operações numéricas vetorizadas
+import numpy as np
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+
+# Importa os hashes de linha usados para encontrar duplicadas
+from fingerprints import duplicated_hashes, row_fingerprints
+# Importa o perfil de colunas em uma passada
+from profiling import profile_frame
+# Importa o executor por coluna (threads ou processos)
+from parallel import map_columns
+# Importa o sketch de quantis aproximados (KLL)
+from sketches import KLLSketch
+
+
+# Utilitários
+
+
+# Define uma função para normalizar o nome de uma coluna
+def normalize_colname(name: str) -> str:
+    # Importa a biblioteca re para expressões regulares (já importada no topo, mas re-importada aqui localmente)
+    import re
+    # Converte o nome para string, remove espaços extras no início/fim e converte para minúsculas
+    name = str(name).strip().lower()
+    # Substitui um ou mais espaços por um único underscore
+    name = re.sub(r"\s+", "_", name)
+    # Remove todos os caracteres que não são letras, números ou underscores
+    name = re.sub(r"[^\w_]", "", name)
+    # Substitui múltiplos underscores consecutivos por um único underscore e remove underscores no início/fim
+    name = re.sub(r"_+", "_", name).strip("_")
+    # Se o nome resultar em uma string vazia após a normalização, define como "col"
+    if name == "":
+        name = "col"
+    # Retorna o nome da coluna normalizado
+    return name
+
+
+
+# Define uma função chamada make_unique que recebe uma lista de nomes
+def make_unique(names):
+    """Garante nomes únicos: a, a_2, a_3...""" # Docstring: explica o propósito da função
+    seen = {} # Inicializa um dicionário vazio para armazenar a contagem de cada nome
+    out = [] # Inicializa uma lista vazia para armazenar os nomes únicos resultantes
+    # Itera sobre cada nome na lista de nomes de entrada
+    for n in names:
+        # Verifica se o nome atual ainda não foi visto (não está no dicionário seen)
+        if n not in seen:
+            seen[n] = 1 # Se não foi visto, adiciona-o ao dicionário com contagem 1
+            out.append(n) # Adiciona o nome original à lista de saída
+        # Se o nome já foi visto
+        else:
+            seen[n] += 1 # Incrementa a contagem desse nome no dicionário
+            out.append(f"{n}_{seen[n]}") # Adiciona o nome com um sufixo numérico (ex: "nome_2") à lista de saída
+    return out # Retorna a lista de nomes únicos
+
+
+# Define uma função que diz se a coluna guarda texto: 'object', "string" do pandas ou string[pyarrow]
+def is_text_dtype(series: pd.Series) -> bool:
+    return pd.api.types.is_string_dtype(series.dtype)
+
+
+# Define uma função que diz se a coluna é categórica (valores guardados como códigos + lista de categorias)
+def is_categorical(series: pd.Series) -> bool:
+    return isinstance(series.dtype, pd.CategoricalDtype)
+
+
+# Formatos de data/hora candidatos (strftime), testados em ordem; em empate vence o primeiro (formas brasileiras dd/mm antes de mm/dd)
+DATETIME_FORMATS = [
+    "%d/%m/%Y", "%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%d/%m/%y", "%d-%m-%Y", "%d.%m.%Y",
+    "%Y-%m-%d", "%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y/%m/%d",
+    "%m/%d/%Y", "%m/%d/%Y %H:%M", "%m/%d/%Y %H:%M:%S",
+    # ISO 8601 genérico (frações de segundo, fuso horário...), ainda vetorizado
+    "ISO8601",
+]
+
+# Número máximo de formatos combinados numa mesma coluna (ex: "dd/mm/aaaa" e "dd/mm/aaaa hh:mm")
+MAX_DATETIME_FORMATS = 3
+
+# Cache dos formatos escolhidos por coluna: {(nome da coluna, assinatura da amostra): (formatos, fração convertida)}
+_DATETIME_FORMAT_CACHE = {}
+# Número máximo de entradas guardadas no cache de formatos
+_DATETIME_FORMAT_CACHE_SIZE = 1024
+
+
+# Define uma função que escolhe os formatos de data que convertem a maior fração de uma amostra da série
+def infer_datetime_format(series: pd.Series, sample_size=200):
+    """Retorna (lista de formatos, fração da amostra convertida); formatos None se nenhum candidato converter nada.
+
+    Cada candidato é testado com um único pd.to_datetime(format=...) vetorizado sobre a amostra.
+    O melhor formato é escolhido primeiro; os valores que sobraram escolhem o próximo, até MAX_DATETIME_FORMATS.
+    """
+    # Extrai valores não nulos da série e converte-os para string
+    s = series.dropna().astype(str)
+    # Se a série resultante estiver vazia após remover nulos, não há o que verificar
+    if s.empty:
+        return None, 0.0
+    # Seleciona uma amostra aleatória reprodutível dos valores
+    s = s.sample(min(sample_size, len(s)), random_state=42)
+    # Consulta o cache pela coluna e pela assinatura (hash) da amostra
+    key = (series.name, int(pd.util.hash_pandas_object(s, index=False).sum()))
+    if key in _DATETIME_FORMAT_CACHE:
+        return _DATETIME_FORMAT_CACHE[key]
+    formats, parsed, remaining = [], 0, s
+    # Rejeição antecipada: datas precisam de dígitos (texto livre não paga o teste dos formatos)
+    if s.str.contains(r"\d", regex=True).any():
+        while remaining.size and len(formats) < MAX_DATETIME_FORMATS:
+            best_fmt, best_ok = None, None
+            for fmt in DATETIME_FORMATS:
+                if fmt in formats:
+                    continue
+                # Conversão vetorizada dos valores restantes com o formato candidato
+                ok = pd.to_datetime(remaining, format=fmt, errors="coerce").notna()
+                if best_ok is None or ok.sum() > best_ok.sum():
+                    best_fmt, best_ok = fmt, ok
+                    # Todos os restantes convertidos: não há candidato melhor
+                    if ok.all():
+                        break
+            # Nenhum candidato converte o que sobrou
+            if best_ok is None or not best_ok.any():
+                break
+            formats.append(best_fmt)
+            parsed += int(best_ok.sum())
+            remaining = remaining[~best_ok]
+    best = (formats or None, parsed / len(s))
+    # Guarda no cache (descartando o mais antigo se estiver cheio)
+    if len(_DATETIME_FORMAT_CACHE) >= _DATETIME_FORMAT_CACHE_SIZE:
+        _DATETIME_FORMAT_CACHE.pop(next(iter(_DATETIME_FORMAT_CACHE)))
+    _DATETIME_FORMAT_CACHE[key] = best
+    return best
+
+
+def try_parse_datetime(series: pd.Series, sample_size=200) -> bool:
+    # Define uma função para tentar inferir se uma série Pandas contém datas
+    # Retorna True se os formatos candidatos converterem pelo menos 70% da amostra
+    return infer_datetime_format(series, sample_size)[1] >= 0.7
+
+# Define uma função chamada to_datetime_safe que recebe uma série Pandas
+def to_datetime_safe(series: pd.Series, format=None) -> pd.Series:
+    # Usa os formatos informados ou os inferidos a partir de uma amostra da coluna
+    if format is None:
+        format = infer_datetime_format(series)[0]
+    # Sem formato reconhecido, deixa o pandas inferir a partir do primeiro valor
+    if format is None:
+        return pd.to_datetime(series, errors="coerce")
+    formats = [format] if isinstance(format, str) else list(format)
+    # Conversão vetorizada com o primeiro formato; errors="coerce" transforma o que não converter em NaT
+    result = pd.to_datetime(series, errors="coerce", format=formats[0])
+    # Os formatos seguintes só são aplicados aos valores que ainda não converteram
+    for fmt in formats[1:]:
+        missing = result.isna() & series.notna()
+        if not missing.any():
+            break
+        result[missing] = pd.to_datetime(series[missing], errors="coerce", format=fmt)
+    return result
+
+# Padrões de número por convenção de separadores {(decimal, milhar): regex}; sinal e notação científica opcionais
+# (sem lookahead, para valer também no motor RE2 das colunas string[pyarrow]; "+", "," ou "" não contam como número)
+NUMBER_PATTERNS = {
+    (",", "."): r"\s*[+-]?(?:(?:\d{1,3}(?:\.\d{3})+|\d+)(?:,\d+)?|,\d+)(?:[eE][+-]?\d+)?\s*",
+    (".", ","): r"\s*[+-]?(?:(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?|\.\d+)(?:[eE][+-]?\d+)?\s*",
+}
+
+
+# Define uma função que marca, numa coluna de objetos, os valores que já são números (int/float do Python ou do NumPy)
+def _numeric_objects(series: pd.Series):
+    """Retorna a máscara desses valores, ou None se não houver nenhum (ex: colunas só de texto, que são a regra).
+    O leitor do pandas em blocos (low_memory) pode misturar ints e strs na mesma coluna de objetos."""
+    if series.dtype != object or pd.api.types.infer_dtype(series, skipna=True) in ("string", "empty"):
+        return None
+    mask = np.fromiter((isinstance(v, (int, float, np.number)) and not isinstance(v, (bool, np.bool_))
+                        for v in series.to_numpy()), dtype=bool, count=len(series))
+    mask &= series.notna().to_numpy()
+    return mask if mask.any() else None
+
+
+# Define uma função que descobre, a partir de uma amostra, quais são os separadores decimal e de milhar de uma coluna
+def infer_number_format(series: pd.Series, decimal_hint=".", sample_size=1000):
+    """Retorna (decimal, milhar, fração da amostra que parece número nessa convenção).
+
+    "1.234,56" e "2,5" só casam com decimal vírgula; "1,234.56" e "1.5" só com decimal ponto.
+    Em empate (ex: só inteiros, ou só valores como "1.234") vence o separador decimal informado em 'decimal_hint'.
+    """
+    # Amostra reprodutível dos valores não nulos: colunas de texto livre são rejeitadas sem converter a coluna inteira
+    s = series.dropna()
+    if s.empty:
+        return decimal_hint, ("," if decimal_hint == "." else "."), 0.0
+    s = s.sample(min(sample_size, len(s)), random_state=42)
+    # Valores que já são números contam nas duas convenções; os textos precisam casar com o padrão
+    numbers = _numeric_objects(s)
+    n_numbers, text = (0, s) if numbers is None else (int(numbers.sum()), s[~numbers])
+    # Conta quantos valores da amostra casam com cada convenção (outros objetos, como booleanos, não casam)
+    scores = {conv: n_numbers + (int(text.str.fullmatch(pattern).fillna(False).sum()) if len(text) else 0)
+              for conv, pattern in NUMBER_PATTERNS.items()}
+    hint = next(conv for conv in NUMBER_PATTERNS if conv[0] == decimal_hint)
+    # Escolhe a convenção com mais valores compatíveis; em empate, a do separador decimal informado
+    decimal, thousands = max(NUMBER_PATTERNS, key=lambda conv: (scores[conv], conv == hint))
+    return decimal, thousands, scores[(decimal, thousands)] / len(s)
+
+
+def coerce_numeric(series: pd.Series, decimal=None, thousands=None, decimal_hint=".") -> pd.Series:
+    # Usa os separadores informados ou os inferidos a partir de uma amostra da coluna
+    if decimal is None:
+        decimal, thousands, _ = infer_number_format(series, decimal_hint)
+    # Uma única passada vetorizada remove o separador de milhar e troca o decimal por ponto
+    table = {thousands: None}
+    if decimal != ".":
+        table[decimal] = "."
+    # Valores que já são números passam direto; só os textos são traduzidos
+    numbers = _numeric_objects(series)
+    text = series if numbers is None else series.where(~numbers)
+    s = text.str.translate(str.maketrans(table))
+    # to_numeric já ignora espaços no início/fim; o que não converter vira NaN
+    out = pd.to_numeric(s, errors="coerce")
+    if numbers is not None:
+        out = out.astype("float64")
+        out[numbers] = series[numbers].astype("float64")
+    return out
+
+
+# Define uma função que escolhe o dtype numérico mais estreito que representa a série sem perda
+def narrow_numeric(series: pd.Series, allow_float32=False) -> pd.Series:
+    """Inteiros viram int8...int64 (ou Int8...Int64 anuláveis, se houver nulos); com 'allow_float32',
+    floats cujos valores cabem em float32 (erro relativo <= 1e-6, ~7 dígitos) viram float32."""
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    valid = values[~np.isnan(values)]
+    # Coluna só com nulos: nada a estreitar
+    if valid.size == 0:
+        return series
+    # Todos os valores finitos e inteiros: inteiro mais estreito (anulável se houver nulos)
+    if np.isfinite(valid).all() and (valid == np.round(valid)).all() and np.abs(valid).max() < 2**63:
+        ints = series.astype("Int64") if valid.size < values.size else series.astype("int64")
+        return _keep_arrow(series, pd.to_numeric(ints, downcast="integer"))
+    # float32 só quando pedido e sem perda relevante de precisão
+    if allow_float32 and np.abs(valid[np.isfinite(valid)]).max(initial=0) < np.finfo("float32").max:
+        narrowed = values.astype("float32")
+        if np.allclose(narrowed, values, rtol=1e-6, atol=0, equal_nan=True):
+            return _keep_arrow(series, pd.Series(narrowed, index=series.index, name=series.name))
+    return series
+
+
+# Define uma função que mantém em memória Arrow uma série estreitada a partir de uma série Arrow (ex: int16[pyarrow])
+def _keep_arrow(original: pd.Series, narrowed: pd.Series) -> pd.Series:
+    if not isinstance(original.dtype, pd.ArrowDtype):
+        return narrowed
+    # Int16 (anulável do pandas) e int16 (numpy) têm o mesmo dtype numpy de base
+    base = np.dtype(getattr(narrowed.dtype, "numpy_dtype", narrowed.dtype))
+    return narrowed.astype(f"{base.name}[pyarrow]")
+
+
+# Define uma função chamada df_info_summary que recebe um DataFrame e retorna um novo DataFrame com um resumo das colunas
+def df_info_summary(df: pd.DataFrame, approx_distinct=False, workers=1) -> pd.DataFrame:
+    # Retorna o perfil de cada coluna (dtype, nulos, % nulos, únicos, memória, mín/máx), uma passada por coluna
+    return profile_frame(df, approx_distinct=approx_distinct, workers=workers)
+
+
+# Etapas de limpeza
+#
+# Cada etapa é descrita por um dicionário ("spec") com a chave "op" e seus parâmetros,
+# por exemplo {"op": "clean_text", "columns": ["nome"], "collapse_spaces": True}.
+# As funções abaixo nunca alteram o DataFrame recebido: retornam um novo.
+
+
+# Estratégias de preenchimento que precisam de uma estatística da coluna (média, moda...)
+STAT_FILL_STRATEGIES = {"mean", "median", "mode", "min", "max"}
+
+
+# Define uma função que padroniza os nomes das colunas e garante que sejam únicos
+def standardize_colnames(df: pd.DataFrame) -> pd.DataFrame:
+    # Gera os nomes padronizados e únicos (ex: "col", "col_2")
+    new_cols = make_unique([normalize_colname(c) for c in df.columns])
+    # Retorna um novo DataFrame com as colunas renomeadas
+    return df.set_axis(new_cols, axis=1)
+
+
+# Linhas do início da coluna usadas para estimar a proporção de valores distintos
+TEXT_SAMPLE_ROWS = 10_000
+# Acima desta proporção de distintos, colunas Arrow sem opções extras usam os kernels vetorizados do Arrow
+# (quase todo valor é único: fatorar não economiza nada e o laço em Python sai mais caro)
+TEXT_UNIQUE_RATIO = 0.5
+
+
+# Define uma função que extrai de uma etapa "clean_text" as opções da limpeza
+def text_options(spec: dict) -> dict:
+    return {"collapse_spaces": spec.get("collapse_spaces", True), "casefold": spec.get("casefold", False),
+            "strip_accents": spec.get("strip_accents", False), "na_tokens": spec.get("na_tokens")}
+
+
+# Define uma função que remove os acentos de um texto (decompõe e descarta as marcas combinantes)
+def _remove_accents(text: str) -> str:
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize("NFKD", text)
+    return unicodedata.normalize("NFC", "".join(ch for ch in decomposed if not unicodedata.combining(ch)))
+
+
+# Define uma função que limpa uma lista de valores distintos numa só passada (None = vira nulo)
+def _normalize_values(values, collapse_spaces=True, casefold=False, strip_accents=False, na_tokens=None) -> list:
+    # Marcadores de NA comparados já limpos e sem diferenciar maiúsculas
+    tokens = {" ".join(str(t).split()).casefold() for t in na_tokens} if na_tokens else None
+    out = []
+    for v in values:
+        v = str(v)
+        # strip + troca de espaços repetidos por um, fundidos: split() já descarta as pontas
+        v = " ".join(v.split()) if collapse_spaces else v.strip()
+        if strip_accents:
+            v = _remove_accents(v)
+        if casefold:
+            v = v.casefold()
+        out.append(None if tokens is not None and v.casefold() in tokens else v)
+    return out
+
+
+# Define uma função que limpa só as categorias de uma coluna categórica e remapeia os códigos
+def _clean_categories(series: pd.Series, **options) -> pd.Series:
+    # A limpeza roda sobre as poucas categorias, não sobre as linhas
+    cleaned = pd.array(_normalize_values(series.cat.categories, **options), dtype="string")
+    # Categorias que ficam iguais após a limpeza (ex: " SP" e "SP") são fundidas numa só; marcadores de NA viram -1
+    new_codes, categories = pd.factorize(cleaned)
+    codes = series.cat.codes.to_numpy()
+    codes = np.where(codes >= 0, new_codes[codes], -1)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=categories), index=series.index, name=series.name)
+
+
+# Define uma função que remove espaços extras de uma coluna de texto (e, se pedido, maiúsculas, acentos e marcadores de NA)
+def clean_text_column(s: pd.Series, collapse_spaces=True, casefold=False, strip_accents=False,
+                      na_tokens=None) -> pd.Series:
+    """A coluna é fatorada (códigos + valores distintos): a limpeza roda uma vez por valor distinto
+    e o resultado volta às linhas pelos códigos, sem repetir o trabalho nas linhas repetidas."""
+    options = dict(collapse_spaces=collapse_spaces, casefold=casefold, strip_accents=strip_accents,
+                   na_tokens=na_tokens)
+    # Colunas categóricas continuam categóricas: só as categorias são limpas
+    if is_categorical(s):
+        return _clean_categories(s, **options)
+    # Colunas 'object' (ou não textuais) viram o tipo de string do pandas (permite valores nulos);
+    # colunas que já são string (do pandas ou Arrow) mantêm o armazenamento
+    dtype = "string" if s.dtype == "object" or not is_text_dtype(s) else s.dtype
+    arrow = isinstance(dtype, pd.ArrowDtype) or getattr(dtype, "storage", None) in ("pyarrow", "pyarrow_numpy")
+    if arrow and not (casefold or strip_accents or na_tokens):
+        head = s.iloc[:TEXT_SAMPLE_ROWS]
+        if head.nunique() > TEXT_UNIQUE_RATIO * max(head.count(), 1):
+            s = s.str.strip()
+            return s.str.replace(r"\s+", " ", regex=True) if collapse_spaces else s
+    codes, uniques = pd.factorize(s)
+    cleaned = pd.array(_normalize_values(uniques, **options), dtype=dtype)
+    # Códigos -1 (nulos) continuam nulos
+    return pd.Series(cleaned.take(codes, allow_fill=True), index=s.index, name=s.name)
+
+
+# Define uma função que remove espaços extras das colunas de texto informadas
+def clean_text(df: pd.DataFrame, columns, collapse_spaces=True, workers=1, casefold=False, strip_accents=False,
+               na_tokens=None) -> pd.DataFrame:
+    """Com workers > 1 as colunas são limpas em paralelo (ver parallel.map_columns), sempre em threads: limpar os
+    valores distintos custa menos do que copiar a coluna para outro processo e o resultado de volta."""
+    # Cópia rasa: as colunas não alteradas continuam compartilhando memória com o original
+    out = df.copy(deep=False)
+    # Limpa cada coluna selecionada (em série ou em paralelo)
+    cleaned = map_columns(clean_text_column, [out[c] for c in columns], workers, "thread",
+                          collapse_spaces=collapse_spaces, casefold=casefold, strip_accents=strip_accents,
+                          na_tokens=na_tokens)
+    # Substitui só as colunas limpas na cópia
+    for c, s in zip(columns, cleaned):
+        out[c] = s
+    return out
+
+
+# Define uma função que lista as colunas de texto com poucos valores distintos, a partir do perfil por coluna
+def low_cardinality_columns(df: pd.DataFrame, profile: pd.DataFrame, max_ratio=0.05, max_unique=10_000) -> list:
+    """Candidatas a 'category': colunas de texto com únicos/não nulos <= 'max_ratio' e no máximo 'max_unique' valores."""
+    rows = profile.set_index("coluna")
+    out = []
+    for c in df.columns:
+        if not is_text_dtype(df[c]) or c not in rows.index:
+            continue
+        non_null = df.shape[0] - rows.at[c, "nulos"]
+        unique = rows.at[c, "unicos"]
+        if non_null > 0 and unique <= max_unique and unique / non_null <= max_ratio:
+            out.append(c)
+    return out
+
+
+# Define uma função que converte colunas em 'category' (códigos inteiros + lista de valores distintos)
+def categorize(df: pd.DataFrame, columns) -> pd.DataFrame:
+    # Cópia rasa para não alterar o DataFrame recebido
+    out = df.copy(deep=False)
+    for c in columns:
+        if c in out.columns and not is_categorical(out[c]):
+            out[c] = out[c].astype("category")
+    return out
+
+
+# Define uma função que decide e aplica o tipo de uma coluna de texto (número, data ou nenhum)
+def infer_column_type(s: pd.Series, convert_numbers=True, convert_dates=True, threshold=0.7,
+                       decimal=".", downcast=True, allow_float32=False):
+    """Retorna (tipo, coluna convertida, detalhes) ou None se a coluna continua texto."""
+    # Número de valores não nulos na coluna original
+    non_null = s.notna().sum()
+    # Tenta converter para número
+    if convert_numbers:
+        # Testa uma amostra primeiro: texto livre é rejeitado sem converter a coluna inteira
+        dec, thousands, share = infer_number_format(s, decimal)
+        if share >= threshold:
+            # Converte a coluna inteira com os separadores detectados
+            conv = coerce_numeric(s, dec, thousands)
+            # Converte se pelo menos 'threshold' dos valores não nulos viraram números
+            if non_null > 0 and conv.notna().sum() / non_null >= threshold:
+                # Usa o dtype mais estreito que representa os valores (ex: int32, Int64 com nulos)
+                conv = narrow_numeric(conv, allow_float32) if downcast else conv
+                return "numeric", conv, {"decimal": dec, "thousands": thousands}
+    # Se não virou número, tenta converter para data
+    if convert_dates:
+        # Escolhe os formatos a partir de uma amostra (vetorizado, com cache por coluna)
+        fmt, share = infer_datetime_format(s)
+        if share >= threshold:
+            # Converte a coluna inteira de forma vetorizada com os formatos escolhidos
+            dt = to_datetime_safe(s, format=fmt)
+            # Converte se pelo menos 'threshold' dos valores não nulos viraram datas
+            if dt.notna().sum() >= threshold * non_null:
+                # Registra os formatos usados e a fração da coluna convertida
+                return "datetime", dt, {"format": fmt, "parsed": float(dt.notna().sum() / non_null)}
+    return None
+
+
+# Define uma função que converte colunas de texto que parecem números/datas
+def auto_types(df: pd.DataFrame, convert_numbers=True, convert_dates=True, threshold=0.7,
+               decimal=".", downcast=True, allow_float32=False, workers=1):
+    """Retorna o novo DataFrame, um dicionário {coluna: "numeric" | "datetime"} com o que foi convertido,
+    os formatos de data usados ({coluna: {"format": [...], "parsed": fração convertida}})
+    e os separadores dos números ({coluna: {"decimal": ..., "thousands": ...}}).
+
+    Com workers > 1 as colunas são tipadas em paralelo (ver parallel.map_columns)."""
+    # Cópia rasa para não alterar o DataFrame recebido
+    out = df.copy(deep=False)
+    # Registra as colunas convertidas e o tipo escolhido, os formatos de data e os separadores dos números
+    converted, formats, number_formats = {}, {}, {}
+    if not (convert_numbers or convert_dates):
+        return out, converted, formats, number_formats
+
+    # Só as colunas de texto são candidatas (as demais nem vão para os workers)
+    text_cols = [c for c in out.columns if is_text_dtype(out[c])]
+    results = map_columns(infer_column_type, [out[c] for c in text_cols], workers,
+                          convert_numbers=convert_numbers, convert_dates=convert_dates, threshold=threshold,
+                          decimal=decimal, downcast=downcast, allow_float32=allow_float32)
+    # Substitui só as colunas convertidas na cópia
+    for c, result in zip(text_cols, results):
+        if result is None:
+            continue
+        kind, out[c], details = result
+        converted[c] = kind
+        (number_formats if kind == "numeric" else formats)[c] = details
+
+    return out, converted, formats, number_formats
+
+
+# Define uma função que converte uma coluna de texto para um tipo já decidido
+def _apply_column_type(s: pd.Series, kind: str, fmt=None, seps=None) -> pd.Series:
+    # Converte conforme o tipo decidido, com os separadores/formatos escolhidos para o arquivo inteiro
+    if kind == "numeric":
+        seps = seps or {}
+        return coerce_numeric(s, seps.get("decimal"), seps.get("thousands"))
+    return to_datetime_safe(s, format=fmt)
+
+
+# Define uma função que aplica tipos já decididos (ex: no modo streaming) sem refazer a inferência
+def apply_types(df: pd.DataFrame, types: dict, formats=None, number_formats=None, workers=1) -> pd.DataFrame:
+    # Cópia rasa para não alterar o DataFrame recebido
+    out = df.copy(deep=False)
+    # Ignora colunas ausentes ou que já não são texto neste bloco
+    cols = [c for c in types if c in out.columns and is_text_dtype(out[c])]
+    # Cada coluna tem o próprio tipo, formato de data e separadores
+    results = map_columns(_apply_column_type, [out[c] for c in cols], workers, per_column=[
+        (types[c], (formats or {}).get(c), (number_formats or {}).get(c)) for c in cols
+    ])
+    for c, s in zip(cols, results):
+        out[c] = s
+    return out
+
+
+# Define uma função que remove linhas duplicadas (na linha inteira ou só nas colunas-chave)
+def drop_duplicates(df: pd.DataFrame, keep="first", subset=None, fingerprints=None) -> pd.DataFrame:
+    """'fingerprints' permite reaproveitar os hashes das linhas já calculados (ex: pela contagem de duplicadas)."""
+    # Um hash de 64 bits por linha substitui a comparação coluna a coluna
+    if fingerprints is None:
+        fingerprints = row_fingerprints(df, subset)
+    # Remove as linhas duplicadas, mantendo a ocorrência especificada
+    return df[~duplicated_hashes(fingerprints, keep)]
+
+
+# Define uma função que calcula o valor de preenchimento de uma coluna para uma estratégia
+def na_fill_value(series: pd.Series, strategy: str):
+    # Preenchimentos constantes
+    if strategy == "zero":
+        return 0
+    if strategy == "unknown":
+        return "DESCONHECIDO"
+    # Estatísticas numéricas
+    if strategy == "mean":
+        return series.mean()
+    if strategy == "median":
+        return series.median()
+    # Moda (valor mais frequente); "DESCONHECIDO" se não houver moda
+    if strategy == "mode":
+        moda = series.mode(dropna=True)
+        return moda.iloc[0] if len(moda) else "DESCONHECIDO"
+    # Datas mínima/máxima; None quando a coluna só tem nulos (nada a preencher)
+    if strategy in ("min", "max"):
+        if series.dropna().empty:
+            return None
+        return series.min() if strategy == "min" else series.max()
+    raise ValueError(f"Estratégia de preenchimento desconhecida: {strategy}")
+
+
+# Define uma função que preenche os nulos de várias colunas com uma estratégia
+def fillna_columns(df: pd.DataFrame, columns, strategy: str, values=None) -> pd.DataFrame:
+    """'values' permite informar valores já calculados (ex: média do arquivo inteiro no modo streaming)."""
+    # Cópia rasa para não alterar o DataFrame recebido
+    out = df.copy(deep=False)
+    for c in columns:
+        # Usa o valor pré-calculado, se houver; senão calcula a partir da própria coluna
+        fill = values[c] if values is not None else na_fill_value(out[c], strategy)
+        # None indica que não há valor para preencher
+        if fill is None:
+            continue
+        # Colunas inteiras (ex: Int64 da tipagem) viram float64 se o valor de preenchimento não for inteiro
+        if pd.api.types.is_integer_dtype(out[c]) and isinstance(fill, float) and not float(fill).is_integer():
+            out[c] = out[c].astype("float64")
+        # Colunas categóricas só aceitam valores que já são categorias (ex: "DESCONHECIDO")
+        if is_categorical(out[c]) and fill not in out[c].cat.categories:
+            out[c] = out[c].cat.add_categories([fill])
+        out[c] = out[c].fillna(fill)
+    return out
+
+
+# Define uma função que aplica as estratégias de nulos por grupo (numéricas, categóricas, datas)
+def fill_na(df: pd.DataFrame, numeric=None, categorical=None, datetime=None) -> pd.DataFrame:
+    """Cada grupo é um dicionário {"strategy": ..., "columns": [...]}; "drop" remove as linhas com NA."""
+    # Aplica os grupos na mesma ordem da interface: numéricas, categóricas e datas
+    for step in expand_step({"op": "fill_na", "numeric": numeric, "categorical": categorical, "datetime": datetime}):
+        if step["op"] == "dropna":
+            # Remove linhas onde as colunas selecionadas têm valores nulos
+            df = df.dropna(subset=step["columns"])
+        else:
+            # Preenche os nulos das colunas selecionadas
+            df = fillna_columns(df, step["columns"], step["strategy"])
+    return df
+
+
+# Linhas entregues por vez ao sketch KLL nos quartis aproximados (a coluna nunca é ordenada inteira)
+SKETCH_BLOCK_ROWS = 1_000_000
+
+
+# Define uma função que calcula Q1 e Q3 de várias colunas (exatos numa chamada só, ou aproximados via KLL)
+def quartiles(df: pd.DataFrame, columns, approx=False) -> dict:
+    """Retorna {coluna: (q1, q3)}. Exatos: um único quantile([.25, .75]) sobre as colunas escolhidas
+    (uma partição por coluna para os dois quartis). Aproximados: cada coluna passa em blocos por um sketch KLL."""
+    columns = list(columns)
+    if not columns:
+        return {}
+    if approx:
+        result = {}
+        for c in columns:
+            sketch = KLLSketch()
+            for start in range(0, df.shape[0], SKETCH_BLOCK_ROWS):
+                sketch.update(df[c].iloc[start:start + SKETCH_BLOCK_ROWS])
+            result[c] = (sketch.quantile(0.25), sketch.quantile(0.75))
+        return result
+    q = df[columns].quantile([0.25, 0.75])
+    return {c: (q[c].iloc[0], q[c].iloc[1]) for c in columns}
+
+
+# Define uma função que calcula os limites IQR (Q1 - k*IQR, Q3 + k*IQR) de cada coluna
+def iqr_bounds(df: pd.DataFrame, columns, factor=1.5, approx=False, quartiles_=None) -> dict:
+    """'quartiles_' permite informar os quartis já calculados (ex: em cache, ao mover o fator na prévia)."""
+    quart = quartiles_ if quartiles_ is not None else quartiles(df, columns, approx)
+    # Limites inferior e superior a partir do intervalo interquartil (IQR)
+    return {c: (q1 - factor * (q3 - q1), q3 + factor * (q3 - q1)) for c, (q1, q3) in quart.items() if c in columns}
+
+
+# Define uma função que marca, para cada coluna, as linhas fora dos limites (matriz linhas x colunas; nulos não contam)
+def outlier_flags(df: pd.DataFrame, columns, bounds: dict) -> np.ndarray:
+    flags = np.zeros((df.shape[0], len(columns)), dtype=bool)
+    for j, c in enumerate(columns):
+        low, high = bounds[c]
+        s = df[c]
+        if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+            # Comparação vetorizada direto no array (NaN nunca é outlier)
+            values = s.to_numpy(dtype="float64", na_value=np.nan)
+            flags[:, j] = (values < low) | (values > high)
+        else:
+            flags[:, j] = ~(s.between(low, high) | s.isna()).to_numpy(dtype=bool)
+    return flags
+
+
+# Define uma função que remove linhas com outliers segundo os limites IQR
+def remove_outliers_iqr(df: pd.DataFrame, columns, factor=1.5, bounds=None, approx=False) -> pd.DataFrame:
+    """'bounds' permite usar limites já calculados (ex: quartis do arquivo inteiro no modo streaming)."""
+    # Calcula os limites a partir do próprio DataFrame, se não foram informados
+    if bounds is None:
+        bounds = iqr_bounds(df, columns, factor, approx)
+    # Mantém as linhas sem outlier em nenhuma das colunas (nulos são mantidos)
+    return df[~outlier_flags(df, columns, bounds).any(axis=1)]
+
+
+# Define uma função que remove colunas
+def drop_columns(df: pd.DataFrame, columns) -> pd.DataFrame:
+    # errors="ignore" evita erro se alguma coluna não existir
+    return df.drop(columns=columns, errors="ignore")
+
+
+# Define uma função que quebra uma etapa em operações atômicas (usada pelo modo streaming)
+def expand_step(spec: dict) -> list:
+    # Só o tratamento de nulos combina várias operações; as demais etapas já são atômicas
+    if spec["op"] != "fill_na":
+        return [spec]
+    steps = []
+    # Mantém a ordem da interface: numéricas, categóricas e datas
+    for group in ("numeric", "categorical", "datetime"):
+        opts = spec.get(group) or {}
+        strategy, columns = opts.get("strategy", "keep"), list(opts.get("columns") or [])
+        # "keep" (não mexer) ou nenhuma coluna selecionada: nada a fazer
+        if strategy == "keep" or not columns:
+            continue
+        if strategy == "drop":
+            steps.append({"op": "dropna", "columns": columns})
+        else:
+            steps.append({"op": "fillna", "strategy": strategy, "columns": columns})
+    return steps
+
+
+# Define uma função que aplica uma etapa descrita por um spec e retorna (DataFrame, informações)
+def apply_step(df: pd.DataFrame, spec: dict, fingerprints=None, workers=1):
+    """'fingerprints' são os hashes das linhas (ou das colunas-chave) já calculados para a remoção de duplicadas;
+    'workers' é o número de colunas processadas em paralelo nas etapas por coluna (texto e tipagem)."""
+    # Nome da operação
+    op = spec["op"]
+    # Número de linhas antes da etapa, para informar quantas foram removidas
+    before = df.shape[0]
+    # Informações devolvidas para a interface/log
+    info = {}
+    if op == "standardize_colnames":
+        df = standardize_colnames(df)
+    elif op == "clean_text":
+        opts = text_options(spec)
+        df = clean_text(df, spec["columns"], opts.pop("collapse_spaces"), workers, **opts)
+    elif op == "auto_types":
+        df, info["converted"], info["datetime_formats"], info["number_formats"] = auto_types(
+            df, spec.get("convert_numbers", True), spec.get("convert_dates", True), spec.get("threshold", 0.7),
+            spec.get("decimal", "."), spec.get("downcast", True), spec.get("allow_float32", False), workers)
+    elif op == "drop_duplicates":
+        df = drop_duplicates(df, spec.get("keep", "first"), spec.get("subset"), fingerprints)
+    elif op == "fill_na":
+        df = fill_na(df, spec.get("numeric"), spec.get("categorical"), spec.get("datetime"))
+    elif op == "dropna":
+        df = df.dropna(subset=spec["columns"])
+    elif op == "fillna":
+        df = fillna_columns(df, spec["columns"], spec["strategy"])
+    elif op == "remove_outliers":
+        df = remove_outliers_iqr(df, spec["columns"], spec.get("factor", 1.5), approx=spec.get("approx", False))
+    elif op == "drop_columns":
+        df = drop_columns(df, spec["columns"])
+    elif op == "categorize":
+        df = categorize(df, spec["columns"])
+    else:
+        raise ValueError(f"Etapa desconhecida: {op}")
+    # Linhas removidas pela etapa
+    info["removed"] = before - df.shape[0]
+    return df, info
@@ -0,0 +1 @@
+# Configuração do pytest: os testes em tests/ importam os módulos da raiz do projeto (cleaning, batch...)
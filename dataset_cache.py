@@ -0,0 +1,179 @@
+# Cache em disco dos datasets lidos: chave = hash do conteúdo enviado + opções de leitura; valor = arquivo Arrow IPC
+
+# Importa o módulo contextlib para ignorar arquivos que sumiram durante a limpeza
+import contextlib
+# Importa o módulo hashlib para o hash do conteúdo (BLAKE2b)
+import hashlib
+# Importa o módulo json para a chave das opções e os metadados de cada entrada
+import json
+# Importa o módulo os para tamanhos, datas de acesso e remoção dos arquivos
+import os
+# Importa o módulo tempfile para gravar cada entrada antes de publicá-la
+import tempfile
+
+# Importa a biblioteca numpy para os nulos das colunas de objetos
+import numpy as np
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+
+# PyArrow é opcional: sem ele o cache fica desligado
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+
+# Versão do formato das entradas: mudar o formato (ou a leitura) invalida o cache antigo
+CACHE_FORMAT_VERSION = 1
+# Pasta padrão do cache (persiste entre reinícios do servidor); pode ser trocada pela variável de ambiente
+DEFAULT_CACHE_DIR = os.environ.get("CSV_CLEANER_CACHE_DIR",
+                                   os.path.join(os.path.expanduser("~"), ".cache", "csv_cleaner", "datasets"))
+# Tamanho máximo padrão do cache em disco
+DEFAULT_CACHE_MB = 2048
+# Extensões dos arquivos de cada entrada: dados (Arrow IPC sem compressão, mapeável em memória) e metadados
+DATA_EXT, META_EXT = ".arrow", ".json"
+
+
+# Define a classe do cache de datasets em disco, com limite de tamanho e descarte do menos usado (LRU)
+class DatasetCache:
+    """Cada entrada guarda o DataFrame lido (com os dtypes, via metadados do pandas no Arrow) e os metadados
+    da leitura (encoding e dialeto detectados, opções resolvidas, relatório do lote...).
+
+    Um acerto não repete detecção de encoding, detecção de dialeto nem a leitura do CSV: o arquivo Arrow é
+    mapeado em memória e só as colunas que não são Arrow (objetos Python, categorias...) são convertidas.
+    O último acesso é a data de modificação dos arquivos: ao passar do limite, saem as entradas mais antigas.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_mb=DEFAULT_CACHE_MB):
+        self.directory = directory
+        self.max_bytes = int(max_mb * 2**20)
+
+    @property
+    def enabled(self) -> bool:
+        return pa is not None and self.max_bytes > 0
+
+    @staticmethod
+    def key(parts, settings: dict) -> str:
+        """Hash BLAKE2b (128 bits) dos bytes enviados, na ordem, e das opções de leitura que mudam o resultado."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(json.dumps({"v": CACHE_FORMAT_VERSION, **settings}, sort_keys=True, default=str).encode())
+        for part in parts:
+            # O tamanho separa as partes: ("ab", "c") e ("a", "bc") não colidem
+            h.update(len(part).to_bytes(8, "little"))
+            h.update(part)
+        return h.hexdigest()
+
+    def _paths(self, key: str):
+        return os.path.join(self.directory, key + DATA_EXT), os.path.join(self.directory, key + META_EXT)
+
+    def get(self, key: str):
+        """Retorna (DataFrame, metadados) ou None se a chave não está no cache."""
+        if not self.enabled:
+            return None
+        data_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            # Mapeado em memória: as páginas do arquivo são lidas sob demanda, sem cópia para colunas Arrow
+            table = pa.ipc.open_file(pa.memory_map(data_path)).read_all()
+        except (OSError, ValueError, pa.ArrowException):
+            return None
+        # Os metadados do pandas no arquivo restauram os dtypes; dataset lido com o PyArrow volta todo em ArrowDtype
+        # (sem conversão), menos as categorias, que voltam categóricas
+        mapper = (lambda t: None if pa.types.is_dictionary(t) else pd.ArrowDtype(t)) if meta.get("arrow") else None
+        df = table.to_pandas(types_mapper=mapper)
+        # Em colunas de objetos o Arrow devolve None nos nulos; a leitura do CSV usa NaN
+        for c in df.columns[(df.dtypes == object).to_numpy()]:
+            if df[c].hasnans:
+                df[c] = df[c].where(df[c].notna(), np.nan)
+        # Acesso recente: a entrada vai para o fim da fila de descarte
+        for path in (data_path, meta_path):
+            with contextlib.suppress(OSError):
+                os.utime(path)
+        return df, meta["meta"]
+
+    def put(self, key: str, df: pd.DataFrame, meta: dict) -> bool:
+        """Grava a entrada (de forma atômica) e descarta as mais antigas se o limite for ultrapassado.
+        Retorna False se o DataFrame não pôde ser convertido para Arrow ou não cabe no limite."""
+        if not self.enabled:
+            return False
+        os.makedirs(self.directory, exist_ok=True)
+        data_path, meta_path = self._paths(key)
+        try:
+            table = pa.Table.from_pandas(df)
+        except (pa.ArrowException, TypeError, ValueError):
+            # Ex: coluna de objetos com tipos misturados que o Arrow não representa
+            return False
+        if table.nbytes > self.max_bytes:
+            return False
+        # Grava em arquivos temporários na mesma pasta e publica com os.replace: leitores nunca veem meia entrada
+        tmp_data = self._temp_path()
+        try:
+            feather.write_feather(table, tmp_data, compression="uncompressed")
+            tmp_meta = self._temp_path()
+            with open(tmp_meta, "w", encoding="utf-8") as f:
+                json.dump({"arrow": _all_arrow(df), "meta": meta}, f, ensure_ascii=False, default=str)
+            os.replace(tmp_data, data_path)
+            os.replace(tmp_meta, meta_path)
+        except OSError:
+            for path in (tmp_data, locals().get("tmp_meta")):
+                if path:
+                    self._remove(path)
+            return False
+        self.evict()
+        return True
+
+    def _temp_path(self) -> str:
+        fd, path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        os.close(fd)
+        return path
+
+    def entries(self) -> list:
+        """Lista [(chave, bytes, último acesso)] das entradas, da mais antiga para a mais recente."""
+        if not os.path.isdir(self.directory):
+            return []
+        out = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(DATA_EXT):
+                continue
+            key = name[: -len(DATA_EXT)]
+            try:
+                size = sum(os.path.getsize(p) for p in self._paths(key))
+                atime = os.path.getmtime(self._paths(key)[0])
+            except OSError:
+                continue
+            out.append((key, size, atime))
+        return sorted(out, key=lambda e: e[2])
+
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        # Remove as entradas menos usadas até o total caber no limite
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for key, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            self.remove(key)
+            total -= size
+
+    def remove(self, key: str):
+        for path in self._paths(key):
+            self._remove(path)
+
+    def clear(self):
+        for key, _, _ in self.entries():
+            self.remove(key)
+
+    @staticmethod
+    def _remove(path):
+        # Arquivo já apagado (ou ainda mapeado por outro leitor, no Windows): fica para a próxima limpeza
+        with contextlib.suppress(OSError):
+            os.remove(path)
+
+
+# Define uma função que diz se todas as colunas (fora as categóricas) estão em memória Arrow (leitura com o PyArrow)
+def _all_arrow(df: pd.DataFrame) -> bool:
+    dtypes = [d for d in df.dtypes if not isinstance(d, pd.CategoricalDtype)]
+    return bool(dtypes) and all(isinstance(d, pd.ArrowDtype) for d in dtypes)
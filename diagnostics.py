@@ -0,0 +1,182 @@
+# Cache dos diagnósticos do dataset (resumo por coluna, nulos, duplicadas), chaveado pela versão do DataFrame
+
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+
+# Importa o resumo por coluna
+from cleaning import df_info_summary, quartiles
+# Importa os hashes de linha e a marcação de duplicadas
+from fingerprints import duplicated_hashes, row_fingerprints
+# Importa a ordem das colunas do perfil
+from profiling import PROFILE_COLUMNS
+
+
+# Define a classe que guarda os diagnósticos da versão atual e os atualiza incrementalmente a cada etapa
+class DiagnosticsCache:
+    """Cada etapa aplicada incrementa a versão do DataFrame; os diagnósticos só são recalculados quando a versão muda.
+
+    Quando a etapa é conhecida, o cache é atualizado em vez de descartado: remover colunas só apaga
+    as linhas do resumo, renomear só troca os nomes, limpar texto recalcula apenas as colunas tocadas.
+    """
+
+    def __init__(self, approx_distinct=False, workers=1):
+        # Opções do perfil: contagem aproximada de únicos e número de threads
+        self.approx_distinct = approx_distinct
+        self.workers = workers
+        # Versão do DataFrame a que o cache se refere (None = vazio)
+        self.version = None
+        # Linhas do resumo por coluna: {coluna: {"dtype": ..., "nulos": ..., "percent_nulos": ..., "unicos": ...}}
+        self.rows = {}
+        # Colunas cujo resumo precisa ser recalculado por inteiro
+        self.dirty = set()
+        # Colunas em que só as contagens de nulos precisam ser recalculadas
+        self.nulls_dirty = set()
+        # Número de linhas duplicadas (None = desconhecido)
+        self.duplicates = None
+        # Hashes de 64 bits das linhas por conjunto de colunas-chave ({None: linha inteira, ("a", "b"): ...})
+        self.fingerprints = {}
+        # Quartis (Q1, Q3) por coluna, exatos ou aproximados: {(coluna, aproximado): (q1, q3)}
+        self.quartiles = {}
+
+    def configure(self, approx_distinct: bool, workers: int):
+        # Mudar as opções do perfil invalida o resumo já calculado
+        if (approx_distinct, workers) != (self.approx_distinct, self.workers):
+            self.__init__(approx_distinct, workers)
+
+    def _reset(self, version):
+        # Descarta tudo, mantendo as opções do perfil
+        self.__init__(self.approx_distinct, self.workers)
+        self.version = version
+
+    def _sync(self, df: pd.DataFrame, version):
+        # Versão diferente da conhecida (ex: desfazer, novo arquivo): descarta tudo
+        if version != self.version:
+            self._reset(version)
+        # Colunas sem linha no resumo também precisam ser calculadas
+        self.dirty |= set(df.columns) - set(self.rows)
+
+    def summary(self, df: pd.DataFrame, version) -> pd.DataFrame:
+        self._sync(df, version)
+        # Recalcula por inteiro só as colunas marcadas
+        if self.dirty:
+            cols = [c for c in df.columns if c in self.dirty]
+            part = df_info_summary(df[cols], self.approx_distinct, self.workers).set_index("coluna")
+            self.rows.update({c: part.loc[c].to_dict() for c in cols})
+            self.nulls_dirty -= self.dirty
+            self.dirty = set()
+        # Recalcula só nulos e memória onde únicos e mín/máx não mudaram (ex: após remover duplicadas)
+        if self.nulls_dirty:
+            for c in self.nulls_dirty & set(df.columns):
+                na = df[c].isna()
+                self.rows[c].update(nulos=int(na.sum()), percent_nulos=float(na.mean() * 100),
+                                    memoria_mb=df[c].memory_usage(deep=True, index=False) / 2**20)
+            self.nulls_dirty = set()
+        # Monta o resumo na ordem atual das colunas
+        return pd.DataFrame([{"coluna": c, **self.rows[c]} for c in df.columns], columns=PROFILE_COLUMNS)
+
+    def null_total(self, df: pd.DataFrame, version) -> int:
+        # O total de células nulas sai do próprio resumo por coluna
+        return int(self.summary(df, version)["nulos"].sum())
+
+    def row_fingerprints(self, df: pd.DataFrame, version, subset=None):
+        """Hashes das linhas (ou das colunas-chave) da versão atual, calculados uma vez e reaproveitados
+        pela contagem e pela remoção de duplicadas."""
+        self._sync(df, version)
+        key = tuple(subset) if subset else None
+        if key not in self.fingerprints:
+            # Guarda a linha inteira e no máximo um conjunto de colunas-chave (8 bytes por linha cada)
+            for k in [k for k in self.fingerprints if k is not None]:
+                del self.fingerprints[k]
+            self.fingerprints[key] = row_fingerprints(df, subset)
+        return self.fingerprints[key]
+
+    def duplicate_count(self, df: pd.DataFrame, version, subset=None) -> int:
+        self._sync(df, version)
+        # Colunas-chave: conta sobre os hashes em cache dessas colunas
+        if subset:
+            return int(duplicated_hashes(self.row_fingerprints(df, version, subset)).sum())
+        # Só conta as duplicadas da linha inteira se a contagem não está no cache
+        if self.duplicates is None:
+            self.duplicates = int(duplicated_hashes(self.row_fingerprints(df, version)).sum())
+        return self.duplicates
+
+    def column_quartiles(self, df: pd.DataFrame, version, columns, approx=False) -> dict:
+        """Q1 e Q3 das colunas na versão atual: mover o fator do IQR só refaz as comparações, não os quartis."""
+        self._sync(df, version)
+        missing = [c for c in columns if (c, approx) not in self.quartiles]
+        if missing:
+            # Todas as colunas que faltam numa só chamada
+            for c, q in quartiles(df, missing, approx).items():
+                self.quartiles[(c, approx)] = q
+        return {c: self.quartiles[(c, approx)] for c in columns}
+
+    def advance(self, before: pd.DataFrame, after: pd.DataFrame, spec: dict, info: dict, version):
+        """Atualiza o cache para a nova versão a partir da etapa aplicada, sem recalcular o que não mudou."""
+        # Sem cache da versão imediatamente anterior não há o que aproveitar
+        if self.version is None or self.version != version - 1:
+            self._reset(version)
+            return
+        op = spec["op"]
+        removed = info.get("removed", 0)
+        # Plano executado de uma vez: várias etapas combinadas, recalcula tudo
+        if op == "plan":
+            self._reset(version)
+            return
+        if op == "standardize_colnames":
+            # Só os nomes mudam: renomeia as linhas do resumo
+            mapping = dict(zip(before.columns, after.columns))
+            self.rows = {mapping[c]: r for c, r in self.rows.items() if c in mapping}
+            self.dirty = {mapping.get(c, c) for c in self.dirty}
+            self.nulls_dirty = {mapping.get(c, c) for c in self.nulls_dirty}
+            self.quartiles = {(mapping[c], a): q for (c, a), q in self.quartiles.items() if c in mapping}
+        elif op == "drop_columns":
+            # Remove as linhas das colunas apagadas; menos colunas podem gerar novas duplicadas
+            for c in spec["columns"]:
+                self.rows.pop(c, None)
+            self.duplicates = None
+        elif op == "categorize":
+            # Mesmos valores em outro armazenamento: muda dtype e memória, as duplicadas continuam as mesmas
+            self.dirty |= set(spec["columns"]) & set(after.columns)
+        elif op == "drop_duplicates":
+            if spec.get("subset"):
+                # Linhas com valores diferentes fora das colunas-chave também saem: todas as colunas mudam
+                self.dirty |= set(after.columns)
+            else:
+                # Remover linhas idênticas não muda os valores únicos nem mín/máx de nenhuma coluna, só nulos e memória
+                self.nulls_dirty |= set(after.columns)
+            # Sem duplicadas nas colunas-chave, também não há linhas inteiras duplicadas
+            self.duplicates = 0
+        elif removed:
+            # Etapas que removem linhas mudam todas as colunas
+            self.dirty |= set(after.columns)
+            self.duplicates = None
+        else:
+            # Etapas por coluna: recalcula só as colunas tocadas (nenhuma tocada = nada mudou)
+            touched = touched_columns(spec, info)
+            self.dirty |= touched
+            if touched:
+                self.duplicates = None
+        # Os hashes das linhas se referem à versão anterior
+        self.fingerprints = {}
+        # Quartis só continuam valendo nas colunas cujos valores e linhas não mudaram
+        stale = self.dirty | self.nulls_dirty
+        self.quartiles = {(c, a): q for (c, a), q in self.quartiles.items() if c in after.columns and c not in stale}
+        self.version = version
+
+
+# Define uma função que lista as colunas cujos valores uma etapa pode ter alterado
+def touched_columns(spec: dict, info: dict) -> set:
+    op = spec["op"]
+    if op in ("clean_text", "categorize"):
+        return set(spec["columns"])
+    if op == "auto_types":
+        return set(info.get("converted", {}))
+    if op in ("fillna", "dropna"):
+        return set(spec["columns"])
+    if op == "fill_na":
+        return {c for g in ("numeric", "categorical", "datetime") for c in ((spec.get(g) or {}).get("columns") or [])}
+    if op == "plan":
+        # Plano executado de uma vez: junta as colunas de cada etapa (as convertidas vêm das informações do plano)
+        return set().union(*(touched_columns(s, info) for s in spec["steps"]))
+    # Etapas sem efeito por coluna (ex: outliers sem linhas removidas)
+    return set()
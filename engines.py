@@ -0,0 +1,397 @@
+# Motores de execução das etapas: pandas (padrão) e Polars (opcional, multithread e colunar)
+
+# Importa a biblioteca numpy para as máscaras de linhas
+import numpy as np
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+
+# Polars é opcional: sem ele só o motor pandas fica disponível
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+# Importa as etapas em pandas (o motor padrão) e as partes reaproveitadas pelo Polars
+from cleaning import (
+    apply_step,
+    expand_step,
+    fillna_columns,
+    is_categorical,
+    is_text_dtype,
+    remove_outliers_iqr,
+)
+
+
+# Define a classe do motor padrão: as etapas de cleaning.py, em pandas
+class PandasEngine:
+    """Interface dos motores: 'apply_step' recebe e devolve DataFrames do pandas, com as mesmas informações
+    (linhas removidas, colunas convertidas, formatos) e o mesmo resultado de cleaning.apply_step;
+    'run_steps' aplica uma sequência de etapas com o mesmo resultado de chamar 'apply_step' uma a uma."""
+
+    name = "pandas"
+    label = "pandas (padrão)"
+
+    def apply_step(self, df: pd.DataFrame, spec: dict, fingerprints=None, workers=1):
+        return apply_step(df, spec, fingerprints, workers)
+
+    # Etapas que o motor encadeia sem materializar o DataFrame entre elas (o pandas aplica uma a uma)
+    def chains(self, spec: dict) -> bool:
+        return False
+
+    def run_steps(self, df: pd.DataFrame, steps, workers=1):
+        """Aplica as etapas em ordem; retorna o DataFrame final e as informações de cada etapa."""
+        infos = []
+        for spec in steps:
+            df, info = self.apply_step(df, spec, workers=workers)
+            infos.append(info)
+        return df, infos
+
+
+# Define a classe do motor Polars: duplicadas, nulos, IQR e limpeza de texto calculados em Polars
+class PolarsEngine(PandasEngine):
+    """O Polars calcula máscaras de linhas, estatísticas e colunas limpas; o DataFrame continua sendo do pandas
+    (índice, dtypes e demais colunas intactos), então o resultado é o mesmo do motor pandas.
+
+    Etapas só de metadados (nomes, remoção de colunas) e as que dependem de inferência (tipagem, categorias)
+    ficam no pandas, assim como colunas que o Polars não representa igual (categóricas, objetos mistos,
+    datas com fuso); nesses casos a etapa inteira roda no pandas.
+
+    Em 'run_steps', etapas consecutivas que o Polars executa viram um único plano preguiçoso (LazyFrame):
+    as colunas usadas vão para o Polars uma vez, os filtros e preenchimentos se encadeiam lá e só as posições
+    das linhas mantidas e as colunas limpas voltam para o pandas no fim.
+    """
+
+    name = "polars"
+    label = "Polars (multithread)"
+
+    def apply_step(self, df: pd.DataFrame, spec: dict, fingerprints=None, workers=1):
+        op = spec["op"]
+        before = df.shape[0]
+        try:
+            if op == "drop_duplicates":
+                out = self._drop_duplicates(df, spec.get("keep", "first"), spec.get("subset"))
+            elif op == "clean_text" and not any(spec.get(k) for k in ("casefold", "strip_accents", "na_tokens")):
+                out = self._clean_text(df, spec["columns"], spec.get("collapse_spaces", True))
+            elif op in ("fill_na", "dropna", "fillna"):
+                out = df
+                for step in expand_step(spec):
+                    out = self._dropna(out, step["columns"]) if step["op"] == "dropna" else \
+                        self._fillna(out, step["columns"], step["strategy"])
+            elif op == "remove_outliers" and not spec.get("approx"):
+                out = self._remove_outliers(df, spec["columns"], spec.get("factor", 1.5))
+            else:
+                return super().apply_step(df, spec, fingerprints, workers)
+        except _Unsupported:
+            return super().apply_step(df, spec, fingerprints, workers)
+        return out, {"removed": before - out.shape[0]}
+
+    def chains(self, spec: dict) -> bool:
+        op = spec["op"]
+        if op == "clean_text":
+            return not any(spec.get(k) for k in ("casefold", "strip_accents", "na_tokens"))
+        if op == "remove_outliers":
+            return not spec.get("approx")
+        return op in ("drop_duplicates", "fill_na", "dropna", "fillna", "drop_columns")
+
+    def run_steps(self, df: pd.DataFrame, steps, workers=1):
+        steps = list(steps)
+        infos = []
+        pos = 0
+        while pos < len(steps):
+            # Maior trecho de etapas encadeáveis a partir daqui (uma etapa sozinha roda em apply_step)
+            end = pos
+            while end < len(steps) and self.chains(steps[end]):
+                end += 1
+            end = max(end, pos + 1)
+            batch = steps[pos:end]
+            try:
+                if len(batch) < 2:
+                    raise _Unsupported
+                df, batch_infos = _run_lazy(df, batch)
+            except _Unsupported:
+                # Alguma coluna não tem tradução fiel: o trecho roda etapa a etapa
+                batch_infos = []
+                for spec in batch:
+                    df, info = self.apply_step(df, spec, workers=workers)
+                    batch_infos.append(info)
+            infos += batch_infos
+            pos = end
+        return df, infos
+
+    # Duplicadas: máscara "primeira/última ocorrência" calculada pelo Polars sobre as colunas (ou colunas-chave)
+    def _drop_duplicates(self, df, keep, subset):
+        frame = _to_polars(df, subset or list(df.columns))
+        row = pl.struct(pl.all())
+        expr = row.is_first_distinct() if keep == "first" else row.is_last_distinct() if keep == "last" \
+            else ~row.is_duplicated()
+        return df[frame.select(expr).to_series().to_numpy()]
+
+    # Nulos: mantém as linhas sem nulos nas colunas informadas
+    def _dropna(self, df, columns):
+        frame = _to_polars(df, columns)
+        return df[frame.select(pl.all_horizontal(pl.all().is_not_null())).to_series().to_numpy()]
+
+    # Preenchimento: a estatística de cada coluna vem do Polars; o preenchimento é o mesmo do pandas
+    def _fillna(self, df, columns, strategy):
+        frame = _to_polars(df, columns)
+        values = {c: _fill_value(frame[c], strategy) for c in columns}
+        return fillna_columns(df, columns, strategy, values)
+
+    # Outliers: quartis calculados pelo Polars, filtro igual ao do pandas
+    # (quartis aproximados usam o sketch KLL do pandas)
+    def _remove_outliers(self, df, columns, factor):
+        frame = _to_polars(df, columns)
+        bounds = {}
+        for c in columns:
+            # Quartis de datas (e de outros tipos) ficam no pandas
+            if not frame[c].dtype.is_numeric():
+                raise _Unsupported
+            q1, q3 = frame[c].quantile(0.25, "linear"), frame[c].quantile(0.75, "linear")
+            q1, q3 = (np.nan, np.nan) if q1 is None else (q1, q3)
+            bounds[c] = (q1 - factor * (q3 - q1), q3 + factor * (q3 - q1))
+        return remove_outliers_iqr(df, columns, factor, bounds)
+
+    # Texto: strip e espaços repetidos pelos kernels de string do Polars; a coluna volta no dtype do pandas
+    # (minúsculas, acentos e marcadores de NA ficam na limpeza por valores distintos do pandas)
+    def _clean_text(self, df, columns, collapse_spaces):
+        if any(is_categorical(df[c]) or not is_text_dtype(df[c]) for c in columns):
+            raise _Unsupported
+        frame = _to_polars(df, columns)
+        exprs = [pl.col(c).str.strip_chars() for c in columns]
+        if collapse_spaces:
+            exprs = [e.str.replace_all(r"\s+", " ") for e in exprs]
+        cleaned = frame.select(exprs)
+        out = df.copy(deep=False)
+        for c in columns:
+            # 'object' vira "string" do pandas (como no motor pandas); colunas de string mantêm o armazenamento
+            dtype = "string" if df[c].dtype == object else df[c].dtype
+            s = cleaned[c].to_pandas(use_pyarrow_extension_array=True).astype(dtype)
+            s.index = df.index
+            out[c] = s
+        return out
+
+
+# Exceção interna: a etapa não tem tradução fiel para o Polars e roda no pandas
+class _Unsupported(Exception):
+    pass
+
+
+# Define uma função que converte as colunas informadas para o Polars, ou sinaliza que não dá para converter igual
+def _to_polars(df: pd.DataFrame, columns):
+    for c in columns:
+        s = df[c]
+        # Categóricas, datas com fuso e objetos que não são só texto ficam no pandas
+        if is_categorical(s) or isinstance(s.dtype, pd.DatetimeTZDtype):
+            raise _Unsupported
+        if s.dtype == object and pd.api.types.infer_dtype(s, skipna=True) not in ("string", "empty"):
+            raise _Unsupported
+    try:
+        return pl.from_pandas(df[list(columns)].reset_index(drop=True))
+    except Exception as e:
+        raise _Unsupported from e
+
+
+# Coluna com a posição original de cada linha no plano preguiçoso (volta para o pandas como seleção de linhas)
+ROW_POSITION = "__linha"
+
+
+# Define uma função que executa um trecho de etapas encadeáveis num só plano preguiçoso do Polars
+def _run_lazy(df: pd.DataFrame, specs: list):
+    """Retorna o DataFrame do pandas equivalente a aplicar as etapas uma a uma e as informações de cada etapa.
+    Levanta _Unsupported se alguma coluna não puder ser tratada igual ao pandas."""
+    atoms = [expand_step(spec) for spec in specs]
+    # Colunas usadas pelas etapas (só elas vão para o Polars); coluna inexistente fica para o erro do pandas
+    alive, used = list(df.columns), set()
+    for atom in (a for group in atoms for a in group):
+        if atom["op"] == "drop_columns":
+            alive = [c for c in alive if c not in atom["columns"]]
+            continue
+        columns = atom.get("subset") or (alive if atom["op"] == "drop_duplicates" else atom["columns"])
+        if not set(columns) <= set(alive):
+            raise _Unsupported
+        used.update(columns)
+    if ROW_POSITION in df.columns:
+        raise _Unsupported
+    converted = [c for c in df.columns if c in used]
+    lf = _to_polars(df, converted).with_row_index(ROW_POSITION).lazy()
+
+    # Linhas após cada etapa e valores de preenchimento viajam como colunas constantes até o resultado
+    # (uma coleta só); as mesmas consultas em separado ficam para o caso de não sobrar nenhuma linha
+    extras, queries = [], []
+
+    def carry(lf, exprs, *updates):
+        names = [f"__extra{len(extras) + i}" for i in range(len(exprs))]
+        extras.extend(names)
+        queries.extend(lf.select(e) for e in exprs)
+        return lf.with_columns([e.alias(n) for e, n in zip(exprs, names)] + list(updates)), names
+
+    def collect(lf):
+        try:
+            return lf.collect()
+        except Exception as e:
+            raise _Unsupported from e
+
+    alive, cleaned, fills, counts = list(df.columns), set(), [], []
+    for group in atoms:
+        for atom in group:
+            op = atom["op"]
+            if op == "drop_columns":
+                lf = lf.drop([c for c in atom["columns"] if c in converted and c in alive])
+                alive = [c for c in alive if c not in atom["columns"]]
+            elif op == "drop_duplicates":
+                row = pl.struct(atom.get("subset") or alive)
+                keep = atom.get("keep", "first")
+                lf = lf.filter(row.is_first_distinct() if keep == "first" else row.is_last_distinct() if keep == "last"
+                               else ~row.is_duplicated())
+            elif op == "dropna":
+                lf = lf.filter(pl.all_horizontal([pl.col(c).is_not_null() for c in atom["columns"]]))
+            elif op == "remove_outliers":
+                # Quartis dentro do filtro seriam recalculados a cada comparação: o trecho até aqui é materializado
+                # (continua no Polars) e os limites entram no plano como constantes
+                frame = collect(lf)
+                lf = frame.lazy().filter(~pl.any_horizontal(
+                    [_outlier_expr(frame[c], atom.get("factor", 1.5)) for c in atom["columns"]]))
+            elif op == "fillna":
+                exprs = {c: _fill_expr(lf, df[c], c, atom["strategy"]) for c in atom["columns"]}
+                # Os valores usados também voltam para o preenchimento das colunas que não saem do Polars
+                lf, names = carry(lf, list(exprs.values()), *[pl.col(c).fill_null(e) for c, e in exprs.items()])
+                fills.append((atom, dict(zip(exprs, names))))
+            else:
+                if any(is_categorical(df[c]) or not is_text_dtype(df[c]) for c in atom["columns"]):
+                    raise _Unsupported
+                exprs = [pl.col(c).str.strip_chars() for c in atom["columns"]]
+                if atom.get("collapse_spaces", True):
+                    exprs = [e.str.replace_all(r"\s+", " ") for e in exprs]
+                lf = lf.with_columns(exprs)
+                cleaned.update(atom["columns"])
+        lf, names = carry(lf, [pl.len()])
+        counts.append(names[0])
+    cleaned = [c for c in alive if c in cleaned]
+    final = collect(lf.select([ROW_POSITION] + cleaned + extras))
+    if final.height:
+        extra = {n: final[n][:1] for n in extras}
+    else:
+        try:
+            extra = {n: q.collect().to_series() for n, q in zip(extras, queries)}
+        except Exception as e:
+            raise _Unsupported from e
+
+    out = df.iloc[final[ROW_POSITION].to_numpy()]
+    if len(alive) < df.shape[1]:
+        out = out[alive]
+    else:
+        out = out.copy(deep=False)
+    for c in cleaned:
+        # 'object' vira "string" do pandas (como no motor pandas); colunas de string mantêm o armazenamento
+        dtype = "string" if df[c].dtype == object else df[c].dtype
+        s = final[c].to_pandas(use_pyarrow_extension_array=True).astype(dtype)
+        s.index = out.index
+        out[c] = s
+    # Colunas preenchidas que não foram limpas: o mesmo preenchimento do pandas, com os valores do Polars
+    for atom, names in fills:
+        values = {c: _stat_value(extra[n], atom["strategy"]) for c, n in names.items()}
+        columns = [c for c in atom["columns"] if c in alive and c not in cleaned]
+        out = fillna_columns(out, columns, atom["strategy"], values)
+    infos, before = [], df.shape[0]
+    for n in counts:
+        height = extra[n][0]
+        infos.append({"removed": before - height})
+        before = height
+    return out, infos
+
+
+# Define uma função que monta, em Polars, a expressão "linha fora dos limites IQR" (nulos nunca são outliers)
+def _outlier_expr(s, factor: float):
+    if not s.dtype.is_numeric():
+        raise _Unsupported
+    s = s.cast(pl.Float64)
+    q1, q3 = s.quantile(0.25, "linear"), s.quantile(0.75, "linear")
+    # Coluna só com nulos: sem limites, nenhuma linha é outlier (como os limites NaN do pandas)
+    if q1 is None:
+        return pl.lit(False)
+    v = pl.col(s.name).cast(pl.Float64)
+    return ((v < q1 - factor * (q3 - q1)) | (v > q3 + factor * (q3 - q1))).fill_null(False)
+
+
+# Define uma função que monta, em Polars, o valor de preenchimento de uma coluna (mesma regra de _fill_value)
+def _fill_expr(lf, series: pd.Series, column: str, strategy: str):
+    dtype = lf.collect_schema()[column]
+    numeric, text = dtype.is_numeric(), dtype == pl.String
+    col = pl.col(column)
+    if strategy == "zero" and numeric:
+        return pl.lit(0)
+    if strategy == "unknown" and text:
+        return pl.lit("DESCONHECIDO")
+    if strategy in ("mean", "median") and numeric:
+        return col.mean() if strategy == "mean" else col.median()
+    if strategy in ("min", "max") and (numeric or isinstance(dtype, pl.Datetime)) and not is_categorical(series):
+        return col.min() if strategy == "min" else col.max()
+    if strategy == "mode" and (numeric or text):
+        # Em empate, o menor valor; texto sem moda recebe "DESCONHECIDO" (número sem moda fica no pandas)
+        mode = col.drop_nulls().mode().sort().first()
+        return pl.coalesce(mode, pl.lit("DESCONHECIDO")) if text else mode
+    raise _Unsupported
+
+
+# Define uma função que converte o valor de preenchimento calculado pelo Polars para o preenchimento do pandas
+def _stat_value(values, strategy: str):
+    v = values[0]
+    if isinstance(values.dtype, pl.Datetime):
+        return None if v is None else pd.Timestamp(values.cast(pl.Int64)[0], unit=values.dtype.time_unit)
+    if v is None and strategy == "mode":
+        # Sem moda o pandas preenche "DESCONHECIDO" numa coluna numérica: o trecho roda etapa a etapa
+        raise _Unsupported
+    if v is None and strategy in ("mean", "median"):
+        # Coluna só com nulos: NaN, como no pandas
+        return np.nan
+    return v
+
+
+# Define uma função que calcula, em Polars, o valor de preenchimento com a mesma regra de cleaning.na_fill_value
+def _fill_value(s, strategy: str):
+    if strategy == "zero":
+        return 0
+    if strategy == "unknown":
+        return "DESCONHECIDO"
+    # Datas: a estatística é calculada sobre o inteiro da data (na unidade da coluna) e volta como Timestamp
+    is_dt = isinstance(s.dtype, pl.Datetime)
+    if s.dtype.is_temporal() and not is_dt:
+        raise _Unsupported
+    values = s.cast(pl.Int64) if is_dt else s
+    if strategy in ("mean", "median"):
+        if is_dt:
+            raise _Unsupported
+        v = values.mean() if strategy == "mean" else values.median()
+        # Coluna só com nulos: NaN, como no pandas
+        return np.nan if v is None else v
+    valid = values.drop_nulls()
+    if strategy == "mode":
+        if valid.is_empty():
+            return "DESCONHECIDO"
+        # Em empate, o menor valor (o pandas devolve as modas ordenadas)
+        v = valid.mode().sort()[0]
+    elif strategy in ("min", "max"):
+        if valid.is_empty():
+            return None
+        v = valid.min() if strategy == "min" else valid.max()
+    else:
+        raise ValueError(f"Estratégia de preenchimento desconhecida: {strategy}")
+    return pd.Timestamp(v, unit=s.dtype.time_unit) if is_dt else v
+
+
+# Motores conhecidos, na ordem exibida
+ENGINES = {"pandas": PandasEngine, "polars": PolarsEngine}
+
+
+# Define uma função que lista os motores disponíveis (o Polars só se estiver instalado)
+def available_engines() -> list:
+    return [name for name in ENGINES if name != "polars" or pl is not None]
+
+
+# Define uma função que cria o motor pelo nome
+def get_engine(name="pandas") -> PandasEngine:
+    if name not in ENGINES:
+        raise ValueError(f"Motor desconhecido: {name}")
+    if name not in available_engines():
+        raise RuntimeError("Instale o Polars para usar este motor (pip install polars).")
+    return ENGINES[name]()
@@ -0,0 +1,140 @@
+# Exportação do DataFrame tratado: CSV em blocos (puro, gzip ou zip), Parquet e Feather, gravados em disco
+
+# Importa o módulo contextlib para montar os arquivos de saída como gerenciadores de contexto
+import contextlib
+# Importa o módulo gzip para a saída CSV compactada
+import gzip
+# Importa o módulo io para escrever texto dentro do arquivo zip
+import io
+# Importa o módulo os para apagar exportações antigas
+import os
+# Importa o módulo tempfile para gravar as exportações em disco
+import tempfile
+# Importa o módulo zipfile para a saída CSV dentro de um .zip
+import zipfile
+
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+
+# PyArrow é opcional: sem ele só os formatos CSV ficam disponíveis
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# Formatos de exportação: rótulo na interface, extensão do arquivo, tipo MIME e se é texto (CSV)
+EXPORT_FORMATS = {
+    "csv": {"label": "CSV (Excel, ;)", "ext": ".csv", "mime": "text/csv", "text": True},
+    "csv.gz": {"label": "CSV compactado (gzip)", "ext": ".csv.gz", "mime": "application/gzip", "text": True},
+    "zip": {"label": "CSV compactado (zip)", "ext": ".zip", "mime": "application/zip", "text": True},
+    "parquet": {"label": "Parquet", "ext": ".parquet", "mime": "application/octet-stream", "text": False},
+    "feather": {"label": "Feather (Arrow IPC)", "ext": ".feather", "mime": "application/octet-stream", "text": False},
+}
+
+# Linhas serializadas por vez na saída CSV (o arquivo inteiro nunca fica em memória como texto)
+EXPORT_CHUNK_ROWS = 100_000
+
+
+# Define uma função que lista os formatos disponíveis (Parquet e Feather exigem o PyArrow)
+def available_formats(text_only=False) -> list:
+    return [f for f, meta in EXPORT_FORMATS.items() if (meta["text"] or (pyarrow is not None and not text_only))]
+
+
+# Define uma função que troca a extensão de um nome de arquivo pela do formato escolhido
+def export_filename(name: str, fmt: str) -> str:
+    base = name
+    for meta in EXPORT_FORMATS.values():
+        if base.lower().endswith(meta["ext"]):
+            base = base[: -len(meta["ext"])]
+            break
+    return base + EXPORT_FORMATS[fmt]["ext"]
+
+
+# Define um gerenciador de contexto que abre a saída de texto (CSV) no formato pedido
+@contextlib.contextmanager
+def open_text_output(path, fmt="csv", encoding="utf-8-sig", member="dados_tratados.csv"):
+    """Devolve um arquivo de texto: CSV puro, dentro de um gzip ou como 'member' dentro de um zip."""
+    if fmt == "csv":
+        with open(path, "w", encoding=encoding, newline="") as f:
+            yield f
+    elif fmt == "csv.gz":
+        with gzip.open(path, "wt", encoding=encoding, newline="") as f:
+            yield f
+    elif fmt == "zip":
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            with zf.open(member, "w", force_zip64=True) as raw, io.TextIOWrapper(raw, encoding=encoding, newline="") as f:
+                yield f
+    else:
+        raise ValueError(f"Formato de texto desconhecido: {fmt}")
+
+
+# Define uma função que grava o DataFrame em disco no formato escolhido
+def write_export(df: pd.DataFrame, path, fmt="csv", sep=";", chunk_rows=EXPORT_CHUNK_ROWS, member="dados_tratados.csv"):
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportação desconhecido: {fmt}")
+    if EXPORT_FORMATS[fmt]["text"]:
+        # CSV: o pandas serializa 'chunk_rows' linhas por vez direto no arquivo (sem montar o texto inteiro)
+        with open_text_output(path, fmt, member=member) as f:
+            df.to_csv(f, index=False, sep=sep, chunksize=chunk_rows)
+        return
+    if pyarrow is None:
+        raise RuntimeError("Instale o PyArrow para exportar em Parquet/Feather (pip install pyarrow).")
+    if fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        # Feather exige índice padrão (0..n-1); o índice não faz parte da exportação
+        df.reset_index(drop=True).to_feather(path)
+
+
+# Define a classe que guarda em disco a última exportação de cada formato, chaveada pela versão do DataFrame
+class ExportCache:
+    """O arquivo só é gerado quando pedido e é reaproveitado enquanto a versão do DataFrame não muda;
+    exportações de versões anteriores são apagadas do disco."""
+
+    def __init__(self, tmp_dir=None):
+        self.tmp_dir = tmp_dir
+        # {(versão, formato, separador, nome do CSV dentro do zip): caminho do arquivo}
+        self.files = {}
+
+    def get(self, version, fmt, sep=";", member="dados_tratados.csv"):
+        # Caminho do arquivo já exportado para esta versão/formato/nome interno, ou None
+        return self.files.get((version, fmt, sep, member))
+
+    def build(self, df: pd.DataFrame, version, fmt, sep=";", member="dados_tratados.csv") -> str:
+        path = self.get(version, fmt, sep, member)
+        if path is not None:
+            return path
+        return self.add(self.write(df, fmt, sep, member), version, fmt, sep, member)
+
+    def write(self, df: pd.DataFrame, fmt, sep=";", member="dados_tratados.csv") -> str:
+        """Grava o arquivo sem registrá-lo (ex: numa tarefa em segundo plano, que não mexe na sessão); 'add' o
+        registra. Retorna o caminho do arquivo temporário."""
+        fd, path = tempfile.mkstemp(suffix=EXPORT_FORMATS[fmt]["ext"], dir=self.tmp_dir)
+        os.close(fd)
+        try:
+            write_export(df, path, fmt, sep, member=member)
+        except BaseException:
+            # Erro ou cancelamento no meio da gravação: o arquivo incompleto é apagado
+            self._remove(path)
+            raise
+        return path
+
+    def add(self, path, version, fmt, sep=";", member="dados_tratados.csv") -> str:
+        # Registra um arquivo gravado por 'write' e apaga as exportações de versões anteriores
+        for k in [k for k in self.files if k[0] != version or k == (version, fmt, sep, member)]:
+            old = self.files.pop(k)
+            if old != path:
+                self._remove(old)
+        self.files[(version, fmt, sep, member)] = path
+        return path
+
+    def clear(self):
+        # Apaga todos os arquivos exportados (ex: ao resetar ou carregar outro arquivo)
+        for path in self.files.values():
+            self._remove(path)
+        self.files = {}
+
+    @staticmethod
+    def _remove(path):
+        with contextlib.suppress(OSError):
+            os.remove(path)
@@ -0,0 +1,103 @@
+# Impressões digitais das linhas: um hash de 64 bits por linha, usado para contar e remover duplicadas
+
+# Importa o módulo os para montar os caminhos dos arquivos de partição
+import os
+# Importa o módulo tempfile para gravar as partições em disco
+import tempfile
+
+# Importa a biblioteca numpy para operações numéricas vetorizadas
+import numpy as np
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+
+# Registro gravado em cada partição: hash da linha e posição dela no arquivo
+PARTITION_RECORD = np.dtype([("hash", "<u8"), ("pos", "<i8")])
+
+
+# Define uma função que calcula um hash de 64 bits por linha, estável entre blocos e entre dtypes
+def row_fingerprints(df: pd.DataFrame, subset=None) -> np.ndarray:
+    """'subset' restringe o hash às colunas-chave (None = linha inteira).
+
+    Números são normalizados para float64 (um bloco pode ler a coluna como int e outro como float);
+    texto em 'object', "string", string[pyarrow] ou 'category' gera o mesmo hash para o mesmo valor.
+    """
+    columns = list(subset) if subset else list(df.columns)
+    normalized = [
+        df[c].astype("float64")
+        if pd.api.types.is_numeric_dtype(df[c]) and not pd.api.types.is_bool_dtype(df[c])
+        else df[c]
+        for c in columns
+    ]
+    # Usa posições em vez de nomes para não depender de colunas repetidas
+    frame = pd.DataFrame({i: s.array for i, s in enumerate(normalized)}, index=df.index)
+    # Calcula o hash de cada linha ignorando o índice
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+# Define uma função que marca as linhas cujo hash já apareceu (mesma semântica de DataFrame.duplicated)
+def duplicated_hashes(hashes: np.ndarray, keep="first") -> np.ndarray:
+    # A tabela de hash do pandas sobre uint64 é uma passada só, sem comparar colunas
+    return pd.Series(hashes, copy=False).duplicated(keep=keep).to_numpy()
+
+
+# Define a classe que encontra duplicadas de um arquivo maior que a memória particionando os hashes em disco
+class HashPartitioner:
+    """Cada linha vira um registro (hash, posição) gravado na partição escolhida pelos bits altos do hash.
+
+    Linhas iguais caem sempre na mesma partição, então cada partição é resolvida sozinha na memória
+    (1/partitions dos registros por vez). O resultado é uma máscara de 1 bit por linha com as linhas mantidas.
+    """
+
+    def __init__(self, partitions=64, keep="first", tmp_dir=None):
+        # Número de partições (potência de 2) e bits usados para escolhê-la
+        self.bits = max(int(partitions - 1).bit_length(), 0)
+        self.partitions = 1 << self.bits
+        self.keep = keep
+        # Pasta temporária com um arquivo por partição
+        self._dir = tempfile.TemporaryDirectory(prefix="dedup_", dir=tmp_dir)
+        self._files = [open(os.path.join(self._dir.name, f"p{i}.bin"), "wb") for i in range(self.partitions)]
+        # Linhas já vistas (a próxima linha tem esta posição)
+        self.seen = 0
+
+    def update(self, hashes: np.ndarray):
+        n = len(hashes)
+        records = np.empty(n, dtype=PARTITION_RECORD)
+        records["hash"] = hashes
+        records["pos"] = np.arange(self.seen, self.seen + n)
+        self.seen += n
+        # Agrupa os registros do bloco por partição e anexa cada grupo ao arquivo correspondente
+        part = (records["hash"] >> np.uint64(64 - self.bits)).astype(np.int64) if self.bits else np.zeros(n, np.int64)
+        order = np.argsort(part, kind="stable")
+        bounds = np.searchsorted(part[order], np.arange(self.partitions + 1))
+        for p in range(self.partitions):
+            if bounds[p] < bounds[p + 1]:
+                records[order[bounds[p]:bounds[p + 1]]].tofile(self._files[p])
+
+    def result(self) -> dict:
+        # Máscara de bits das linhas mantidas, preenchida partição por partição
+        packed = np.zeros((self.seen + 7) // 8, dtype=np.uint8)
+        try:
+            for f in self._files:
+                f.close()
+                records = np.fromfile(f.name, dtype=PARTITION_RECORD)
+                if records.size == 0:
+                    continue
+                # Ordena por hash e, dentro do mesmo hash, por posição
+                records = records[np.lexsort((records["pos"], records["hash"]))]
+                h = records["hash"]
+                # Primeira ou última ocorrência de cada hash
+                if self.keep == "last":
+                    kept = records["pos"][np.r_[h[1:] != h[:-1], True]]
+                else:
+                    kept = records["pos"][np.r_[True, h[1:] != h[:-1]]]
+                np.bitwise_or.at(packed, kept >> 3, (0x80 >> (kept & 7)).astype(np.uint8))
+        finally:
+            self._dir.cleanup()
+        return {"keep": packed, "rows": self.seen}
+
+
+# Define uma função que extrai da máscara de bits o trecho [start, start + n) como array booleano
+def mask_slice(packed: np.ndarray, start: int, n: int) -> np.ndarray:
+    first, offset = start >> 3, start & 7
+    bits = np.unpackbits(packed[first:(start + n + 7) >> 3])
+    return bits[offset:offset + n].astype(bool)
@@ -0,0 +1,134 @@
+# Gerenciador de memória entre sessões: orçamento global, descarte em disco das sessões ociosas (LRU) e uso por sessão
+
+# Importa o módulo os para a pasta dos arquivos descarregados e a memória do sistema
+import os
+# Importa o módulo shutil para apagar a pasta das sessões que terminaram
+import shutil
+# Importa o módulo tempfile para a pasta padrão dos arquivos descarregados
+import tempfile
+# Importa o módulo threading: cada sessão do Streamlit roda o script na sua própria thread
+import threading
+# Importa o módulo time para o último acesso de cada sessão
+import time
+# Importa o módulo weakref para não manter vivo o histórico de uma sessão que já terminou
+import weakref
+
+# Pasta padrão dos DataFrames descarregados (some junto com as sessões); pode ser trocada pela variável de ambiente
+DEFAULT_SPILL_DIR = os.environ.get("CSV_CLEANER_SPILL_DIR", os.path.join(tempfile.gettempdir(), "csv_cleaner_spill"))
+# Segundos sem uso para uma sessão ser considerada ociosa (e poder ir para o disco)
+IDLE_SECONDS = 60
+
+
+# Define uma função que devolve o orçamento padrão: variável de ambiente ou metade da memória física
+def default_budget_mb() -> float:
+    if os.environ.get("CSV_CLEANER_MEMORY_MB"):
+        return float(os.environ["CSV_CLEANER_MEMORY_MB"])
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 2**20 / 2
+    except (AttributeError, ValueError, OSError):
+        # Sem sysconf (ex: Windows): 4 GB
+        return 4096.0
+
+
+# Define a classe que controla a memória de todas as sessões do servidor
+class MemoryGovernor:
+    """Cada sessão registra o seu histórico (dono dos DataFrames) e quanto ele ocupa a cada execução do script.
+
+    Quando a soma das sessões em memória passa do orçamento, as sessões ociosas que foram usadas há mais tempo
+    têm o histórico descarregado em arquivos Arrow ('History.spill'); o próximo acesso da sessão recarrega os
+    DataFrames do disco. A sessão que está executando (ou esperando uma tarefa em segundo plano, ver 'keep_alive')
+    nunca é descarregada.
+    """
+
+    def __init__(self, budget_mb=None, directory=DEFAULT_SPILL_DIR, idle_seconds=IDLE_SECONDS):
+        self.budget_bytes = int((budget_mb if budget_mb is not None else default_budget_mb()) * 2**20)
+        self.directory = directory
+        self.idle_seconds = idle_seconds
+        # {sessão: {"history": weakref, "nbytes", "last"}}
+        self.sessions = {}
+        # Sessões cujo histórico foi coletado: o callback do weakref só anota (pode rodar com a trava adquirida)
+        self._dead = []
+        self._lock = threading.Lock()
+
+    def touch(self, session_id: str, history, nbytes: int) -> list:
+        """Registra o acesso da sessão (com o tamanho atual dos seus DataFrames) e aplica o orçamento.
+        Retorna as sessões descarregadas em disco para abrir espaço."""
+        with self._lock:
+            self._reap()
+            entry = self.sessions.get(session_id)
+            if entry is None or entry["history"]() is not history:
+                # Histórico novo (arquivo trocado): o anterior, se descarregado, não será mais lido
+                self._drop_files(session_id)
+                entry = self.sessions[session_id] = {
+                    "history": weakref.ref(history, lambda _, sid=session_id: self._dead.append(sid))}
+            entry.update(nbytes=int(nbytes), last=time.monotonic())
+            return self._enforce(session_id)
+
+    def keep_alive(self, session_id: str):
+        """Marca a sessão como em uso sem medir de novo (ex: enquanto espera uma tarefa em segundo plano que usa
+        os DataFrames do histórico): sessão em uso não é ociosa e não vai para o disco."""
+        with self._lock:
+            entry = self.sessions.get(session_id)
+            if entry is not None:
+                entry["last"] = time.monotonic()
+
+    def _reap(self):
+        # Sessões encerradas (histórico coletado): saem da conta e têm os arquivos apagados (trava adquirida)
+        while self._dead:
+            sid = self._dead.pop()
+            entry = self.sessions.get(sid)
+            if entry is not None and entry["history"]() is None:
+                del self.sessions[sid]
+                self._drop_files(sid)
+
+    def _enforce(self, active: str) -> list:
+        # Descarrega as sessões ociosas menos usadas até o total em memória caber no orçamento (trava adquirida)
+        total = self._in_memory()
+        if total <= self.budget_bytes:
+            return []
+        now = time.monotonic()
+        idle = sorted(
+            (e["last"], sid) for sid, e in self.sessions.items()
+            if sid != active and now - e["last"] >= self.idle_seconds and self._resident(e)
+        )
+        spilled = []
+        for _, sid in idle:
+            if total <= self.budget_bytes:
+                break
+            history = self.sessions[sid]["history"]()
+            if history is not None and history.spill(os.path.join(self.directory, sid)):
+                total -= self.sessions[sid]["nbytes"]
+                spilled.append(sid)
+        return spilled
+
+    @staticmethod
+    def _resident(entry) -> bool:
+        history = entry["history"]()
+        return history is not None and not history.spilled
+
+    def _in_memory(self) -> int:
+        return sum(e["nbytes"] for e in self.sessions.values() if self._resident(e))
+
+    def _drop_files(self, session_id: str):
+        shutil.rmtree(os.path.join(self.directory, session_id), ignore_errors=True)
+
+    def usage(self, session_id=None) -> dict:
+        """Uso atual: bytes em memória (todas as sessões e a sessão indicada), bytes em disco e contagem de sessões."""
+        with self._lock:
+            self._reap()
+            entries = [e for e in self.sessions.values() if e["history"]() is not None]
+            resident = [e for e in entries if not e["history"]().spilled]
+            spilled = [e for e in entries if e["history"]().spilled]
+            own = self.sessions.get(session_id)
+            return {
+                "session_bytes": own["nbytes"] if own else 0,
+                "in_memory_bytes": sum(e["nbytes"] for e in resident),
+                "spilled_bytes": sum(e["nbytes"] for e in spilled),
+                "budget_bytes": self.budget_bytes,
+                "sessions": len(entries),
+                "spilled_sessions": len(spilled),
+            }
+
+
+# Um gerenciador por processo: o módulo é importado uma vez e compartilhado por todas as sessões do servidor
+GOVERNOR = MemoryGovernor()
@@ -0,0 +1,260 @@
+# Histórico das etapas: guarda o DataFrame original uma única vez e cada etapa como um delta compacto (desfazer/refazer)
+
+# Importa o módulo os para os arquivos das etapas descarregadas em disco
+import os
+# Importa o módulo shutil para apagar a pasta das etapas descarregadas
+import shutil
+# Importa o módulo threading para não descarregar e recarregar o histórico ao mesmo tempo
+import threading
+
+# Importa a biblioteca numpy para empacotar as máscaras de linhas em bits
+import numpy as np
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+
+# Importa a lista de colunas que cada etapa pode ter alterado
+from diagnostics import touched_columns
+
+# PyArrow é opcional: sem ele o histórico nunca é descarregado em disco
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+# Define uma função que calcula o delta entre o DataFrame antes e depois de uma etapa
+def make_delta(before: pd.DataFrame, after: pd.DataFrame, spec: dict, info: dict) -> dict:
+    """O delta guarda só o que mudou: máscara de linhas mantidas (1 bit por linha), colunas removidas,
+    novos nomes e as colunas substituídas. Se a etapa não couber nesse formato, guarda o DataFrame inteiro."""
+    delta = {"n": before.shape[0], "rows": None, "dropped": [], "names": None, "columns": {}, "order": None}
+    # Linhas: a etapa só pode ter removido linhas, mantendo a ordem (índice único para localizar cada linha)
+    if after.shape[0] != before.shape[0] or not after.index.equals(before.index):
+        if not before.index.is_unique:
+            return {"frame": after}
+        pos = before.index.get_indexer(after.index)
+        if (pos < 0).any() or (np.diff(pos) <= 0).any():
+            return {"frame": after}
+        mask = np.zeros(before.shape[0], dtype=bool)
+        mask[pos] = True
+        delta["rows"] = np.packbits(mask)
+    # Renomeação: mesmas colunas na mesma posição, só com outros nomes
+    if spec["op"] == "standardize_colnames":
+        delta["names"] = list(after.columns)
+        return delta
+    # Colunas removidas
+    delta["dropped"] = [c for c in before.columns if c not in after.columns]
+    # Colunas substituídas pela etapa (ou criadas por ela): só essas são guardadas
+    changed = touched_columns(spec, info) | {c for c in after.columns if c not in before.columns}
+    # Por garantia, qualquer coluna que mudou de dtype também é guardada
+    changed |= {c for c in after.columns if c not in changed and after[c].dtype != before[c].dtype}
+    delta["columns"] = {c: after[c] for c in after.columns if c in changed}
+    # Ordem final das colunas, se não for a que sobra depois de remover/substituir
+    if list(after.columns) != [c for c in before.columns if c not in delta["dropped"]]:
+        delta["order"] = list(after.columns)
+    return delta
+
+
+# Define uma função que reaplica um delta ao DataFrame anterior, reconstruindo o DataFrame seguinte
+def apply_delta(df: pd.DataFrame, delta: dict) -> pd.DataFrame:
+    if "frame" in delta:
+        return delta["frame"]
+    # Linhas mantidas pela etapa
+    if delta["rows"] is not None:
+        df = df[np.unpackbits(delta["rows"], count=delta["n"]).astype(bool)]
+    if delta["dropped"]:
+        df = df.drop(columns=delta["dropped"])
+    if delta["names"] is not None:
+        df = df.set_axis(delta["names"], axis=1)
+    # Com copy-on-write, só as colunas substituídas ganham memória nova
+    if delta["columns"]:
+        df = df.copy(deep=False)
+        for c, s in delta["columns"].items():
+            df[c] = s
+    if delta["order"] is not None:
+        df = df[delta["order"]]
+    return df
+
+
+# Define uma função que estima a memória ocupada por um delta (em bytes)
+def delta_nbytes(delta: dict) -> int:
+    if "frame" in delta:
+        return int(delta["frame"].memory_usage(deep=True).sum())
+    total = 0 if delta["rows"] is None else delta["rows"].nbytes
+    return total + sum(int(s.memory_usage(deep=True, index=False)) for s in delta["columns"].values())
+
+
+# Define uma função que grava um DataFrame (com o índice) em Arrow IPC sem compressão
+def _write_frame(df: pd.DataFrame, path: str):
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+# Define uma função que lê de volta um DataFrame gravado por _write_frame, com os dtypes de antes
+def _read_frame(path: str, dtypes) -> pd.DataFrame:
+    df = pa.ipc.open_file(pa.memory_map(path)).read_all().to_pandas()
+    for c, dtype in dtypes.items():
+        # Ex: string[pyarrow] do Arrow volta como string do pandas; 'object' volta com None nos nulos
+        if df[c].dtype != dtype:
+            df[c] = df[c].astype(dtype)
+        elif dtype == object and df[c].hasnans:
+            df[c] = df[c].where(df[c].notna(), np.nan)
+    return df
+
+
+# Define a classe que guarda o original e a pilha de etapas, com desfazer/refazer
+class History:
+    """Cada entrada guarda o spec, as informações, a mensagem do log e o delta da etapa.
+
+    Desfazer reconstrói o estado anterior reaplicando os deltas a partir do original (sem recalcular etapas);
+    refazer reaplica só o delta seguinte. Uma nova etapa depois de desfazer descarta as etapas desfeitas.
+
+    O histórico é o dono dos DataFrames da sessão: 'spill' grava o original e as colunas dos deltas em
+    arquivos Arrow e solta a memória; o próximo acesso a 'original', 'current', 'push', 'undo' ou 'redo'
+    recarrega tudo do disco, sem que quem usa o histórico perceba.
+    """
+
+    def __init__(self, original: pd.DataFrame):
+        # Trava do descarregamento: o gerenciador de memória roda na thread de outra sessão
+        self._lock = threading.RLock()
+        # Pasta com os arquivos do histórico descarregado (None = em memória)
+        self._spill_dir = None
+        # DataFrame como foi carregado, guardado uma única vez
+        self._original = original
+        # Entradas {"spec", "info", "msg", "delta", "nbytes"} e quantas delas estão aplicadas
+        self.entries = []
+        self.cursor = 0
+        # DataFrame da posição atual
+        self._current = original
+
+    @property
+    def original(self) -> pd.DataFrame:
+        with self._lock:
+            self._restore()
+            return self._original
+
+    @property
+    def current(self) -> pd.DataFrame:
+        with self._lock:
+            self._restore()
+            return self._current
+
+    @property
+    def spilled(self) -> bool:
+        return self._spill_dir is not None
+
+    def push(self, after: pd.DataFrame, spec: dict, info: dict, msg: str):
+        with self._lock:
+            self._restore()
+            # Descarta as etapas desfeitas e registra a nova a partir do DataFrame atual
+            del self.entries[self.cursor:]
+            delta = make_delta(self._current, after, spec, info)
+            self.entries.append({"spec": spec, "info": info, "msg": msg, "delta": delta, "nbytes": delta_nbytes(delta)})
+            self.cursor += 1
+            self._current = after
+
+    def can_undo(self) -> bool:
+        return self.cursor > 0
+
+    def can_redo(self) -> bool:
+        return self.cursor < len(self.entries)
+
+    def undo(self) -> pd.DataFrame:
+        with self._lock:
+            self._restore()
+            # Reconstrói a posição anterior a partir do original
+            self.cursor -= 1
+            df = self._original
+            for entry in self.entries[:self.cursor]:
+                df = apply_delta(df, entry["delta"])
+            self._current = df
+            return df
+
+    def redo(self) -> pd.DataFrame:
+        with self._lock:
+            self._restore()
+            # Reaplica só o delta da próxima etapa
+            self._current = apply_delta(self._current, self.entries[self.cursor]["delta"])
+            self.cursor += 1
+            return self._current
+
+    @property
+    def applied(self) -> list:
+        # Entradas aplicadas até a posição atual
+        return self.entries[:self.cursor]
+
+    @property
+    def steps(self) -> list:
+        # Specs das etapas aplicadas (receita e modo streaming); um plano entra com as etapas originais
+        return [s for e in self.applied for s in (e["spec"]["steps"] if e["spec"]["op"] == "plan" else [e["spec"]])]
+
+    @property
+    def messages(self) -> list:
+        # Mensagens do log das etapas aplicadas
+        return [e["msg"] for e in self.applied]
+
+    def nbytes(self) -> int:
+        # Memória ocupada pelos deltas de todas as entradas (inclusive as desfeitas), medida ao registrar cada uma
+        return sum(e["nbytes"] for e in self.entries)
+
+    def spill(self, directory: str) -> bool:
+        """Grava os DataFrames do histórico em 'directory' e solta a memória. Retorna False se não deu para gravar
+        (sem PyArrow, colunas que o Arrow não representa, disco cheio...) ou se outra thread está usando o histórico."""
+        if pa is None or not self._lock.acquire(blocking=False):
+            return False
+        try:
+            if self._spill_dir is not None:
+                return True
+            os.makedirs(directory, exist_ok=True)
+            # O atual não é gravado: ao recarregar, é refeito a partir do original e dos deltas, voltando a
+            # compartilhar as colunas com eles (copy-on-write), como antes de descarregar
+            frames = {"original": self._original}
+            for i, entry in enumerate(self.entries):
+                delta = entry["delta"]
+                if "frame" in delta:
+                    frames[f"frame_{i}"] = delta["frame"]
+                elif delta["columns"]:
+                    frames[f"columns_{i}"] = pd.DataFrame(delta["columns"], copy=False)
+            dtypes = {}
+            for name, df in frames.items():
+                _write_frame(df, os.path.join(directory, name + ".arrow"))
+                dtypes[name] = df.dtypes.to_dict()
+        except (OSError, pa.ArrowException, TypeError, ValueError):
+            shutil.rmtree(directory, ignore_errors=True)
+            self._lock.release()
+            return False
+        # Solta as referências: a memória volta ao sistema assim que ninguém mais usa os DataFrames
+        self._spill_dtypes = dtypes
+        self._original = self._current = None
+        for i, entry in enumerate(self.entries):
+            delta = entry["delta"]
+            if "frame" in delta:
+                delta["frame"] = None
+            elif delta["columns"]:
+                delta["columns"] = None
+        self._spill_dir = directory
+        self._lock.release()
+        return True
+
+    def _restore(self):
+        # Recarrega do disco o que foi descarregado (chamado com a trava já adquirida)
+        if self._spill_dir is None:
+            return
+        directory, dtypes = self._spill_dir, self._spill_dtypes
+        def load(name):
+            return _read_frame(os.path.join(directory, name + ".arrow"), dtypes[name])
+        self._original = load("original")
+        for i, entry in enumerate(self.entries):
+            delta = entry["delta"]
+            if "frame" in delta:
+                delta["frame"] = load(f"frame_{i}")
+            elif f"columns_{i}" in dtypes:
+                cols = load(f"columns_{i}")
+                delta["columns"] = {c: cols[c] for c in cols.columns}
+        # Reaplica os deltas das etapas aplicadas, como o desfazer
+        df = self._original
+        for entry in self.entries[:self.cursor]:
+            df = apply_delta(df, entry["delta"])
+        self._current = df
+        self._spill_dir = self._spill_dtypes = None
+        shutil.rmtree(directory, ignore_errors=True)
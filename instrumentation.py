@@ -0,0 +1,158 @@
+# Instrumentação das fases (leitura, etapas, exportação): tempo, CPU, linhas, vazão, memória e perfil opcional
+
+# Importa o cProfile para o perfil opcional de uma fase
+import cProfile
+# Importa o módulo datetime para registrar o início de cada fase
+import datetime
+# Importa o módulo io para formatar o relatório do perfil como texto
+import io
+# Importa o módulo json para exportar as métricas
+import json
+# Importa o módulo os para apagar o arquivo temporário do perfil
+import os
+# Importa o módulo pstats para ordenar e gravar o perfil
+import pstats
+# Importa o módulo sys para ajustar a unidade do pico de RSS por sistema
+import sys
+# Importa o módulo tempfile para gravar o perfil binário
+import tempfile
+# Importa o módulo time para medir tempo de parede e de CPU
+import time
+# Importa o tracemalloc para o pico de memória alocada durante a fase
+import tracemalloc
+
+# O módulo resource só existe em sistemas Unix: sem ele o pico de RSS fica de fora
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+
+# Colunas da tabela de métricas, na ordem exibida
+METRIC_COLUMNS = [
+    "fase", "inicio", "tempo_s", "cpu_s", "linhas_entrada", "linhas_saida", "linhas_por_s",
+    "memoria_antes_mb", "memoria_depois_mb", "pico_tracemalloc_mb", "pico_rss_mb",
+]
+
+
+# Define uma função que calcula a memória de um DataFrame em MB (inclusive o conteúdo das strings)
+def frame_memory_mb(df: pd.DataFrame) -> float:
+    return float(df.memory_usage(deep=True).sum() / 2**20)
+
+
+# Define uma função que lê o pico de memória residente do processo (desde o início), em MB
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB; macOS, em bytes
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+# Define a classe que mede uma fase, usada como gerenciador de contexto
+class Measure:
+    """Mede tempo de parede e de CPU de uma fase; linhas e memória são informadas por quem chama:
+
+        with Measure("Tipagem automática", rows_in=len(df), mem_before=mb) as m:
+            df, info = apply_step(df, spec)
+        m.done(df)
+
+    O tempo de CPU é o da thread que executa a fase (ex: a tarefa em segundo plano): as outras sessões e o script
+    do Streamlit não entram na conta, nem os workers auxiliares (colunas em paralelo, arquivos do lote).
+    'trace_memory' liga o tracemalloc durante a fase (pico das alocações do Python/NumPy; deixa a fase mais lenta);
+    'profile' grava um perfil cProfile da thread que executa a fase.
+    """
+
+    def __init__(self, phase: str, rows_in=None, mem_before=None, trace_memory=False, profile=False):
+        self.phase = phase
+        self.rows_in = rows_in
+        self.mem_before = mem_before
+        self.trace_memory = trace_memory
+        self.profile = profile
+        # Preenchidos ao terminar a fase (e por done)
+        self.rows_out = None
+        self.mem_after = None
+        self.started = None
+        self.wall = None
+        self.cpu = None
+        self.peak_mb = None
+        self.profiler = None
+
+    def __enter__(self):
+        self.started = datetime.datetime.now().isoformat(timespec="seconds")
+        # Liga o tracemalloc só se ainda não estiver ligado; se estiver, zera o pico
+        self._started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        elif self.trace_memory:
+            tracemalloc.reset_peak()
+        if self.profile:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self._wall0, self._cpu0 = time.perf_counter(), time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.wall = time.perf_counter() - self._wall0
+        self.cpu = time.thread_time() - self._cpu0
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self.trace_memory:
+            self.peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+            if self._started_tracing:
+                tracemalloc.stop()
+        return False
+
+    def done(self, df=None, rows_out=None, mem_after=None):
+        # Linhas e memória na saída da fase (a memória é calculada do DataFrame se não for informada)
+        self.rows_out = rows_out if rows_out is not None else (df.shape[0] if df is not None else None)
+        self.mem_after = mem_after if mem_after is not None else (frame_memory_mb(df) if df is not None else None)
+        return self
+
+    @property
+    def record(self) -> dict:
+        # Vazão sobre as linhas de entrada (ou de saída, em fases sem entrada, como a leitura)
+        rows = self.rows_in if self.rows_in is not None else self.rows_out
+        rss = peak_rss_mb()
+        return {
+            "fase": self.phase,
+            "inicio": self.started,
+            "tempo_s": round(self.wall, 4),
+            "cpu_s": round(self.cpu, 4),
+            "linhas_entrada": self.rows_in,
+            "linhas_saida": self.rows_out,
+            "linhas_por_s": round(rows / self.wall) if rows and self.wall else None,
+            "memoria_antes_mb": None if self.mem_before is None else round(float(self.mem_before), 2),
+            "memoria_depois_mb": None if self.mem_after is None else round(float(self.mem_after), 2),
+            "pico_tracemalloc_mb": None if self.peak_mb is None else round(self.peak_mb, 2),
+            "pico_rss_mb": None if rss is None else round(rss, 1),
+        }
+
+    def profile_text(self, limit=30) -> str:
+        # Funções que mais consumiram tempo (acumulado), como texto
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+    def profile_bytes(self) -> bytes:
+        # Perfil no formato do pstats (abre com snakeviz, pstats ou gprof2dot)
+        fd, path = tempfile.mkstemp(suffix=".prof")
+        os.close(fd)
+        try:
+            pstats.Stats(self.profiler).dump_stats(path)
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.remove(path)
+
+
+# Define uma função que monta a tabela de métricas a partir dos registros
+def metrics_frame(records: list) -> pd.DataFrame:
+    return pd.DataFrame(records, columns=METRIC_COLUMNS)
+
+
+# Define uma função que serializa as métricas em JSON
+def dumps_metrics(records: list) -> str:
+    return json.dumps(records, ensure_ascii=False, indent=2)
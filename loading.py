@@ -0,0 +1,329 @@
+# Leitura de arquivos CSV: detecção de encoding e parse (inteiro ou em blocos)
+
+# Importa o módulo codecs para lidar com BOMs e decodificação incremental
+import codecs
+# Importa o módulo csv para detectar o dialeto (separador, aspas) a partir do prefixo
+import csv
+# Importa o módulo io para trabalhar com fluxos de bytes/arquivos em memória
+import io
+# Importa o módulo mmap para ler só os trechos amostrados de arquivos em disco
+import mmap
+# Importa o módulo re para reconhecer valores numéricos na detecção do cabeçalho
+import re
+# Importa Counter para achar o número de campos mais comum por linha
+from collections import Counter
+
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+# Importa o detector incremental da biblioteca chardet para detecção de codificação de arquivos
+from chardet.universaldetector import UniversalDetector
+
+# PyArrow é opcional: sem ele a leitura usa o motor padrão do pandas e colunas 'object'
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+# Tamanho do prefixo do arquivo usado na detecção de encoding (em bytes)
+ENCODING_PREFIX_BYTES = 64 * 1024
+# Quantidade de blocos amostrados ao longo do restante do arquivo
+ENCODING_SAMPLE_BLOCKS = 8
+# Tamanho de cada bloco amostrado (em bytes)
+ENCODING_BLOCK_BYTES = 16 * 1024
+# Tamanho de cada pedaço entregue incrementalmente ao detector do chardet
+ENCODING_FEED_BYTES = 4 * 1024
+
+# Tamanho do prefixo do arquivo usado na detecção do separador, das aspas e do cabeçalho (em bytes)
+SNIFF_PREFIX_BYTES = 64 * 1024
+# Separadores candidatos (os mesmos da barra lateral)
+SNIFF_DELIMITERS = [",", ";", "\t", "|"]
+# Linhas entregues ao csv.Sniffer (a contagem de campos usa o prefixo inteiro)
+SNIFF_SNIFFER_LINES = 50
+# Linhas de dados comparadas com a primeira na detecção do cabeçalho
+SNIFF_HEADER_ROWS = 20
+# Valor que parece número (com separador de milhar/decimal em qualquer convenção)
+_NUMBER_RE = re.compile(r"\s*[+-]?(?:\d[\d.,]*|[.,]\d+)(?:[eE][+-]?\d+)?\s*")
+
+# Marcadores de ordem de bytes (BOM) conhecidos e o encoding correspondente
+# (UTF-32 vem antes do UTF-16 porque o BOM UTF-32 LE começa com o BOM UTF-16 LE)
+_BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+# Define uma função que seleciona os trechos do arquivo usados na detecção: o prefixo e alguns blocos espalhados
+def sample_blocks(file_bytes: bytes, prefix_bytes=ENCODING_PREFIX_BYTES,
+                  n_blocks=ENCODING_SAMPLE_BLOCKS, block_bytes=ENCODING_BLOCK_BYTES) -> list:
+    # O primeiro trecho é sempre o prefixo do arquivo
+    blocks = [file_bytes[:prefix_bytes]]
+    # Calcula quantos bytes sobram depois do prefixo
+    rest = len(file_bytes) - prefix_bytes
+    # Se não sobrou nada, o prefixo já cobre o arquivo inteiro
+    if rest <= 0:
+        return blocks
+    # Se o restante cabe nos blocos amostrados, usa-o inteiro (arquivos pequenos)
+    if rest <= n_blocks * block_bytes:
+        blocks.append(file_bytes[prefix_bytes:])
+        return blocks
+    # Distribui os blocos uniformemente entre o fim do prefixo e o fim do arquivo (o último bloco termina no EOF)
+    step = (rest - block_bytes) / max(n_blocks - 1, 1)
+    for i in range(n_blocks):
+        start = prefix_bytes + int(step * i)
+        blocks.append(file_bytes[start:start + block_bytes])
+    # Retorna a lista de trechos amostrados
+    return blocks
+
+
+# Define uma função que verifica se um trecho decodifica sem erro no encoding informado
+def decodes_cleanly(block: bytes, encoding: str, mid_file=False) -> bool:
+    # Trechos do meio do arquivo podem começar no meio de um caractere multibyte,
+    # então testamos alguns deslocamentos iniciais (até 3 bytes)
+    offsets = range(4) if mid_file else [0]
+    for off in offsets:
+        try:
+            # final=False tolera um caractere multibyte cortado no fim do trecho
+            codecs.getincrementaldecoder(encoding)().decode(block[off:], final=False)
+            return True
+        except (UnicodeDecodeError, LookupError):
+            continue
+    # Nenhum deslocamento decodificou o trecho
+    return False
+
+
+# Define uma função para detectar a codificação de um arquivo a partir de seus bytes
+# ('file_bytes' pode ser qualquer objeto fatiável, como um mmap)
+def detect_encoding(file_bytes: bytes) -> dict:
+    """Detecta o encoding olhando só o prefixo e alguns blocos amostrados.
+
+    Retorna um dicionário com encoding, confiança, bytes analisados e o método usado.
+    """
+    # Caminho rápido 1: BOM no início do arquivo define o encoding sem precisar de análise
+    for bom, enc in _BOMS:
+        if file_bytes[:len(bom)] == bom:
+            return {"encoding": enc, "confidence": 1.0, "bytes_scanned": len(bom), "method": "BOM"}
+
+    # Seleciona o prefixo e os blocos amostrados ao longo do arquivo
+    blocks = sample_blocks(file_bytes)
+    # Soma quantos bytes serão efetivamente analisados
+    sampled = sum(len(b) for b in blocks)
+
+    # Caminho rápido 2: se todos os trechos são UTF-8 válido (ASCII incluso), não precisa do chardet
+    if all(decodes_cleanly(b, "utf-8", mid_file=i > 0) for i, b in enumerate(blocks)):
+        return {"encoding": "utf-8", "confidence": 0.99, "bytes_scanned": sampled, "method": "UTF-8 (amostra)"}
+
+    # Alimenta o detector do chardet incrementalmente, parando assim que ele estiver confiante
+    detector = UniversalDetector()
+    scanned = 0
+    for block in blocks:
+        for i in range(0, len(block), ENCODING_FEED_BYTES):
+            piece = block[i:i + ENCODING_FEED_BYTES]
+            detector.feed(piece)
+            scanned += len(piece)
+            # detector.done indica que o chardet já tem confiança suficiente
+            if detector.done:
+                break
+        if detector.done:
+            break
+    # Finaliza a detecção e obtém o resultado
+    result = detector.close()
+    # Extrai a codificação do resultado, ou assume "utf-8" se não for detectada
+    enc = (result.get("encoding") or "utf-8").lower()
+    # "ascii" é subconjunto do UTF-8; usar UTF-8 evita erro em bytes não vistos na amostra
+    if enc == "ascii":
+        enc = "utf-8"
+    confidence = float(result.get("confidence") or 0.0)
+    method = "chardet (incremental)"
+
+    # Verificação barata: o palpite precisa decodificar todos os trechos amostrados;
+    # se não decodificar, tenta candidatos comuns (latin-1 sempre decodifica)
+    if not all(decodes_cleanly(b, enc, mid_file=i > 0) for i, b in enumerate(blocks)):
+        for candidate in ["utf-8", "cp1252", "latin-1"]:
+            if all(decodes_cleanly(b, candidate, mid_file=i > 0) for i, b in enumerate(blocks)):
+                enc, confidence, method = candidate, confidence / 2, "fallback verificado"
+                break
+
+    # Retorna o encoding detectado com as informações da detecção
+    return {"encoding": enc, "confidence": confidence, "bytes_scanned": scanned, "method": method}
+
+
+# Define uma função que decodifica o prefixo do arquivo, sem a última linha se ela foi cortada
+def _prefix_text(file_bytes, encoding: str, prefix_bytes=SNIFF_PREFIX_BYTES) -> str:
+    text = codecs.getincrementaldecoder(encoding)(errors="replace").decode(bytes(file_bytes[:prefix_bytes]), final=False)
+    if len(file_bytes) > prefix_bytes and "\n" in text:
+        text = text[:text.rfind("\n") + 1]
+    # O BOM do UTF-8 não faz parte do primeiro nome de coluna
+    return text.lstrip("\ufeff")
+
+
+# Define uma função que separa as linhas do prefixo em campos com um separador e um caractere de aspas
+def _split_rows(text: str, sep: str, quotechar: str) -> list:
+    return [row for row in csv.reader(io.StringIO(text), delimiter=sep, quotechar=quotechar) if row]
+
+
+# Define uma função que decide se a primeira linha é um cabeçalho, comparando-a com as linhas seguintes
+def _looks_like_header(rows: list) -> bool:
+    """Cada coluna vota: se os dados são numéricos, o cabeçalho é o nome que não é número; se os dados têm
+    todos o mesmo tamanho (códigos, datas), o cabeçalho é o valor de tamanho diferente. Sem votos, assume cabeçalho."""
+    if len(rows) < 2:
+        return True
+    header, body = rows[0], [r for r in rows[1:SNIFF_HEADER_ROWS + 1] if len(r) == len(rows[0])]
+    votes = 0
+    for i, name in enumerate(header):
+        values = [r[i] for r in body if r[i].strip()]
+        if not values:
+            continue
+        if sum(bool(_NUMBER_RE.fullmatch(v)) for v in values) >= 0.9 * len(values):
+            votes += -1 if _NUMBER_RE.fullmatch(name) else 1
+        elif len({len(v) for v in values}) == 1:
+            votes += -1 if len(name) == len(values[0]) else 1
+    return votes >= 0
+
+
+# Define uma função que detecta separador, aspas e cabeçalho a partir de um prefixo limitado do arquivo
+def sniff_dialect(file_bytes, encoding="utf-8", prefix_bytes=SNIFF_PREFIX_BYTES) -> dict:
+    """O csv.Sniffer dá um palpite nas primeiras linhas; cada separador candidato é conferido pela consistência
+    do número de campos por linha em todo o prefixo (vence o que divide mais linhas no mesmo número de colunas).
+
+    Retorna separador, aspas, cabeçalho, número de colunas, fração de linhas consistentes e o método usado.
+    """
+    text = _prefix_text(file_bytes, encoding, prefix_bytes)
+    if not text.strip():
+        return {"sep": ",", "quotechar": '"', "has_header": True, "columns": 0, "consistency": 0.0,
+                "method": "padrão (arquivo vazio)"}
+    # Palpite do csv.Sniffer (separador e aspas) sobre as primeiras linhas
+    head = "".join(text.splitlines(keepends=True)[:SNIFF_SNIFFER_LINES])
+    try:
+        dialect = csv.Sniffer().sniff(head, delimiters="".join(SNIFF_DELIMITERS))
+        sniffed, quotechar = dialect.delimiter, dialect.quotechar if dialect.quotechar in "\"'" else '"'
+    except csv.Error:
+        sniffed, quotechar = None, '"'
+    # Consistência de cada candidato: fração das linhas com o número de campos mais comum
+    scores = {}
+    for sep in SNIFF_DELIMITERS:
+        counts = Counter(len(row) for row in _split_rows(text, sep, quotechar))
+        fields, hits = counts.most_common(1)[0]
+        scores[sep] = (hits / sum(counts.values()), fields)
+    candidates = [sep for sep in SNIFF_DELIMITERS if scores[sep][1] > 1]
+    if not candidates:
+        sep, method = ",", "uma coluna só"
+    else:
+        # Mais consistente primeiro; em empate, o palpite do Sniffer e depois o que gera mais colunas
+        sep = max(candidates, key=lambda d: (round(scores[d][0], 2), d == sniffed, scores[d][1]))
+        method = "csv.Sniffer + contagem de campos" if sep == sniffed else "contagem de campos"
+    return {
+        "sep": sep, "quotechar": quotechar,
+        "has_header": _looks_like_header(_split_rows(head, sep, quotechar)),
+        "columns": scores[sep][1], "consistency": scores[sep][0], "method": method,
+    }
+
+
+# Define uma função que detecta o dialeto de um arquivo em disco lendo só o prefixo
+def sniff_dialect_file(path, encoding="utf-8", prefix_bytes=SNIFF_PREFIX_BYTES) -> dict:
+    with open(path, "rb") as f:
+        # Um byte a mais indica se o prefixo cortou o arquivo (e a última linha)
+        return sniff_dialect(f.read(prefix_bytes + 1), encoding, prefix_bytes)
+
+
+# Define uma função que preenche as opções de leitura marcadas como "auto" com o dialeto detectado
+def resolve_dialect(read: dict, dialect: dict) -> dict:
+    read = dict(read)
+    for key in ("sep", "has_header", "quotechar"):
+        if read.get(key, "auto") == "auto":
+            read[key] = dialect[key]
+    return read
+
+
+# Define uma função que indica se alguma opção de leitura pede detecção automática
+def needs_sniff(read: dict) -> bool:
+    return any(read.get(key, "auto") == "auto" for key in ("sep", "has_header", "quotechar"))
+
+
+# Define uma função que nomeia colunas genéricas (col_0, col_1...) quando o arquivo não tem cabeçalho
+def _name_headerless(df: pd.DataFrame) -> pd.DataFrame:
+    # Atribui nomes de coluna genéricos (ex: "col_0", "col_1")
+    df.columns = [f"col_{i}" for i in range(df.shape[1])]
+    return df
+
+
+# Define uma função que detecta o encoding de um arquivo em disco lendo só os trechos amostrados
+def detect_encoding_file(path) -> dict:
+    with open(path, "rb") as f:
+        # Arquivo vazio não pode ser mapeado em memória; qualquer encoding serve
+        if f.seek(0, io.SEEK_END) == 0:
+            return {"encoding": "utf-8", "confidence": 1.0, "bytes_scanned": 0, "method": "arquivo vazio"}
+        # O mmap só traz do disco as páginas efetivamente fatiadas (prefixo + blocos)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return detect_encoding(mm)
+
+
+# Define uma função que converte as colunas de data do Arrow (date32) em timestamp, reconhecido como data pelo pandas
+def _arrow_dates_to_timestamp(df: pd.DataFrame) -> pd.DataFrame:
+    for c in df.columns:
+        dtype = df[c].dtype
+        if isinstance(dtype, pd.ArrowDtype) and pa.types.is_date(dtype.pyarrow_dtype):
+            df[c] = df[c].astype(pd.ArrowDtype(pa.timestamp("ns")))
+    return df
+
+
+# Define uma função que monta a leitura do pandas a partir de um caminho ou fluxo de bytes
+def _read_csv(source, sep=",", encoding="utf-8", has_header=True, na_values=None, chunksize=None, arrow=False,
+              quotechar='"'):
+    """Com 'arrow', as colunas ficam em memória Arrow (string[pyarrow], int64[pyarrow]...) em vez de objetos Python;
+    a leitura inteira usa o parser multithread do PyArrow (que não lê em blocos: aí fica o parser C do pandas)."""
+    if arrow and pa is None:
+        raise RuntimeError("Instale o PyArrow para carregar em modo Arrow (pip install pyarrow).")
+    # Opções exclusivas do modo Arrow
+    arrow_opts = {}
+    if arrow:
+        arrow_opts["dtype_backend"] = "pyarrow"
+        if chunksize is None:
+            arrow_opts["engine"] = "pyarrow"
+    reader = pd.read_csv(
+        # Caminho do arquivo ou fluxo de bytes em memória
+        source,
+        # Define o separador de colunas conforme selecionado na UI (ou detectado)
+        sep=sep,
+        # Caractere que delimita campos com separadores ou quebras de linha dentro
+        quotechar=quotechar,
+        # Define a codificação detectada
+        encoding=encoding,
+        # Bytes inválidos fora da amostra viram "�" em vez de forçar uma segunda leitura completa
+        encoding_errors="replace",
+        # Define o cabeçalho: 0 se 'has_header' for True, None caso contrário
+        header=0 if has_header else None,
+        # Define os valores a serem considerados como NA (nulos)
+        na_values=na_values,
+        # Número de linhas por bloco (None lê tudo de uma vez)
+        chunksize=chunksize,
+        **arrow_opts,
+    )
+    # Leitura inteira: só ajusta os nomes se não houver cabeçalho (e as datas do Arrow)
+    if chunksize is None:
+        if arrow:
+            reader = _arrow_dates_to_timestamp(reader)
+        return reader if has_header else _name_headerless(reader)
+    # Leitura em blocos: aplica a mesma nomeação a cada bloco
+    return (chunk if has_header else _name_headerless(chunk) for chunk in reader)
+
+
+# Define uma função que lê um CSV a partir de bytes, inteiro ou em blocos de 'chunksize' linhas
+def read_csv_bytes(file_bytes: bytes, sep=",", encoding="utf-8", has_header=True, na_values=None, chunksize=None,
+                   arrow=False, quotechar='"'):
+    """Lê o CSV uma única vez com as opções da barra lateral.
+
+    Com 'chunksize' retorna um iterador de DataFrames (modo streaming); sem ele, um DataFrame.
+    """
+    # Cria um fluxo de bytes em memória a partir dos bytes do arquivo
+    return _read_csv(io.BytesIO(file_bytes), sep, encoding, has_header, na_values, chunksize, arrow, quotechar)
+
+
+# Define uma função que lê um CSV em disco, inteiro ou em blocos (usada pela linha de comando)
+def read_csv_file(path, sep=",", encoding="utf-8", has_header=True, na_values=None, chunksize=None, arrow=False,
+                  quotechar='"'):
+    # O pandas lê direto do disco, sem carregar os bytes do arquivo inteiro antes
+    return _read_csv(path, sep, encoding, has_header, na_values, chunksize, arrow, quotechar)
@@ -0,0 +1,231 @@
+# Plano lógico: etapas registradas sem executar, reescritas por um otimizador e executadas de uma vez
+
+# Importa a biblioteca numpy para combinar as máscaras de linhas
+import numpy as np
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+
+# Importa as etapas de limpeza usadas na execução do plano
+from cleaning import (
+    apply_step,
+    clean_text_column,
+    expand_step,
+    fillna_columns,
+    infer_column_type,
+    iqr_bounds,
+    is_categorical,
+    is_text_dtype,
+    outlier_flags,
+    text_options,
+)
+# Importa o executor por coluna (threads ou processos)
+from parallel import map_columns
+
+# Etapas por coluna: cada coluna é transformada sem olhar as outras e sem mudar o número de linhas
+COLUMN_OPS = {"clean_text", "auto_types", "fillna", "categorize"}
+# Etapas que só removem linhas
+FILTER_OPS = {"dropna", "remove_outliers"}
+
+
+# Define uma função que descreve uma etapa (ou um nó do plano otimizado) em uma linha
+def describe_step(spec: dict) -> str:
+    op = spec["op"]
+    cols = ", ".join(map(str, spec.get("columns") or []))
+    if op == "standardize_colnames":
+        return "Padronizar nomes de colunas"
+    if op == "clean_text":
+        extras = [name for key, name in (("casefold", "minúsculas"), ("strip_accents", "sem acentos"),
+                                          ("na_tokens", "marcadores de NA")) if spec.get(key)]
+        return f"Limpar textos em {cols}" + (f" ({', '.join(extras)})" if extras else "")
+    if op == "auto_types":
+        return "Tipagem automática"
+    if op == "drop_duplicates":
+        subset = spec.get("subset")
+        return f"Remover duplicadas (keep='{spec.get('keep', 'first')}'" + (f", colunas-chave: {subset})" if subset else ")")
+    if op == "fill_na":
+        return "Tratar nulos (" + "; ".join(describe_step(s) for s in expand_step(spec)) + ")"
+    if op == "dropna":
+        return f"Remover linhas com nulos em {cols}"
+    if op == "fillna":
+        return f"Preencher nulos ({spec['strategy']}) em {cols}"
+    if op == "remove_outliers":
+        return (f"Remover outliers (IQR × {spec.get('factor', 1.5)}"
+                + (", quartis aproximados" if spec.get("approx") else "") + f") em {cols}")
+    if op == "drop_columns":
+        return f"Remover colunas {cols}"
+    if op == "categorize":
+        return f"Converter em categoria: {cols}"
+    if op == "map":
+        return "Por coluna, uma passada: " + " → ".join(describe_step(s) for s in spec["steps"])
+    if op == "filter":
+        return "Filtro de linhas, uma máscara: " + " + ".join(describe_step(s) for s in spec["steps"])
+    return op
+
+
+# Define uma função que indica se remover 'columns' pode vir antes da etapa sem mudar o resultado
+def _drop_commutes(step: dict, columns: set) -> bool:
+    op = step["op"]
+    # Etapas por coluna e outras remoções de colunas não dependem das colunas removidas
+    if op in COLUMN_OPS or op == "drop_columns":
+        return True
+    # Filtros só dependem das próprias colunas
+    if op in FILTER_OPS:
+        return not columns & set(step["columns"])
+    # Duplicadas por colunas-chave só dependem das chaves; na linha inteira dependem de todas as colunas
+    if op == "drop_duplicates":
+        return bool(step.get("subset")) and not columns & set(step["subset"])
+    # Renomear (e etapas desconhecidas) bloqueia: os nomes mudam
+    return False
+
+
+# Define uma função que tira as colunas removidas da lista de uma etapa por coluna (None = etapa vazia)
+def _without_columns(step: dict, columns: set):
+    if step["op"] not in ("clean_text", "fillna", "categorize"):
+        return step
+    kept = [c for c in step["columns"] if c not in columns]
+    return dict(step, columns=kept) if kept else None
+
+
+# Define uma função que reescreve a lista de etapas em um plano otimizado
+def optimize(steps) -> list:
+    """Retorna os nós do plano, executados em ordem por run_plan:
+
+    1. remoções de colunas sobem o máximo possível, e as etapas por coluna ultrapassadas deixam de
+       processar as colunas que seriam removidas depois;
+    2. filtros consecutivos (nulos por linha, outliers) viram um nó "filter", uma máscara só;
+    3. etapas por coluna consecutivas (texto, tipagem, preenchimento, categorias) viram um nó "map",
+       uma passada por coluna.
+    O resultado final é o mesmo de aplicar as etapas uma a uma.
+    """
+    # Quebra as etapas compostas (tratamento de nulos) em operações atômicas
+    atoms = [atom for spec in steps for atom in expand_step(spec)]
+
+    # 1) Sobe as remoções de colunas
+    out = []
+    for step in atoms:
+        if step["op"] != "drop_columns":
+            out.append(step)
+            continue
+        columns = set(step["columns"])
+        i = len(out)
+        while i > 0 and _drop_commutes(out[i - 1], columns):
+            i -= 1
+        passed = [s for s in (_without_columns(s, columns) for s in out[i:]) if s is not None]
+        # Junta com uma remoção de colunas que já esteja nessa posição
+        if i > 0 and out[i - 1]["op"] == "drop_columns":
+            prev = out[i - 1]
+            out[i - 1] = dict(prev, columns=list(prev["columns"]) + [c for c in step["columns"] if c not in prev["columns"]])
+            out = out[:i] + passed
+        else:
+            out = out[:i] + [step] + passed
+
+    # 2 e 3) Agrupa filtros e etapas por coluna consecutivos
+    nodes = []
+    for step in out:
+        kind = "map" if step["op"] in COLUMN_OPS else "filter" if step["op"] in FILTER_OPS else None
+        if kind is not None and nodes and nodes[-1]["op"] == kind:
+            nodes[-1]["steps"].append(step)
+        elif kind is not None:
+            nodes.append({"op": kind, "steps": [step]})
+        else:
+            nodes.append(step)
+    # Grupos de uma etapa só continuam como a própria etapa
+    return [n["steps"][0] if n["op"] in ("map", "filter") and len(n["steps"]) == 1 else n for n in nodes]
+
+
+# Define uma função que aplica a uma coluna, em sequência, as etapas por coluna que a afetam
+def _run_column_chain(s: pd.Series, chain: list):
+    """Retorna a coluna transformada e o resultado da tipagem ((tipo, detalhes) ou None)."""
+    typed = None
+    for step in chain:
+        op = step["op"]
+        if op == "clean_text":
+            s = clean_text_column(s, **text_options(step))
+        elif op == "auto_types":
+            # Só colunas que ainda são texto neste ponto da cadeia
+            result = None
+            if is_text_dtype(s) and (step.get("convert_numbers", True) or step.get("convert_dates", True)):
+                result = infer_column_type(
+                    s, step.get("convert_numbers", True), step.get("convert_dates", True), step.get("threshold", 0.7),
+                    step.get("decimal", "."), step.get("downcast", True), step.get("allow_float32", False))
+            if result is not None:
+                kind, s, details = result
+                typed = (kind, details)
+        elif op == "fillna":
+            s = fillna_columns(s.to_frame(), [s.name], step["strategy"])[s.name]
+        elif op == "categorize" and not is_categorical(s):
+            s = s.astype("category")
+    return s, typed
+
+
+# Define uma função que executa um nó "map": uma passada por coluna, todas as etapas do grupo de uma vez
+def _run_map(df: pd.DataFrame, steps: list, workers=1):
+    # Etapas que afetam cada coluna (a tipagem vale para todas as colunas de texto)
+    chains = {}
+    for c in df.columns:
+        chain = [s for s in steps if s["op"] == "auto_types" or c in s["columns"]]
+        # Coluna que não é texto e só seria tipada fica de fora
+        if all(s["op"] == "auto_types" for s in chain) and not is_text_dtype(df[c]):
+            continue
+        if chain:
+            chains[c] = chain
+    cols = list(chains)
+    results = map_columns(_run_column_chain, [df[c] for c in cols], workers, per_column=[(chains[c],) for c in cols])
+    # Cópia rasa: só as colunas transformadas são substituídas
+    out = df.copy(deep=False)
+    typed = {}
+    for c, (s, t) in zip(cols, results):
+        out[c] = s
+        if t is not None:
+            typed[c] = t
+    return out, typed
+
+
+# Define uma função que executa um nó "filter": combina os filtros numa máscara e materializa uma vez
+def _run_filter(df: pd.DataFrame, steps: list) -> pd.DataFrame:
+    mask = np.ones(df.shape[0], dtype=bool)
+    for step in steps:
+        if step["op"] == "dropna":
+            mask &= df[step["columns"]].notna().all(axis=1).to_numpy()
+        else:
+            # Quartis calculados só sobre as linhas que sobraram dos filtros anteriores (como na execução etapa a etapa)
+            bounds = iqr_bounds(df.loc[mask, step["columns"]], step["columns"], step.get("factor", 1.5),
+                                step.get("approx", False))
+            mask &= ~outlier_flags(df, step["columns"], bounds).any(axis=1)
+    return df[mask]
+
+
+# Define uma função que otimiza e executa uma lista de etapas, retornando (DataFrame, informações)
+def run_plan(df: pd.DataFrame, steps, workers=1, engine=None):
+    """As informações seguem as de apply_step (linhas removidas, colunas convertidas, formatos), mais
+    o número de passadas ('passes') do plano otimizado. Nós que não foram agrupados rodam no 'engine'
+    (ver engines.py; padrão: pandas). Nós consecutivos que o motor encadeia (ex: Polars) rodam de uma vez
+    no motor, sem voltar ao pandas entre eles."""
+    nodes = optimize(steps)
+    before = df.shape[0]
+    info = {"converted": {}, "datetime_formats": {}, "number_formats": {}}
+    chained = []
+    for node in nodes + [None]:
+        atoms = None if node is None else node["steps"] if node["op"] in ("map", "filter") else [node]
+        if engine is not None and atoms is not None and all(engine.chains(a) for a in atoms):
+            chained += atoms
+            continue
+        if chained:
+            df, _ = engine.run_steps(df, chained, workers)
+            chained = []
+        if node is None:
+            break
+        if node["op"] == "map":
+            df, typed = _run_map(df, node["steps"], workers)
+            for c, (kind, details) in typed.items():
+                info["converted"][c] = kind
+                info["number_formats" if kind == "numeric" else "datetime_formats"][c] = details
+        elif node["op"] == "filter":
+            df = _run_filter(df, node["steps"])
+        else:
+            df, step_info = (engine.apply_step if engine is not None else apply_step)(df, node, workers=workers)
+            for key in ("converted", "datetime_formats", "number_formats"):
+                info[key].update(step_info.get(key, {}))
+    info["removed"] = before - df.shape[0]
+    info["passes"] = len(nodes)
+    return df, info
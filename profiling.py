@@ -0,0 +1,50 @@
+# Perfil das colunas em uma passada por coluna: nulos, tipo, memória, mínimo/máximo e valores únicos
+
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+
+# Importa o executor por coluna (threads ou processos)
+from parallel import map_columns
+# Importa o estimador aproximado de distintos
+from sketches import HyperLogLog
+
+# Colunas do resumo por coluna, na ordem exibida
+PROFILE_COLUMNS = ["coluna", "dtype", "nulos", "percent_nulos", "unicos", "memoria_mb", "min", "max"]
+
+
+# Define uma função que calcula o perfil de uma coluna reaproveitando a máscara de nulos
+def profile_column(series: pd.Series, approx_distinct=False, precision=12) -> dict:
+    # A máscara de nulos é calculada uma vez e serve para contagem, percentual e valores não nulos
+    na = series.isna().to_numpy()
+    n_null = int(na.sum())
+    values = series[~na]
+    # Valores distintos: exatos (tabela hash) ou estimados pelo HyperLogLog
+    if approx_distinct:
+        hll = HyperLogLog(precision)
+        hll.add_hashes(pd.util.hash_pandas_object(values, index=False).to_numpy())
+        unique = hll.estimate()
+    else:
+        unique = len(pd.unique(values))
+    # Mínimo e máximo só para tipos ordenáveis de forma barata (números, datas, booleanos)
+    lo = hi = None
+    if len(values) and (pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series)):
+        lo, hi = values.min(), values.max()
+    return {
+        "coluna": series.name,
+        "dtype": str(series.dtype),
+        "nulos": n_null,
+        "percent_nulos": float(n_null / len(series) * 100) if len(series) else float("nan"),
+        "unicos": int(unique),
+        "memoria_mb": series.memory_usage(deep=True, index=False) / 2**20,
+        "min": lo,
+        "max": hi,
+    }
+
+
+# Define uma função que calcula o perfil de todas as colunas, opcionalmente em paralelo
+def profile_frame(df: pd.DataFrame, approx_distinct=False, workers=1) -> pd.DataFrame:
+    """Com workers > 1 as colunas são perfiladas em threads (hash e contagens do pandas/NumPy liberam o GIL)."""
+    # Pega cada coluna por posição (nomes repetidos não quebram o perfil)
+    cols = [df.iloc[:, i] for i in range(df.shape[1])]
+    rows = map_columns(profile_column, cols, workers, backend="thread", approx_distinct=approx_distinct)
+    return pd.DataFrame(rows, columns=PROFILE_COLUMNS)
@@ -0,0 +1,121 @@
+# Receitas: as etapas de uma sessão em formato legível por máquina (JSON/YAML), reaplicáveis em lote
+
+# Importa o módulo json para gravar/ler receitas
+import json
+# Importa o módulo os para lidar com caminhos e extensões
+import os
+# Importa o módulo time para medir o tempo de cada arquivo
+import time
+
+# PyYAML é opcional: receitas em JSON funcionam sem ele
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+# Importa os motores de execução das etapas
+from engines import get_engine
+# Importa a gravação da saída nos formatos de exportação
+from export import write_export
+# Importa a leitura de CSV e a detecção de encoding de arquivos em disco
+from loading import detect_encoding_file, needs_sniff, read_csv_file, resolve_dialect, sniff_dialect_file
+# Importa o pipeline em blocos para arquivos maiores que a memória
+from streaming import StreamingPipeline
+
+# Versão do formato de receita gravado
+RECIPE_VERSION = 1
+
+
+# Define uma função que monta a receita a partir das opções de leitura e dos specs das etapas
+def make_recipe(steps, sep=",", has_header=True, na_values=None, arrow=False, quotechar='"') -> dict:
+    return {
+        "version": RECIPE_VERSION,
+        # O encoding não entra na receita: é detectado de novo em cada arquivo (assim como as opções "auto")
+        "read": {"sep": sep, "has_header": has_header, "quotechar": quotechar, "na_values": list(na_values or []),
+                 "arrow": arrow},
+        "steps": list(steps),
+    }
+
+
+# Define uma função que serializa a receita em texto (JSON por padrão, YAML se pedido)
+def dumps_recipe(recipe: dict, fmt="json") -> str:
+    if fmt == "yaml":
+        if yaml is None:
+            raise RuntimeError("Instale o PyYAML para gravar receitas em YAML (pip install pyyaml).")
+        return yaml.safe_dump(recipe, allow_unicode=True, sort_keys=False)
+    return json.dumps(recipe, ensure_ascii=False, indent=2)
+
+
+# Define uma função que lê uma receita de texto JSON ou YAML e valida o básico
+def loads_recipe(text: str, fmt="json") -> dict:
+    if fmt == "yaml":
+        if yaml is None:
+            raise RuntimeError("Instale o PyYAML para ler receitas em YAML (pip install pyyaml).")
+        recipe = yaml.safe_load(text)
+    else:
+        recipe = json.loads(text)
+    # Uma receita precisa ter a lista de etapas e uma versão conhecida
+    if not isinstance(recipe, dict) or not isinstance(recipe.get("steps"), list):
+        raise ValueError("Receita inválida: esperado um objeto com a lista 'steps'.")
+    if recipe.get("version", RECIPE_VERSION) > RECIPE_VERSION:
+        raise ValueError(f"Receita na versão {recipe['version']}; esta versão do app lê até a {RECIPE_VERSION}.")
+    recipe.setdefault("read", {})
+    return recipe
+
+
+# Define uma função que descobre o formato da receita pela extensão do arquivo
+def _recipe_format(path) -> str:
+    return "yaml" if os.path.splitext(str(path))[1].lower() in (".yaml", ".yml") else "json"
+
+
+# Define uma função que grava a receita em disco
+def save_recipe(recipe: dict, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(dumps_recipe(recipe, _recipe_format(path)))
+
+
+# Define uma função que lê a receita do disco
+def load_recipe(path) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return loads_recipe(f.read(), _recipe_format(path))
+
+
+# Define uma função que reaplica as etapas de uma receita sobre um DataFrame em memória
+def replay(df, steps, workers=1, engine="pandas"):
+    """Retorna o DataFrame final e a lista de informações (linhas removidas, colunas convertidas...) de cada etapa."""
+    return get_engine(engine).run_steps(df, steps, workers)
+
+
+# Define uma função que aplica a receita a um arquivo CSV em disco e grava o resultado
+def run_file(recipe: dict, in_path, out_path, chunksize=None, sep_out=";", fmt="csv", workers=1,
+             engine="pandas") -> dict:
+    """Com 'chunksize' usa o pipeline em blocos (arquivo maior que a memória); sem ele, lê o arquivo inteiro.
+
+    'fmt' é um dos formatos de export.EXPORT_FORMATS (em blocos, só os formatos CSV);
+    'workers' é o número de colunas processadas em paralelo dentro do arquivo;
+    'engine' é o motor das etapas no arquivo inteiro (o pipeline em blocos usa sempre o pandas).
+    """
+    start = time.perf_counter()
+    # Detecta o encoding lendo só os trechos amostrados do arquivo
+    enc = detect_encoding_file(in_path)["encoding"]
+    read = dict(recipe.get("read", {}), encoding=enc)
+    # Separador, aspas ou cabeçalho "auto": detectados no prefixo de cada arquivo
+    if needs_sniff(read):
+        read = resolve_dialect(read, sniff_dialect_file(in_path, enc))
+    if chunksize:
+        # Reaplica as etapas bloco a bloco, gravando a saída incrementalmente
+        report = StreamingPipeline(recipe["steps"], workers=workers).run(
+            lambda: read_csv_file(in_path, chunksize=chunksize, **read), out_path, sep=sep_out, fmt=fmt,
+        )
+        rows_in, rows_out = report["rows_in"], report["rows_out"]
+    else:
+        # Lê o arquivo uma única vez, reaplica as etapas e grava
+        df = read_csv_file(in_path, **read)
+        rows_in = df.shape[0]
+        df, _ = replay(df, recipe["steps"], workers, engine)
+        write_export(df, out_path, fmt, sep=sep_out)
+        rows_out = df.shape[0]
+    return {
+        "input": str(in_path), "output": str(out_path), "encoding": enc,
+        "rows_in": rows_in, "rows_out": rows_out, "seconds": round(time.perf_counter() - start, 3),
+    }
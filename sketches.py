@@ -0,0 +1,250 @@
+# Resumos aproximados (sketches) usados quando os dados são processados em blocos
+
+# Importa a biblioteca numpy para operações numéricas vetorizadas
+import numpy as np
+# Importa a biblioteca pandas para manipulação de séries
+import pandas as pd
+
+
+# Define uma classe que mantém uma amostra uniforme (reservatório) dos valores vistos, para estimar quantis
+class QuantileReservoir:
+    """Amostragem por reservatório (algoritmo R, vetorizado por bloco).
+
+    Enquanto o total de valores não passa da capacidade, os quantis são exatos;
+    depois disso, são estimados a partir de uma amostra uniforme de 'capacity' valores.
+    """
+
+    def __init__(self, capacity=100_000, seed=42):
+        # Capacidade máxima da amostra
+        self.capacity = capacity
+        # Gerador aleatório com semente fixa para resultados reprodutíveis
+        self.rng = np.random.default_rng(seed)
+        # Valores amostrados até agora
+        self.sample = np.empty(0, dtype="float64")
+        # Total de valores não nulos vistos
+        self.count = 0
+
+    def update(self, series: pd.Series):
+        # Considera apenas os valores não nulos, como float
+        values = pd.to_numeric(series, errors="coerce").dropna().to_numpy(dtype="float64")
+        if len(values) == 0:
+            return
+        # Enche o reservatório até a capacidade
+        free = self.capacity - len(self.sample)
+        if free > 0:
+            self.sample = np.concatenate([self.sample, values[:free]])
+            self.count += min(free, len(values))
+            values = values[free:]
+        if len(values) == 0:
+            return
+        # Posição global (1-based) de cada valor restante no fluxo
+        positions = self.count + np.arange(1, len(values) + 1)
+        # Cada valor entra com probabilidade capacity/posição, numa posição aleatória
+        slots = (self.rng.random(len(values)) * positions).astype("int64")
+        accepted = slots < self.capacity
+        # Atribuição vetorizada: em slots repetidos vale o último, como no algoritmo sequencial
+        self.sample[slots[accepted]] = values[accepted]
+        self.count += len(values)
+
+    def quantile(self, q):
+        # Sem valores, o quantil é indefinido
+        if len(self.sample) == 0:
+            return np.nan
+        # Interpolação linear, a mesma usada por pandas.Series.quantile
+        return float(np.quantile(self.sample, q))
+
+    @property
+    def exact(self) -> bool:
+        # Os quantis são exatos enquanto todos os valores couberam na amostra
+        return self.count <= self.capacity
+
+
+# Parâmetro de precisão padrão do KLL: erro de posição típico bem abaixo de 1% guardando poucos milhares de valores
+KLL_DEFAULT_K = 2000
+
+
+# Define uma classe que estima quantis de um fluxo de valores com memória limitada (sketch KLL)
+class KLLSketch:
+    """Sketch KLL (Karnin, Lang e Liberty): compactadores empilhados; cada valor no nível h representa 2^h valores.
+
+    Um nível cheio é ordenado e metade dos valores (os de posição par ou ímpar, sorteado) sobe para o nível
+    seguinte. O nível mais alto guarda até 'k' valores e os de baixo, capacidades decrescentes (fator 2/3),
+    então a memória fica em torno de 3k valores para qualquer tamanho de fluxo. Enquanto nada foi
+    compactado (até k valores), os quantis são exatos. Cada bloco é inserido de forma vetorizada, em fatias de k.
+    """
+
+    def __init__(self, k=KLL_DEFAULT_K, seed=42):
+        # Capacidade do nível mais alto
+        self.k = k
+        # Gerador aleatório com semente fixa para resultados reprodutíveis
+        self.rng = np.random.default_rng(seed)
+        # Valores guardados em cada nível (o nível h pesa 2^h)
+        self.levels = [np.empty(0, dtype="float64")]
+        # Total de valores não nulos vistos
+        self.count = 0
+
+    def _capacity(self, h: int) -> int:
+        # Níveis mais baixos guardam menos valores: k * (2/3)^(distância até o topo), no mínimo 2
+        return max(int(np.ceil(self.k * (2 / 3) ** (len(self.levels) - 1 - h))), 2)
+
+    def update(self, series: pd.Series):
+        # O bloco entra em fatias de 'k' linhas, compactando a cada fatia: memória extra e ordenação ficam em O(k),
+        # qualquer que seja o tamanho do bloco
+        for start in range(0, len(series), self.k):
+            # Considera apenas os valores não nulos, como float
+            part = series.iloc[start:start + self.k]
+            values = pd.to_numeric(part, errors="coerce").dropna().to_numpy(dtype="float64")
+            if len(values) == 0:
+                continue
+            self.count += len(values)
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+
+    def _compress(self):
+        # Compacta de baixo para cima até todos os níveis caberem (um nível novo reduz as capacidades de baixo)
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) <= self._capacity(h):
+                h += 1
+                continue
+            if h + 1 == len(self.levels):
+                self.levels.append(np.empty(0, dtype="float64"))
+            level = np.sort(level)
+            # Com número ímpar de valores, o último fica neste nível
+            kept, level = level[len(level) - len(level) % 2:], level[:len(level) - len(level) % 2]
+            promoted = level[self.rng.integers(2)::2]
+            self.levels[h] = kept
+            self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            # Níveis de baixo podem ter ficado acima da nova capacidade: recomeça do início
+            h = 0
+
+    def quantile(self, q):
+        # Sem valores, o quantil é indefinido
+        if self.count == 0:
+            return np.nan
+        # Nada compactado: quantil exato, com a interpolação linear do pandas
+        if self.exact:
+            return float(np.quantile(self.levels[0], q))
+        # Posição acumulada (no meio do peso de cada valor) e interpolação entre os valores ordenados
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(lv), 2.0 ** h) for h, lv in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        values, weights = values[order], weights[order]
+        positions = (np.cumsum(weights) - weights / 2) / weights.sum()
+        return float(np.interp(q, positions, values))
+
+    @property
+    def exact(self) -> bool:
+        # Os quantis são exatos enquanto só existe o nível 0 (nenhuma compactação)
+        return len(self.levels) == 1
+
+    @property
+    def size(self) -> int:
+        # Quantidade de valores guardados (a memória do sketch)
+        return sum(len(lv) for lv in self.levels)
+
+
+# Define uma classe que mantém uma amostra uniforme de linhas de um CSV lido em blocos
+class RowReservoir:
+    """Amostragem por prioridade: cada linha recebe uma chave aleatória e a amostra são as 'capacity' linhas
+    de menores chaves (o mesmo que sortear 'capacity' linhas sem reposição, sem saber o total de antemão).
+
+    As linhas mantêm o índice do leitor (posição no arquivo) e a ordem original.
+    """
+
+    def __init__(self, capacity=100_000, seed=42):
+        # Capacidade máxima da amostra
+        self.capacity = capacity
+        # Gerador aleatório com semente fixa para resultados reprodutíveis
+        self.rng = np.random.default_rng(seed)
+        # Linhas amostradas até agora e as chaves delas
+        self.sample = None
+        self.keys = np.empty(0, dtype="float64")
+        # Total de linhas vistas
+        self.count = 0
+
+    def update(self, chunk: pd.DataFrame):
+        keys = self.rng.random(len(chunk))
+        self.count += len(chunk)
+        # Com a amostra cheia, só entram linhas com chave menor que a maior chave guardada
+        if len(self.keys) >= self.capacity:
+            enter = keys < self.keys.max()
+            chunk, keys = chunk[enter], keys[enter]
+        if self.sample is not None:
+            chunk = pd.concat([self.sample, chunk])
+            keys = np.concatenate([self.keys, keys])
+        # Mantém as 'capacity' menores chaves, na ordem original das linhas
+        if len(keys) > self.capacity:
+            keep = np.sort(np.argpartition(keys, self.capacity)[:self.capacity])
+            chunk, keys = chunk.iloc[keep], keys[keep]
+        self.sample, self.keys = chunk, keys
+
+    def result(self) -> pd.DataFrame:
+        return self.sample
+
+    @property
+    def exact(self) -> bool:
+        # A amostra é o arquivo inteiro enquanto todas as linhas couberam nela
+        return self.count <= self.capacity
+
+
+# Define uma função que conta os zeros à esquerda de inteiros de 64 bits, de forma vetorizada
+def _clz64(x: np.ndarray) -> np.ndarray:
+    x = x.astype("uint64", copy=True)
+    n = np.zeros(len(x), dtype="int64")
+    # Busca binária: se os 's' bits mais altos são zero, soma 's' e desloca
+    for s in (32, 16, 8, 4, 2, 1):
+        top_zero = (x >> np.uint64(64 - s)) == 0
+        n += s * top_zero
+        x = np.where(top_zero, x << np.uint64(s), x)
+    # Se ainda restou zero, o número inteiro era zero (64 zeros à esquerda)
+    return n + (x == 0)
+
+
+# Define uma classe que estima o número de valores distintos com memória fixa (HyperLogLog)
+class HyperLogLog:
+    """Contagem aproximada de distintos sobre hashes de 64 bits.
+
+    Usa 2**precision registradores de 1 byte; o erro padrão relativo é 1.04 / sqrt(2**precision)
+    (≈ 1,6% com precision=12, usando 4 KB). Sketches com a mesma precisão podem ser unidos (merge).
+    """
+
+    def __init__(self, precision=12):
+        self.p = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype="uint8")
+
+    @property
+    def relative_error(self) -> float:
+        # Erro padrão relativo da estimativa
+        return 1.04 / np.sqrt(self.m)
+
+    def add_hashes(self, hashes: np.ndarray):
+        h = np.asarray(hashes, dtype="uint64")
+        if len(h) == 0:
+            return
+        # Os 'p' bits mais altos escolhem o registrador
+        idx = (h >> np.uint64(64 - self.p)).astype("int64")
+        # Posição do primeiro bit 1 nos bits restantes (limitada ao tamanho do restante)
+        rank = np.minimum(_clz64(h << np.uint64(self.p)) + 1, 64 - self.p + 1).astype("uint8")
+        # Cada registrador guarda o maior rank visto
+        np.maximum.at(self.registers, idx, rank)
+
+    def add_series(self, series: pd.Series):
+        # Ignora nulos e usa o hash de 64 bits do pandas para cada valor
+        self.add_hashes(pd.util.hash_pandas_object(series.dropna(), index=False).to_numpy())
+
+    def merge(self, other: "HyperLogLog"):
+        # A união de dois conjuntos é o máximo registrador a registrador
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        est = alpha * m * m / np.sum(np.exp2(-self.registers.astype("float64")))
+        # Correção para cardinalidades pequenas (contagem linear)
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if est <= 2.5 * m and zeros > 0:
+            est = m * np.log(m / zeros)
+        return int(round(est))
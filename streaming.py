@@ -0,0 +1,328 @@
+# Pipeline de limpeza em blocos (out-of-core) para CSVs maiores que a memória
+
+# Importa a biblioteca numpy para operações numéricas vetorizadas
+import numpy as np
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+
+# Importa as etapas de limpeza compartilhadas com o modo em memória
+from cleaning import (
+    STAT_FILL_STRATEGIES,
+    apply_types,
+    categorize,
+    clean_text,
+    coerce_numeric,
+    drop_columns,
+    expand_step,
+    fillna_columns,
+    infer_datetime_format,
+    infer_number_format,
+    is_text_dtype,
+    remove_outliers_iqr,
+    standardize_colnames,
+    text_options,
+    to_datetime_safe,
+)
+# Importa a abertura da saída CSV (pura, gzip ou zip)
+from export import open_text_output
+# Importa os hashes de linha e o particionamento em disco usados para duplicadas entre blocos
+from fingerprints import HashPartitioner, mask_slice, row_fingerprints
+# Importa o reservatório usado para estimar medianas e quartis em blocos
+from sketches import KLLSketch, QuantileReservoir
+
+
+# Coletores: acumulam, bloco a bloco, as estatísticas que uma etapa precisa do arquivo inteiro
+
+
+# Define o coletor da tipagem automática: conta quantos valores de cada coluna viram número/data
+class TypeCollector:
+    def __init__(self, step):
+        self.convert_numbers = step.get("convert_numbers", True)
+        self.convert_dates = step.get("convert_dates", True)
+        self.threshold = step.get("threshold", 0.7)
+        self.decimal = step.get("decimal", ".")
+        self.downcast = step.get("downcast", True)
+        # Colunas que apareceram como texto em algum bloco, na ordem em que foram vistas
+        self.text_cols = {}
+        # Contadores por coluna: não nulos, convertidos para número e para data
+        self.non_null, self.num_ok, self.dt_ok = {}, {}, {}
+        # Colunas cuja conversão numérica gerou float / valores não inteiros em algum bloco
+        self.floats, self.non_integral = set(), set()
+        # Separadores (decimal, milhar) escolhidos pela amostra do primeiro bloco de texto (None = não parece número)
+        self.number_formats = {}
+        # Formatos de data escolhidos pela amostra do primeiro bloco de texto (None = não parece data)
+        self.date_formats = {}
+
+    def update(self, chunk: pd.DataFrame):
+        for c in chunk.columns:
+            s = chunk[c]
+            non_null = int(s.notna().sum())
+            self.non_null[c] = self.non_null.get(c, 0) + non_null
+            if not is_text_dtype(s):
+                # Blocos já numéricos contam como convertidos com sucesso
+                if pd.api.types.is_numeric_dtype(s):
+                    self.num_ok[c] = self.num_ok.get(c, 0) + non_null
+                    self._track_float(c, s)
+                continue
+            self.text_cols[c] = True
+            if self.convert_numbers:
+                # A amostra do primeiro bloco de texto escolhe os separadores (e rejeita texto livre) para todos os blocos
+                if c not in self.number_formats:
+                    dec, thousands, share = infer_number_format(s, self.decimal)
+                    self.number_formats[c] = {"decimal": dec, "thousands": thousands} if share >= self.threshold else None
+                if self.number_formats[c] is not None:
+                    conv = coerce_numeric(s, **self.number_formats[c])
+                    self.num_ok[c] = self.num_ok.get(c, 0) + int(conv.notna().sum())
+                    self._track_float(c, conv)
+            if self.convert_dates:
+                # A amostra de 200 valores do primeiro bloco de texto escolhe os formatos usados em todos os blocos
+                if c not in self.date_formats:
+                    fmt, share = infer_datetime_format(s)
+                    self.date_formats[c] = fmt if share >= self.threshold else None
+                if self.date_formats[c] is not None:
+                    conv = to_datetime_safe(s, format=self.date_formats[c])
+                    self.dt_ok[c] = self.dt_ok.get(c, 0) + int(conv.notna().sum())
+
+    def _track_float(self, c, s: pd.Series):
+        # Registra se o bloco gerou float e se há valores não inteiros (que impedem estreitar para inteiro)
+        if pd.api.types.is_float_dtype(s):
+            self.floats.add(c)
+            v = s.dropna()
+            if not (np.isfinite(v) & (v == v.round())).all():
+                self.non_integral.add(c)
+
+    def result(self) -> dict:
+        types = {}
+        for c in self.text_cols:
+            non_null = self.non_null.get(c, 0)
+            if non_null == 0:
+                continue
+            # Mesma regra do modo em memória: números primeiro, depois datas
+            if self.convert_numbers and self.num_ok.get(c, 0) / non_null >= self.threshold:
+                types[c] = "numeric"
+            elif self.convert_dates and self.dt_ok.get(c, 0) >= self.threshold * non_null:
+                types[c] = "datetime"
+        numeric = {c for c, k in types.items() if k == "numeric"}
+        # Como no modo em memória, colunas só com valores inteiros viram inteiro anulável (Int64) em todos os blocos
+        integers = numeric - self.non_integral if self.downcast else set()
+        # As demais colunas numéricas que geraram float em algum bloco ficam float em todos
+        return {
+            "types": types,
+            "integers": integers,
+            "floats": (self.floats & numeric) - integers,
+            "formats": {c: self.date_formats[c] for c, k in types.items() if k == "datetime"},
+            "number_formats": {c: self.number_formats.get(c) for c in numeric},
+        }
+
+
+# Define o coletor do preenchimento de nulos: média, mediana, moda, mínimo ou máximo do arquivo inteiro
+class FillCollector:
+    def __init__(self, step, quantile_capacity):
+        self.strategy = step["strategy"]
+        self.columns = step["columns"]
+        # Soma e contagem (média), reservatório (mediana), contagens de valores (moda), extremos (datas)
+        self.sums = {c: 0.0 for c in self.columns}
+        self.counts = {c: 0 for c in self.columns}
+        self.reservoirs = {c: QuantileReservoir(quantile_capacity) for c in self.columns}
+        self.freqs = {c: None for c in self.columns}
+        self.mins, self.maxs = {}, {}
+
+    def update(self, chunk: pd.DataFrame):
+        for c in self.columns:
+            s = chunk[c].dropna()
+            if s.empty:
+                continue
+            if self.strategy == "mean":
+                self.sums[c] += float(pd.to_numeric(s, errors="coerce").sum())
+                self.counts[c] += len(s)
+            elif self.strategy == "median":
+                self.reservoirs[c].update(s)
+            elif self.strategy == "mode":
+                vc = s.value_counts()
+                self.freqs[c] = vc if self.freqs[c] is None else self.freqs[c].add(vc, fill_value=0)
+            elif self.strategy == "min":
+                self.mins[c] = min(self.mins.get(c, s.min()), s.min())
+            elif self.strategy == "max":
+                self.maxs[c] = max(self.maxs.get(c, s.max()), s.max())
+
+    def result(self) -> dict:
+        values = {}
+        for c in self.columns:
+            if self.strategy == "mean":
+                values[c] = self.sums[c] / self.counts[c] if self.counts[c] else np.nan
+            elif self.strategy == "median":
+                values[c] = self.reservoirs[c].quantile(0.5)
+            elif self.strategy == "mode":
+                vc = self.freqs[c]
+                if vc is None or vc.empty:
+                    values[c] = "DESCONHECIDO"
+                else:
+                    # Em caso de empate, pandas.Series.mode devolve o menor valor; fazemos o mesmo
+                    values[c] = sorted(vc[vc == vc.max()].index)[0]
+            elif self.strategy == "min":
+                values[c] = self.mins.get(c)
+            elif self.strategy == "max":
+                values[c] = self.maxs.get(c)
+        return values
+
+
+# Define o coletor dos outliers: estima Q1 e Q3 de cada coluna e devolve os limites IQR
+class IQRCollector:
+    def __init__(self, step, quantile_capacity):
+        self.columns = step["columns"]
+        self.factor = step.get("factor", 1.5)
+        # Quartis aproximados pedidos na etapa: sketch KLL (poucos milhares de valores por coluna) no lugar da amostra
+        self.reservoirs = {c: KLLSketch() if step.get("approx") else QuantileReservoir(quantile_capacity)
+                           for c in self.columns}
+
+    def update(self, chunk: pd.DataFrame):
+        for c in self.columns:
+            self.reservoirs[c].update(chunk[c])
+
+    def result(self) -> dict:
+        bounds = {}
+        for c, r in self.reservoirs.items():
+            q1, q3 = r.quantile(0.25), r.quantile(0.75)
+            iqr = q3 - q1
+            bounds[c] = (q1 - self.factor * iqr, q3 + self.factor * iqr)
+        return bounds
+
+
+# Define o coletor de duplicadas: particiona os hashes das linhas em disco e decide quais linhas manter
+class DedupCollector:
+    def __init__(self, step, partitions, tmp_dir):
+        self.subset = step.get("subset") or None
+        self.partitioner = HashPartitioner(partitions, step.get("keep", "first"), tmp_dir)
+
+    def update(self, chunk: pd.DataFrame):
+        self.partitioner.update(row_fingerprints(chunk, self.subset))
+
+    def result(self) -> dict:
+        return self.partitioner.result()
+
+
+# Pipeline
+
+
+# Define a classe que executa as etapas bloco a bloco e grava a saída incrementalmente
+class StreamingPipeline:
+    """Executa uma lista de specs (as mesmas do modo em memória) sobre um CSV lido em blocos.
+
+    Etapas que dependem do arquivo inteiro (tipagem, média/mediana/moda, limites IQR,
+    duplicadas) ganham uma passagem de coleta antes da passagem final;
+    medianas e quartis vêm de um reservatório de 'quantile_capacity' valores por coluna.
+    Duplicadas entre blocos são detectadas por hash de 64 bits das linhas (ou das colunas-chave),
+    particionados em 'dedup_partitions' arquivos em 'tmp_dir' para não precisar caber na memória.
+    'workers' é o número de colunas limpas/convertidas em paralelo em cada bloco.
+    """
+
+    def __init__(self, steps, quantile_capacity=100_000, dedup_partitions=64, tmp_dir=None, workers=1):
+        # Quebra as etapas compostas (tratamento de nulos) em operações atômicas
+        self.steps = [atom for spec in steps for atom in expand_step(spec)]
+        self.quantile_capacity = quantile_capacity
+        self.dedup_partitions = dedup_partitions
+        self.tmp_dir = tmp_dir
+        self.workers = workers
+        # Estatísticas coletadas, por índice de etapa
+        self.stats = {}
+
+    def _collector(self, step):
+        # Retorna o coletor da etapa, ou None se ela não precisa de estatísticas globais
+        op = step["op"]
+        if op == "auto_types":
+            return TypeCollector(step)
+        if op == "fillna" and step["strategy"] in STAT_FILL_STRATEGIES:
+            return FillCollector(step, self.quantile_capacity)
+        if op == "remove_outliers":
+            return IQRCollector(step, self.quantile_capacity)
+        if op == "drop_duplicates":
+            return DedupCollector(step, self.dedup_partitions, self.tmp_dir)
+        return None
+
+    def _apply_one(self, i, chunk: pd.DataFrame, state: dict) -> pd.DataFrame:
+        # Aplica a etapa i a um bloco, usando as estatísticas globais e o estado da passagem
+        step = self.steps[i]
+        op = step["op"]
+        if op == "standardize_colnames":
+            return standardize_colnames(chunk)
+        if op == "clean_text":
+            opts = text_options(step)
+            return clean_text(chunk, step["columns"], opts.pop("collapse_spaces"), self.workers, **opts)
+        if op == "auto_types":
+            stats = self.stats[i]
+            out = apply_types(chunk, stats["types"], stats["formats"], stats["number_formats"], self.workers)
+            # Mantém o mesmo dtype em todos os blocos para a saída ficar consistente
+            for c in stats["integers"]:
+                if c in out.columns:
+                    out[c] = out[c].astype("Int64")
+            for c in stats["floats"]:
+                if c in out.columns:
+                    out[c] = out[c].astype("float64")
+            return out
+        if op == "drop_duplicates":
+            return self._drop_duplicates(i, chunk, state)
+        if op == "dropna":
+            return chunk.dropna(subset=step["columns"])
+        if op == "fillna":
+            return fillna_columns(chunk, step["columns"], step["strategy"], values=self.stats.get(i))
+        if op == "remove_outliers":
+            return remove_outliers_iqr(chunk, step["columns"], bounds=self.stats[i])
+        if op == "drop_columns":
+            return drop_columns(chunk, step["columns"])
+        if op == "categorize":
+            return categorize(chunk, step["columns"])
+        raise ValueError(f"Etapa desconhecida: {op}")
+
+    def _drop_duplicates(self, i, chunk, state):
+        # Mantém a linha se o bit da posição dela estiver ligado na máscara calculada na passagem de coleta
+        start = state.get(i, 0)
+        state[i] = start + len(chunk)
+        return chunk[mask_slice(self.stats[i]["keep"], start, len(chunk))]
+
+    def _apply(self, chunk, upto, state):
+        # Aplica as etapas [0, upto) a um bloco
+        for i in range(upto):
+            chunk = self._apply_one(i, chunk, state)
+        return chunk
+
+    def run(self, open_chunks, out_path, sep=";", encoding="utf-8-sig", progress=None, fmt="csv", columns=None) -> dict:
+        """'open_chunks' é uma função que devolve um novo iterador de blocos a cada passagem.
+
+        'fmt' escolhe a saída em texto: "csv", "csv.gz" ou "zip".
+
+        'columns' são as colunas lidas do arquivo: se nenhum bloco chegar, o cabeçalho sai delas (depois das
+        etapas, como na exportação em memória).
+
+        'progress(passagem, total_de_passagens, linhas_lidas)' é chamada após cada bloco.
+        """
+        # Etapas que precisam de uma passagem de coleta antes da passagem final
+        stat_steps = [i for i, s in enumerate(self.steps) if self._collector(s) is not None]
+        n_passes = len(stat_steps) + 1
+        # Passagens de coleta: cada uma aplica as etapas anteriores (já com estatísticas) e coleta a etapa i
+        for p, i in enumerate(stat_steps, start=1):
+            collector = self._collector(self.steps[i])
+            state, rows = {}, 0
+            for chunk in open_chunks():
+                rows += len(chunk)
+                collector.update(self._apply(chunk, i, state))
+                if progress:
+                    progress(p, n_passes, rows)
+            self.stats[i] = collector.result()
+
+        # Passagem final: aplica todas as etapas e grava cada bloco assim que fica pronto
+        state, rows_in, rows_out, chunks = {}, 0, 0, 0
+        with open_text_output(out_path, fmt, encoding) as f:
+            for chunk in open_chunks():
+                rows_in += len(chunk)
+                out = self._apply(chunk, len(self.steps), state)
+                # O cabeçalho é escrito só no primeiro bloco
+                out.to_csv(f, sep=sep, index=False, header=(chunks == 0))
+                rows_out += len(out)
+                chunks += 1
+                if progress:
+                    progress(n_passes, n_passes, rows_in)
+            # Nenhum bloco: grava só o cabeçalho, com as colunas que sairiam das etapas
+            if chunks == 0 and columns is not None:
+                empty = pd.DataFrame({c: pd.Series(dtype=object) for c in columns})
+                self._apply(empty, len(self.steps), state).to_csv(f, sep=sep, index=False)
+        return {"rows_in": rows_in, "rows_out": rows_out, "passes": n_passes, "chunks": chunks}
@@ -0,0 +1,148 @@
+# Gerador de CSVs "sujos" sintéticos e reprodutíveis, usados nos benchmarks
+#
+# Uso:
+#   python synthetic.py sujo.csv --rows 1000000
+#   python synthetic.py sujo.csv --rows 10000000 --encoding utf-8 --seed 7
+
+# Importa o módulo argparse para ler os argumentos da linha de comando
+import argparse
+# Importa o módulo sys para o código de saída
+import sys
+
+# Importa a biblioteca numpy para sortear os valores de forma vetorizada
+import numpy as np
+# Importa a biblioteca pandas para montar e gravar os blocos
+import pandas as pd
+
+# Linhas geradas e gravadas por vez: arquivos de 10 milhões de linhas não passam inteiros pela memória
+GENERATE_CHUNK_ROWS = 250_000
+# Fração de linhas que repetem uma linha anterior do mesmo bloco
+DUPLICATE_FRACTION = 0.03
+# Fração de células (nas colunas que aceitam nulos) trocadas por um marcador de NA
+NA_FRACTION = 0.05
+# Marcadores de NA encontrados em arquivos reais (os padrões da barra lateral do app)
+NA_TOKENS = np.array(["NA", "NaN", "null", "NULL", ""])
+
+# Valores de texto com acentos (o arquivo padrão sai em latin-1)
+FIRST_NAMES = np.array(["Ana", "João", "Maria", "José", "Antônio", "Francisca", "Luís", "Conceição", "Bruno",
+                        "Letícia", "Sérgio", "Fábio", "Inês", "Raí", "Débora"])
+LAST_NAMES = np.array(["Silva", "Souza", "Conceição", "Araújo", "Gonçalves", "Simões", "Magalhães", "Pereira",
+                       "Brandão", "Assunção", "Lima", "Galvão"])
+CITIES = np.array(["São Paulo", "Belém", "Goiânia", "Florianópolis", "Maceió", "Vitória", "Brasília",
+                   "Ribeirão Preto", "Jundiaí", "Cuiabá", "Macapá", "Niterói"])
+STATES = np.array(["SP", "PA", "GO", "SC", "AL", "ES", "DF", "SP", "SP", "MT", "AP", "RJ"])
+STATUSES = np.array(["ativo", "inativo", "pendente", "cancelado", "em análise"])
+# Nomes completos possíveis (nome + sobrenome), montados uma vez
+FULL_NAMES = np.array([f"{a} {b}" for a in FIRST_NAMES for b in LAST_NAMES], dtype=object)
+# Formatos de data misturados na mesma coluna (com peso maior para o formato brasileiro)
+DATE_FORMATS = ["%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y %H:%M"]
+DATE_WEIGHTS = [0.7, 0.2, 0.05, 0.05]
+# Datas sorteadas por hora entre 2015 e 2024
+DATE_START = pd.Timestamp("2015-01-01")
+DATE_HOURS = 3650 * 24
+# Troca de separadores do formato americano ("1,234.56") para o brasileiro ("1.234,56")
+_BR_TABLE = str.maketrans(",.", ".,")
+
+
+# Define uma função que formata números no padrão brasileiro ("1.234,56")
+def format_br(values: np.ndarray) -> list:
+    return [f"{v:,.2f}".translate(_BR_TABLE) for v in values]
+
+
+# Define uma função que formata as datas (horas desde DATE_START), cada uma no formato sorteado
+def _format_dates(hours: np.ndarray, fmt: np.ndarray) -> np.ndarray:
+    out = np.empty(hours.size, dtype=object)
+    for i, f in enumerate(DATE_FORMATS):
+        sel = fmt == i
+        # Formatos sem hora só precisam do dia; cada valor distinto é formatado uma vez só
+        codes = hours[sel] if "%H" in f else hours[sel] // 24 * 24
+        uniq, inverse = np.unique(codes, return_inverse=True)
+        text = (DATE_START + pd.to_timedelta(uniq, unit="h")).strftime(f).to_numpy(dtype=object)
+        out[sel] = text[inverse]
+    return out
+
+
+# Define uma função que sorteia espaços sobrando (início, fim ou duplos) em uma coluna de texto
+def _stray_spaces(values: np.ndarray, rng: np.random.Generator, fraction=0.2) -> np.ndarray:
+    values = values.astype(object)
+    kind = rng.integers(0, 3, values.size)
+    hit = rng.random(values.size) < fraction
+    values[hit & (kind == 0)] = "  " + values[hit & (kind == 0)]
+    values[hit & (kind == 1)] = values[hit & (kind == 1)] + " "
+    values[hit & (kind == 2)] = np.array([v.replace(" ", "   ", 1) for v in values[hit & (kind == 2)]], dtype=object)
+    return values
+
+
+# Define uma função que troca uma fração das células por marcadores de NA
+def _with_na(values: np.ndarray, rng: np.random.Generator, fraction=NA_FRACTION) -> np.ndarray:
+    values = np.asarray(values, dtype=object)
+    hit = rng.random(values.size) < fraction
+    values[hit] = rng.choice(NA_TOKENS, int(hit.sum()))
+    return values
+
+
+# Define uma função que gera um bloco de linhas sujas, todas como texto (como saem de um CSV real)
+def make_dirty_frame(rows: int, seed=0, start_id=1) -> pd.DataFrame:
+    """Colunas: identificador, nome e cidade com acentos e espaços sobrando, UF e status de baixa cardinalidade,
+    valor em formato brasileiro ("1.234,56"), quantidade inteira, data em formatos misturados e um texto livre.
+    Uma fração das linhas repete linhas anteriores (duplicadas) e parte das células traz marcadores de NA."""
+    rng = np.random.default_rng(seed)
+    city = rng.integers(0, CITIES.size, rows)
+    # Valores com cauda longa (outliers) e alguns negativos (estornos)
+    amounts = np.round(rng.lognormal(5, 1.5, rows) * np.where(rng.random(rows) < 0.02, -1, 1), 2)
+    # Datas entre 2015 e 2024, cada uma num dos formatos da coluna
+    date_text = _format_dates(rng.integers(0, DATE_HOURS, rows), rng.choice(len(DATE_FORMATS), rows, p=DATE_WEIGHTS))
+    df = pd.DataFrame({
+        "ID Cliente": np.arange(start_id, start_id + rows).astype(str),
+        "Nome Completo": _with_na(_stray_spaces(rng.choice(FULL_NAMES, rows), rng), rng),
+        "Cidade": _stray_spaces(CITIES[city], rng),
+        "UF": STATES[city],
+        "Valor (R$)": _with_na(format_br(amounts), rng),
+        "Quantidade": _with_na(rng.integers(1, 500, rows).astype(str), rng),
+        "Data Compra": _with_na(date_text, rng),
+        "Status": _with_na(STATUSES[rng.integers(0, STATUSES.size, rows)], rng, 0.02),
+        "Observação": _with_na("pedido nº " + rng.integers(1, 10**6, rows).astype(str).astype(object), rng, 0.6),
+    })
+    # Duplicadas: linhas que repetem exatamente uma linha anterior do bloco
+    dup = np.flatnonzero(rng.random(rows) < DUPLICATE_FRACTION)
+    dup = dup[dup > 0]
+    if dup.size:
+        df.iloc[dup] = df.iloc[rng.integers(0, dup)].to_numpy()
+    return df
+
+
+# Define uma função que grava um CSV sujo em disco, bloco a bloco
+def write_dirty_csv(path, rows: int, seed=0, encoding="latin-1", sep=";", chunk_rows=GENERATE_CHUNK_ROWS) -> dict:
+    """Cada bloco usa sua própria semente derivada de 'seed': o arquivo é o mesmo a cada execução."""
+    written = 0
+    with open(path, "w", encoding=encoding, newline="") as f:
+        while written < rows:
+            n = min(chunk_rows, rows - written)
+            chunk = make_dirty_frame(n, seed=[seed, written], start_id=written + 1)
+            chunk.to_csv(f, sep=sep, index=False, header=written == 0)
+            written += n
+    return {"path": str(path), "rows": written, "encoding": encoding, "sep": sep}
+
+
+# Define o analisador de argumentos da linha de comando
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="synthetic", description="Gera um CSV sujo sintético e reprodutível.")
+    parser.add_argument("output", help="arquivo CSV de saída")
+    parser.add_argument("--rows", type=int, default=100_000, help="número de linhas (padrão: 100000)")
+    parser.add_argument("--seed", type=int, default=0, help="semente (padrão: 0)")
+    parser.add_argument("--encoding", default="latin-1", help="encoding do arquivo (padrão: latin-1)")
+    parser.add_argument("--sep", default=";", help="separador de colunas (padrão: ;)")
+    return parser
+
+
+# Define o ponto de entrada da linha de comando
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    r = write_dirty_csv(args.output, args.rows, args.seed, args.encoding, args.sep)
+    print(f"{r['path']}: {r['rows']} linhas ({r['encoding']}, separador '{r['sep']}')")
+    return 0
+
+
+# Executa o ponto de entrada quando chamado como script
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+# Execução em segundo plano: fases longas (leitura, etapas) numa thread própria, com progresso, ETA e cancelamento
+
+# Importa o módulo itertools para numerar as tarefas
+import itertools
+# Importa o módulo threading para a thread da tarefa e o progresso ligado a ela
+import threading
+# Importa o módulo time para o tempo decorrido e a estimativa do tempo restante
+import time
+
+# Numeração das tarefas do processo (identifica o botão de cancelar de cada uma)
+_ids = itertools.count(1)
+# Progresso da tarefa que roda na thread atual: quem processa coluna a coluna ou bloco a bloco informa o avanço
+# sem receber o progresso como parâmetro (fora de uma tarefa, as chamadas não fazem nada)
+_local = threading.local()
+
+
+# Define a exceção lançada no ponto de controle seguinte a um pedido de cancelamento
+class Cancelled(Exception):
+    pass
+
+
+# Define a classe do progresso de uma tarefa: unidades feitas, total conhecido até agora e pedido de cancelamento
+class Progress:
+    """O total cresce à medida que as fases descobrem o seu trabalho (ex: colunas de texto a tipar, arquivos do lote).
+    'advance' é também o ponto de controle: depois de um pedido de cancelamento, lança Cancelled."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0
+        self.done = 0
+        # Última unidade concluída (ex: nome da coluna, arquivo do lote, fase da leitura)
+        self.label = None
+        self.started = time.monotonic()
+        self.cancel_requested = threading.Event()
+
+    def add_total(self, n: int):
+        with self._lock:
+            self.total += n
+
+    def advance(self, n=1, label=None):
+        with self._lock:
+            self.done += n
+            if label is not None:
+                self.label = label
+        if self.cancel_requested.is_set():
+            raise Cancelled()
+
+    @property
+    def fraction(self) -> float:
+        return min(self.done / self.total, 1.0) if self.total else 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def eta(self):
+        # Tempo restante pelo ritmo até agora (None enquanto nada terminou)
+        f = self.fraction
+        return self.elapsed * (1 - f) / f if f > 0 else None
+
+
+# Define uma função que devolve o progresso da tarefa da thread atual (None fora de uma tarefa)
+def current():
+    return getattr(_local, "progress", None)
+
+
+# Define uma função que soma unidades ao total da tarefa atual
+def add_total(n: int):
+    progress = current()
+    if progress is not None:
+        progress.add_total(n)
+
+
+# Define uma função que marca unidades concluídas na tarefa atual (e lança Cancelled se pediram para parar)
+def advance(n=1, label=None):
+    progress = current()
+    if progress is not None:
+        progress.advance(n, label)
+
+
+# Define a classe de uma tarefa em segundo plano
+class BackgroundTask:
+    """Roda 'func()' numa thread daemon. O resultado só é lido depois que a tarefa termina: quem a criou decide
+    quando aplicá-lo, então um cancelamento ou uma falha não deixam nada pela metade.
+
+    'status' é "running", "done", "failed" (ver 'error') ou "cancelled". O cancelamento é cooperativo: vale no
+    próximo ponto de controle (coluna, arquivo, bloco ou fase); o trabalho já feito é descartado.
+    """
+
+    def __init__(self, label: str, func):
+        self.id = next(_ids)
+        self.label = label
+        self.progress = Progress()
+        self.status = "running"
+        self.result = None
+        self.error = None
+        self._thread = threading.Thread(target=self._run, args=(func,), name=f"tarefa-{self.id}", daemon=True)
+        self._thread.start()
+
+    def _run(self, func):
+        _local.progress = self.progress
+        try:
+            self.result = func()
+            # Cancelada depois do último ponto de controle: o resultado também é descartado
+            self.status = "cancelled" if self.progress.cancel_requested.is_set() else "done"
+        except Cancelled:
+            self.status = "cancelled"
+        except Exception as e:
+            self.error = e
+            self.status = "failed"
+        finally:
+            _local.progress = None
+
+    @property
+    def finished(self) -> bool:
+        return not self._thread.is_alive()
+
+    def wait(self, timeout=None) -> bool:
+        # Espera a tarefa terminar (no máximo 'timeout' segundos); retorna se terminou
+        self._thread.join(timeout)
+        return self.finished
+
+    def cancel(self):
+        self.progress.cancel_requested.set()
@@ -0,0 +1,22 @@
+# Testes da leitura em lote (batch.py)
+
+# Importa a leitura em lote
+from batch import read_batch, unique_names
+
+# Opções de leitura da barra lateral: tudo detectado por arquivo
+AUTO = {"sep": "auto", "has_header": "auto", "quotechar": "auto"}
+
+
+def test_unique_names():
+    files = [("a.csv", b""), ("a.csv", b""), ("b.csv", b""), ("a.csv", b"")]
+    assert [name for name, _ in unique_names(files)] == ["a.csv", "a.csv (2)", "b.csv", "a.csv (3)"]
+
+
+def test_read_batch_duplicate_names_with_source_column():
+    files = [("a.csv", b"id,nome\n1,ana\n2,bob\n"), ("a.csv", b"id,valor\n3,1.5\n")]
+    df, report, _ = read_batch(files, AUTO, source_column="arquivo_origem")
+    assert list(df["arquivo_origem"].cat.categories) == ["a.csv", "a.csv (2)"]
+    assert df["arquivo_origem"].tolist() == ["a.csv", "a.csv", "a.csv (2)"]
+    # Cada arquivo tem a sua linha no relatório, com as próprias colunas ausentes
+    assert report["arquivo"].tolist() == ["a.csv", "a.csv (2)"]
+    assert report["colunas_ausentes"].tolist() == [1, 1]
@@ -0,0 +1,32 @@
+# Testes das etapas de limpeza (cleaning.py)
+
+# Importa a biblioteca numpy para montar colunas grandes
+import numpy as np
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+
+# Importa a tipagem automática e a conversão de números
+from cleaning import auto_types, coerce_numeric, infer_number_format
+
+
+# Coluna de objetos com ints e strs misturados (como sai do leitor do pandas em blocos, low_memory)
+def test_coerce_numeric_keeps_python_numbers():
+    s = pd.Series(["1", 2, "3,5", 4.0, None, "x"])
+    out = coerce_numeric(s, ",", ".")
+    assert out.tolist()[:4] == [1.0, 2.0, 3.5, 4.0]
+    assert out.isna().tolist() == [False, False, False, False, True, True]
+
+
+def test_infer_number_format_counts_python_numbers():
+    s = pd.Series([1, 2, "3,5", 4.0, "1.234,5"] * 10)
+    assert infer_number_format(s, ".") == (",", ".", 1.0)
+
+
+def test_auto_types_mixed_int_str_column():
+    values = np.arange(20_000)
+    s = pd.Series(values.astype(object))
+    s[-5_000:] = [str(v) for v in values[-5_000:]]
+    out, converted, _, _ = auto_types(pd.DataFrame({"n": s}))
+    assert converted == {"n": "numeric"}
+    assert pd.api.types.is_integer_dtype(out["n"])
+    assert out["n"].tolist() == values.tolist()
@@ -0,0 +1,65 @@
+# Testes do cache de datasets em disco (dataset_cache.py)
+
+# Importa o módulo os para envelhecer as entradas (data de modificação)
+import os
+
+# Importa a biblioteca numpy para os nulos
+import numpy as np
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+# Importa o pytest para pular os testes sem o PyArrow
+import pytest
+
+# Importa o cache
+from dataset_cache import DatasetCache, pa
+
+pytestmark = pytest.mark.skipif(pa is None, reason="o cache de datasets exige o PyArrow")
+
+OPTIONS = {"sep": ";", "has_header": True, "na_values": [], "arrow": False}
+
+
+def test_key_depends_on_content_order_and_options():
+    key = DatasetCache.key([b"a;b\n1;2\n"], OPTIONS)
+    assert key == DatasetCache.key([b"a;b\n1;2\n"], dict(OPTIONS))
+    # Outro conteúdo, outra opção de leitura ou outra divisão das partes geram outra chave
+    assert key != DatasetCache.key([b"a;b\n1;3\n"], OPTIONS)
+    assert key != DatasetCache.key([b"a;b\n1;2\n"], dict(OPTIONS, sep=","))
+    assert DatasetCache.key([b"ab", b"c"], OPTIONS) != DatasetCache.key([b"a", b"bc"], OPTIONS)
+
+
+def test_round_trip_restores_dtypes_and_nulls(tmp_path):
+    cache = DatasetCache(str(tmp_path))
+    # Nulos de texto como a leitura do CSV os entrega (NaN)
+    df = pd.DataFrame({"texto": ["a", np.nan, "c"], "n": [1, 2, 3], "x": [1.5, np.nan, 2.0],
+                       "cat": pd.Series(["u", "v", "u"], dtype="category")})
+    key = DatasetCache.key([b"conteudo"], OPTIONS)
+    assert cache.get(key) is None
+    assert cache.put(key, df, {"encoding": "utf-8"})
+    got, meta = cache.get(key)
+    pd.testing.assert_frame_equal(got, df)
+    assert meta == {"encoding": "utf-8"}
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    df = pd.DataFrame({"n": np.arange(20_000)})
+    cache = DatasetCache(str(tmp_path))
+    keys = [DatasetCache.key([bytes([i])], OPTIONS) for i in range(3)]
+    for age, key in zip((300, 200, 100), keys):
+        cache.put(key, df, {})
+        for path in cache._paths(key):
+            os.utime(path, (os.path.getmtime(path) - age,) * 2)
+    # Acessar a entrada mais antiga a traz para o fim da fila de descarte
+    assert cache.get(keys[0]) is not None
+    # Limite para duas entradas: sai a menos usada (a segunda)
+    cache.max_bytes = cache.size_bytes() * 2 // 3 + 1
+    cache.evict()
+    assert [cache.get(k) is not None for k in keys] == [True, False, True]
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = DatasetCache(str(tmp_path))
+    key = DatasetCache.key([b"x"], OPTIONS)
+    cache.put(key, pd.DataFrame({"n": [1]}), {})
+    with open(cache._paths(key)[0], "wb") as f:
+        f.write(b"lixo")
+    assert cache.get(key) is None
@@ -0,0 +1,61 @@
+# Testes do cache de diagnósticos (diagnostics.py)
+
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+
+# Importa as etapas, o resumo por coluna e o cache
+import diagnostics
+from cleaning import apply_step
+from diagnostics import DiagnosticsCache
+from fingerprints import duplicated_hashes, row_fingerprints
+
+STEPS = [
+    {"op": "standardize_colnames"},
+    {"op": "clean_text", "columns": ["nome_cliente"]},
+    {"op": "drop_duplicates"},
+    {"op": "auto_types", "decimal": ","},
+    {"op": "drop_columns", "columns": ["extra"]},
+    {"op": "dropna", "columns": ["valor"]},
+]
+
+
+def dirty_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "Nome Cliente": [" ana ", "ana", " ana ", "bob  x", None, "carl"] * 50,
+        "Valor": ["1,5", "2", "1,5", None, "10", "3,25"] * 50,
+        "Extra": list("abacde") * 50,
+    })
+
+
+def test_incremental_updates_match_fresh_diagnostics():
+    cache = DiagnosticsCache()
+    df, version = dirty_frame(), 0
+    cache.summary(df, version)
+    cache.duplicate_count(df, version)
+    for spec in STEPS:
+        out, info = apply_step(df, spec)
+        cache.advance(df, out, spec, info, version + 1)
+        df, version = out, version + 1
+        # O resumo atualizado é o mesmo de um cache novo calculado do zero
+        pd.testing.assert_frame_equal(cache.summary(df, version), DiagnosticsCache().summary(df, version))
+        assert cache.duplicate_count(df, version) == int(duplicated_hashes(row_fingerprints(df)).sum())
+
+
+def test_same_version_is_not_recomputed(monkeypatch):
+    calls = []
+    real = diagnostics.df_info_summary
+    monkeypatch.setattr(diagnostics, "df_info_summary", lambda df, *a: calls.append(list(df.columns)) or real(df, *a))
+    cache = DiagnosticsCache()
+    df = dirty_frame()
+    cache.summary(df, 0)
+    cache.summary(df, 0)
+    assert calls == [list(df.columns)]
+    # Limpar o texto de uma coluna recalcula só essa coluna
+    spec = {"op": "clean_text", "columns": ["Nome Cliente"]}
+    out, info = apply_step(df, spec)
+    cache.advance(df, out, spec, info, 1)
+    cache.summary(out, 1)
+    assert calls[1:] == [["Nome Cliente"]]
+    # Outra versão (ex: desfazer) descarta o cache
+    cache.summary(df, 5)
+    assert calls[2:] == [list(df.columns)]
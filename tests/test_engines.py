@@ -0,0 +1,167 @@
+# Conformidade dos motores (engines.py): cada etapa, e cada sequência de etapas, dá o mesmo resultado do pandas
+
+# Importa a biblioteca numpy para montar a tabela de casos-limite
+import numpy as np
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+# Importa o pytest para repetir os casos em cada motor e em cada armazenamento das colunas
+import pytest
+
+# Importa as etapas do motor de referência, os motores e o plano
+from cleaning import apply_step
+import engines
+from engines import available_engines, get_engine
+from loading import pa, read_csv_bytes
+from plan import run_plan
+from synthetic import NA_TOKENS, make_dirty_frame
+
+# Tolerância relativa para floats: médias somadas em outra ordem podem diferir no último dígito
+FLOAT_RTOL = 1e-12
+
+# Etapas aplicadas sobre o texto lido do CSV (colunas de texto)
+TEXT_CASES = [
+    {"op": "standardize_colnames"},
+    {"op": "clean_text", "columns": ["Nome Completo", "Cidade", "Observação"], "collapse_spaces": True},
+    {"op": "clean_text", "columns": ["Nome Completo", "Cidade"], "collapse_spaces": False},
+    {"op": "drop_duplicates", "keep": "first"},
+    {"op": "drop_duplicates", "keep": "last"},
+    {"op": "drop_duplicates", "keep": False},
+    {"op": "drop_duplicates", "keep": "first", "subset": ["Nome Completo", "UF"]},
+    {"op": "fill_na", "categorical": {"strategy": "unknown", "columns": ["Nome Completo", "Status"]}},
+    {"op": "fill_na", "categorical": {"strategy": "mode", "columns": ["Nome Completo", "Status", "Observação"]}},
+    {"op": "fill_na", "categorical": {"strategy": "drop", "columns": ["Status"]}},
+    {"op": "drop_columns", "columns": ["Observação"]},
+]
+# Etapas aplicadas sobre o resultado tipado (números e datas)
+TYPED_CASES = [
+    {"op": "fill_na", "numeric": {"strategy": "mean", "columns": ["Valor (R$)", "Quantidade"]}},
+    {"op": "fill_na", "numeric": {"strategy": "median", "columns": ["Valor (R$)", "Quantidade"]}},
+    {"op": "fill_na", "numeric": {"strategy": "zero", "columns": ["Valor (R$)"]}},
+    {"op": "fill_na", "numeric": {"strategy": "mode", "columns": ["Quantidade"]}},
+    {"op": "fill_na", "numeric": {"strategy": "drop", "columns": ["Valor (R$)"]},
+     "datetime": {"strategy": "min", "columns": ["Data Compra"]}},
+    {"op": "fill_na", "datetime": {"strategy": "max", "columns": ["Data Compra"]}},
+    {"op": "remove_outliers", "columns": ["Valor (R$)"], "factor": 1.5},
+    {"op": "remove_outliers", "columns": ["Valor (R$)", "Quantidade"], "factor": 3.0},
+    {"op": "drop_duplicates", "keep": "first"},
+]
+# Etapas sobre a tabela de casos-limite (colunas só com nulos, empates na moda, categorias, objetos mistos)
+EDGE_CASES = [
+    {"op": "fill_na", "numeric": {"strategy": "mean", "columns": ["vazia", "inteiros"]}},
+    {"op": "fill_na", "numeric": {"strategy": "median", "columns": ["vazia", "inteiros"]}},
+    {"op": "fill_na", "numeric": {"strategy": "mode", "columns": ["empate", "inteiros"]}},
+    {"op": "fill_na", "categorical": {"strategy": "mode", "columns": ["texto", "categoria", "misto"]}},
+    {"op": "fill_na", "datetime": {"strategy": "min", "columns": ["datas"]}},
+    {"op": "clean_text", "columns": ["texto", "categoria"], "collapse_spaces": True},
+    {"op": "remove_outliers", "columns": ["inteiros", "empate"], "factor": 1.5},
+    {"op": "drop_duplicates", "keep": False, "subset": ["texto", "misto"]},
+]
+# Sequências de etapas encadeáveis (no Polars, um plano preguiçoso só) por entrada
+CHAINS = {
+    "texto": [
+        {"op": "clean_text", "columns": ["Nome Completo", "Cidade", "Observação"], "collapse_spaces": True},
+        {"op": "fill_na", "categorical": {"strategy": "mode", "columns": ["Nome Completo", "Status"]}},
+        {"op": "drop_duplicates", "keep": "first", "subset": ["Nome Completo", "UF"]},
+        {"op": "fill_na", "categorical": {"strategy": "drop", "columns": ["Status"]}},
+        {"op": "drop_columns", "columns": ["Observação"]},
+        {"op": "drop_duplicates", "keep": "last"},
+    ],
+    "tipado": [
+        {"op": "fill_na", "numeric": {"strategy": "median", "columns": ["Valor (R$)", "Quantidade"]},
+         "datetime": {"strategy": "min", "columns": ["Data Compra"]}},
+        {"op": "remove_outliers", "columns": ["Valor (R$)"], "factor": 1.5},
+        {"op": "fill_na", "categorical": {"strategy": "unknown", "columns": ["Nome Completo"]}},
+        {"op": "drop_duplicates", "keep": False},
+        {"op": "remove_outliers", "columns": ["Valor (R$)", "Quantidade"], "factor": 3.0},
+    ],
+    # Objetos mistos e categorias não são encadeáveis: o trecho volta a rodar etapa a etapa
+    "limite": EDGE_CASES,
+}
+
+ARROW = [False] + ([True] if pa is not None else [])
+
+
+# Define uma função que monta as entradas: o CSV sujo lido como texto, o mesmo tipado e a tabela de casos-limite
+def build_inputs(rows=3_000, seed=0, arrow=False) -> dict:
+    data = make_dirty_frame(rows, seed).to_csv(sep=";", index=False).encode("utf-8")
+    raw = read_csv_bytes(data, sep=";", na_values=[t for t in NA_TOKENS if t], arrow=arrow)
+    typed, _ = apply_step(raw, {"op": "auto_types", "decimal": ","})
+    n = 12
+    edge = pd.DataFrame({
+        "vazia": pd.Series([np.nan] * n),
+        "inteiros": pd.array([1, 2, None, 4, 5, 6, 7, 8, 900, None, 2, 2], dtype="Int64"),
+        "empate": [1.0, 1.0, 2.0, 2.0, np.nan, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0],
+        "texto": pd.array([" b ", "a", "a  x", None, "b", " b ", "c", None, "a", "b", "z", "z"], dtype="string"),
+        "categoria": pd.Categorical([" SP", "SP", "RJ", None, "RJ", "MG", "SP", None, "RJ", "SP", "MG", "MG"]),
+        "misto": [1, "a", None, 2.5, "a", 1, "b", None, "a", 1, "c", "d"],
+        "datas": pd.to_datetime(["2020-01-01", None, "2019-05-02", "2021-03-04", None, "2020-01-01",
+                                 "2018-07-08", "2022-01-01", None, "2020-02-02", "2020-03-03", "2020-04-04"]),
+    }, index=np.arange(100, 100 + n))
+    return {"texto": raw, "tipado": typed, "limite": edge}
+
+
+@pytest.fixture(scope="module", params=ARROW, ids=lambda arrow: "arrow" if arrow else "objetos")
+def inputs(request):
+    return build_inputs(arrow=request.param)
+
+
+def assert_same(expected, got):
+    (exp_df, exp_info), (got_df, got_info) = expected, got
+    assert got_info.get("removed") == exp_info.get("removed")
+    pd.testing.assert_frame_equal(got_df, exp_df, check_exact=False, rtol=FLOAT_RTOL)
+
+
+CASES = [(group, spec) for group, cases in (("texto", TEXT_CASES), ("tipado", TYPED_CASES), ("limite", EDGE_CASES))
+         for spec in cases]
+
+
+@pytest.mark.parametrize("engine", available_engines())
+@pytest.mark.parametrize("group,spec", CASES, ids=[f"{g}-{i}-{s['op']}" for i, (g, s) in enumerate(CASES)])
+def test_step_matches_pandas(inputs, engine, group, spec):
+    df = inputs[group]
+    assert_same(apply_step(df, spec), get_engine(engine).apply_step(df, spec))
+
+
+@pytest.mark.parametrize("engine", available_engines())
+@pytest.mark.parametrize("group", list(CHAINS))
+def test_run_steps_matches_step_by_step(inputs, engine, group):
+    df, steps = inputs[group], CHAINS[group]
+    expected, infos = df, []
+    for spec in steps:
+        expected, info = apply_step(expected, spec)
+        infos.append(info["removed"])
+    got, got_infos = get_engine(engine).run_steps(df, steps)
+    assert [i["removed"] for i in got_infos] == infos
+    pd.testing.assert_frame_equal(got, expected, check_exact=False, rtol=FLOAT_RTOL)
+    # O plano otimizado, com o motor, também dá o mesmo resultado
+    planned, info = run_plan(df, steps, engine=get_engine(engine))
+    assert info["removed"] == df.shape[0] - expected.shape[0]
+    pd.testing.assert_frame_equal(planned, expected, check_exact=False, rtol=FLOAT_RTOL)
+
+
+@pytest.mark.skipif("polars" not in available_engines(), reason="Polars não instalado")
+def test_polars_chains_without_step_by_step(inputs, monkeypatch):
+    # Um trecho encadeável roda inteiro no plano preguiçoso: nenhuma etapa passa por apply_step
+    def fail(*args, **kwargs):
+        raise AssertionError("etapa executada fora do plano preguiçoso")
+
+    monkeypatch.setattr(engines.PolarsEngine, "apply_step", fail)
+    for group in ("texto", "tipado"):
+        get_engine("polars").run_steps(inputs[group], CHAINS[group])
+
+
+@pytest.mark.parametrize("engine", available_engines())
+def test_run_steps_without_remaining_rows(engine):
+    # Nenhuma linha sobra: contagens e valores de preenchimento saem de consultas separadas
+    df = pd.DataFrame({"n": pd.array([1, None, 2], dtype="Int64"), "t": ["a", None, "a"]})
+    steps = [{"op": "fill_na", "numeric": {"strategy": "mean", "columns": ["n"]},
+              "categorical": {"strategy": "drop", "columns": ["t"]}},
+             {"op": "drop_duplicates", "keep": False, "subset": ["t"]}]
+    expected, infos = df, []
+    for spec in steps:
+        expected, info = apply_step(expected, spec)
+        infos.append(info["removed"])
+    got, got_infos = get_engine(engine).run_steps(df, steps)
+    assert got.empty and [i["removed"] for i in got_infos] == infos
+    # A média 1,5 converte a coluna inteira para float64 mesmo sem linhas
+    pd.testing.assert_frame_equal(got, expected)
@@ -0,0 +1,39 @@
+# Testes da exportação (export.py)
+
+# Importa o módulo os para conferir os arquivos apagados
+import os
+# Importa o módulo zipfile para ler o nome do CSV dentro do zip
+import zipfile
+
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+
+# Importa o cache de exportações
+from export import ExportCache
+
+
+def test_export_cache_key_includes_zip_member(tmp_path):
+    cache = ExportCache(tmp_dir=str(tmp_path))
+    df = pd.DataFrame({"a": [1, 2]})
+    first = cache.build(df, 1, "zip", member="vendas.csv")
+    # Outro nome interno na mesma versão gera outro zip (o anterior não é reaproveitado)
+    assert cache.get(1, "zip", member="clientes.csv") is None
+    second = cache.build(df, 1, "zip", member="clientes.csv")
+    assert first != second
+    assert zipfile.ZipFile(second).namelist() == ["clientes.csv"]
+    assert cache.get(1, "zip", member="vendas.csv") == first
+
+
+def test_export_cache_write_registers_only_on_add(tmp_path):
+    cache = ExportCache(tmp_dir=str(tmp_path))
+    df = pd.DataFrame({"a": [1, 2]})
+    old = cache.build(df, 1, "csv")
+    # Gravado (ex: numa tarefa em segundo plano) mas ainda não registrado
+    path = cache.write(df, "csv")
+    assert cache.get(2, "csv") is None
+    assert cache.add(path, 2, "csv") == path
+    assert cache.get(2, "csv") == path
+    # Registrar a versão nova apaga as exportações das anteriores
+    assert cache.get(1, "csv") is None
+    assert not os.path.exists(old)
+    assert pd.read_csv(path, sep=";")["a"].tolist() == [1, 2]
@@ -0,0 +1,57 @@
+# Testes dos hashes de linha e da remoção de duplicadas (fingerprints.py)
+
+# Importa a biblioteca numpy para gerar os dados
+import numpy as np
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+# Importa o pytest para repetir o teste com cada opção de 'keep'
+import pytest
+
+# Importa a remoção de duplicadas e os hashes
+from cleaning import drop_duplicates
+from fingerprints import HashPartitioner, duplicated_hashes, mask_slice, row_fingerprints
+
+
+def frame(rows=5_000) -> pd.DataFrame:
+    rng = np.random.default_rng(4)
+    return pd.DataFrame({
+        "id": rng.integers(0, 300, rows),
+        "nome": rng.choice(["ana", "bob", None], rows),
+        "valor": rng.choice([1.5, 2.0, np.nan], rows),
+    })
+
+
+@pytest.mark.parametrize("keep", ["first", "last"])
+@pytest.mark.parametrize("subset", [None, ["id"], ["nome", "valor"]])
+def test_duplicated_hashes_match_pandas(keep, subset):
+    df = frame()
+    got = duplicated_hashes(row_fingerprints(df, subset), keep)
+    assert (got == df.duplicated(subset=subset, keep=keep).to_numpy()).all()
+
+
+def test_fingerprints_stable_across_dtypes():
+    df = pd.DataFrame({"n": [1, 2, 3], "t": ["a", "b", "a"]})
+    other = pd.DataFrame({"n": [1.0, 2.0, 3.0], "t": pd.Series(["a", "b", "a"], dtype="category")})
+    arrow = df.astype({"t": "string[pyarrow]"})
+    assert (row_fingerprints(df) == row_fingerprints(other)).all()
+    assert (row_fingerprints(df) == row_fingerprints(arrow)).all()
+
+
+def test_cached_fingerprints_give_same_result():
+    df = frame()
+    hashes = row_fingerprints(df, ["id"])
+    pd.testing.assert_frame_equal(drop_duplicates(df, subset=["id"], fingerprints=hashes),
+                                  drop_duplicates(df, subset=["id"]))
+
+
+@pytest.mark.parametrize("keep", ["first", "last"])
+def test_hash_partitioner_in_chunks_matches_in_memory(tmp_path, keep):
+    df = frame()
+    partitioner = HashPartitioner(partitions=8, keep=keep, tmp_dir=str(tmp_path))
+    for start in range(0, len(df), 700):
+        partitioner.update(row_fingerprints(df.iloc[start:start + 700]))
+    result = partitioner.result()
+    assert result["rows"] == len(df)
+    kept = np.concatenate([mask_slice(result["keep"], start, len(df.iloc[start:start + 700]))
+                           for start in range(0, len(df), 700)])
+    assert (kept == ~df.duplicated(keep=keep).to_numpy()).all()
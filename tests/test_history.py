@@ -0,0 +1,94 @@
+# Testes do histórico de etapas (history.py)
+
+# Importa a biblioteca numpy para conferir o compartilhamento de memória
+import numpy as np
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+# Importa o pytest para pular o teste sem o PyArrow
+import pytest
+
+# Importa as etapas e o histórico
+from cleaning import apply_step
+from history import History, apply_delta, make_delta, pa
+
+STEPS = [
+    {"op": "standardize_colnames"},
+    {"op": "clean_text", "columns": ["nome_cliente"]},
+    {"op": "drop_duplicates"},
+    {"op": "auto_types", "decimal": ","},
+    {"op": "dropna", "columns": ["valor"]},
+    {"op": "drop_columns", "columns": ["extra"]},
+    {"op": "categorize", "columns": ["nome_cliente"]},
+]
+
+
+def dirty_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "Nome Cliente": [" ana ", "ana", " ana ", "bob  x", None, "carl"] * 20,
+        "Valor": ["1,5", "2", "1,5", None, "10", "3,25"] * 20,
+        "Extra": list("abacde") * 20,
+    })
+
+
+# Aplica as etapas em sequência, guardando o DataFrame depois de cada uma
+def _apply_all(history=None) -> list:
+    frames = [dirty_frame()]
+    for spec in STEPS:
+        out, info = apply_step(frames[-1], spec)
+        if history is not None:
+            history.push(out, spec, info, spec["op"])
+        frames.append(out)
+    return frames
+
+
+def test_deltas_rebuild_every_step():
+    frames = _apply_all()
+    for spec, before, after in zip(STEPS, frames, frames[1:]):
+        _, info = apply_step(before, spec)
+        delta = make_delta(before, after, spec, info)
+        # O delta não guarda o DataFrame inteiro e reconstrói o resultado da etapa
+        assert "frame" not in delta
+        pd.testing.assert_frame_equal(apply_delta(before, delta), after)
+
+
+def test_undo_redo_walks_back_and_forth():
+    frames = _apply_all()
+    history = History(frames[0])
+    _apply_all(history)
+    for i in range(len(STEPS) - 1, -1, -1):
+        pd.testing.assert_frame_equal(history.undo(), frames[i])
+    assert not history.can_undo()
+    for i in range(1, len(STEPS) + 1):
+        pd.testing.assert_frame_equal(history.redo(), frames[i])
+    assert not history.can_redo()
+    # Uma etapa nova depois de desfazer descarta as etapas desfeitas
+    history.undo()
+    history.undo()
+    spec = {"op": "drop_columns", "columns": ["valor"]}
+    out, info = apply_step(history.current, spec)
+    history.push(out, spec, info, "nova")
+    assert history.steps == STEPS[:-2] + [spec]
+    assert not history.can_redo()
+
+
+@pytest.mark.skipif(pa is None, reason="descarregar em disco exige o PyArrow")
+def test_spill_restore_rebuilds_current_sharing_original(tmp_path):
+    # Copy-on-write só dentro do teste (o app liga a opção; os outros testes não devem herdá-la)
+    with pd.option_context("mode.copy_on_write", True):
+        _check_spill_restore(tmp_path)
+
+
+def _check_spill_restore(tmp_path):
+    df = pd.DataFrame({"texto": [" a ", "b", None, "b"], "n": [1.0, 2.0, 3.0, 2.0], "x": list("wxyz")})
+    history = History(df)
+    for spec in ({"op": "clean_text", "columns": ["texto"]}, {"op": "drop_columns", "columns": ["x"]}):
+        out, info = apply_step(history.current, spec)
+        history.push(out, spec, info, spec["op"])
+    expected = history.current.copy()
+    assert history.spill(str(tmp_path / "sessao"))
+    assert history.spilled
+    pd.testing.assert_frame_equal(history.current, expected)
+    # A coluna que nenhuma etapa trocou volta a ser a mesma memória no original e no atual
+    assert np.shares_memory(history.current["n"].to_numpy(), history.original["n"].to_numpy())
+    # Desfazer depois de recarregar volta ao texto limpo, ainda com a coluna removida
+    assert list(history.undo().columns) == ["texto", "n", "x"]
@@ -0,0 +1,26 @@
+# Testes da medição das fases (instrumentation.py)
+
+# Importa o módulo threading para ocupar a CPU em outra thread durante a fase
+import threading
+# Importa o módulo time para a espera da fase medida
+import time
+
+# Importa a medição das fases
+from instrumentation import Measure
+
+
+def _spin(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_measure_cpu_excludes_other_threads():
+    # Outra thread gasta CPU enquanto a fase medida só espera: o tempo de CPU da fase fica perto de zero
+    busy = threading.Thread(target=_spin, args=(0.3,))
+    with Measure("espera") as m:
+        busy.start()
+        time.sleep(0.3)
+    busy.join()
+    assert m.wall >= 0.3
+    assert m.cpu < 0.1
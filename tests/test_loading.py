@@ -0,0 +1,58 @@
+# Testes da detecção de dialeto (loading.py)
+
+# Importa o módulo csv para simular falhas e palpites errados do csv.Sniffer
+import csv
+
+# Importa o pytest para repetir o teste com vários arquivos
+import pytest
+
+# Importa a detecção de dialeto e a resolução das opções "auto"
+from loading import resolve_dialect, sniff_dialect
+
+SEMICOLON = "nome;valor;data\nana;1,5;01/02/2023\nbob;2,25;03/04/2023\ncarl;3;05/06/2023\n"
+
+
+@pytest.mark.parametrize("text, sep, columns, has_header", [
+    (SEMICOLON, ";", 3, True),
+    ("a\tb\tc\n1\t2\t3\n4\t5\t6\n", "\t", 3, True),
+    ('id|texto\n1|"a|b"\n2|"c"\n3|d\n', "|", 2, True),
+    ("101;20;7\n102;31;8\n103;42;9\n", ";", 3, False),
+])
+def test_sniff_dialect(text, sep, columns, has_header):
+    dialect = sniff_dialect(text.encode())
+    assert (dialect["sep"], dialect["columns"], dialect["has_header"]) == (sep, columns, has_header)
+    assert dialect["consistency"] == 1.0
+
+
+def test_sniffer_failure_falls_back_to_field_counts(monkeypatch):
+    def fail(self, sample, delimiters=None):
+        raise csv.Error("Could not determine delimiter")
+    monkeypatch.setattr(csv.Sniffer, "sniff", fail)
+    dialect = sniff_dialect(SEMICOLON.encode())
+    assert (dialect["sep"], dialect["columns"], dialect["method"]) == (";", 3, "contagem de campos")
+
+
+def test_wrong_sniffer_guess_loses_to_field_counts(monkeypatch):
+    class Comma(csv.excel):
+        delimiter = ","
+    monkeypatch.setattr(csv.Sniffer, "sniff", lambda self, sample, delimiters=None: Comma)
+    dialect = sniff_dialect(SEMICOLON.encode())
+    assert (dialect["sep"], dialect["method"]) == (";", "contagem de campos")
+
+
+def test_single_column_and_empty_file_defaults():
+    assert sniff_dialect(b"nome\nana\nbob\n")["method"] == "uma coluna só"
+    assert sniff_dialect(b"")["method"] == "padrão (arquivo vazio)"
+
+
+def test_bounded_prefix_drops_the_cut_line():
+    # O prefixo corta a última linha no meio: ela não entra na contagem de campos
+    text = ("id;nome;valor\n" + "".join(f"{i};nome {i};{i},5\n" for i in range(5_000))).encode()
+    dialect = sniff_dialect(text, prefix_bytes=1_000)
+    assert (dialect["sep"], dialect["columns"], dialect["consistency"]) == (";", 3, 1.0)
+
+
+def test_user_choices_override_detection():
+    dialect = sniff_dialect(SEMICOLON.encode())
+    read = resolve_dialect({"sep": ",", "has_header": "auto", "quotechar": "auto"}, dialect)
+    assert read == {"sep": ",", "has_header": True, "quotechar": '"'}
@@ -0,0 +1,52 @@
+# Testes da execução por coluna em paralelo (parallel.py)
+
+# Importa a biblioteca numpy para gerar as colunas
+import numpy as np
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+# Importa o pytest para repetir o teste em threads e processos
+import pytest
+
+# Importa o executor por coluna e as etapas
+import parallel
+from cleaning import apply_step, infer_column_type
+from parallel import map_columns
+
+
+# Colunas sujas de texto: números com vírgula decimal, datas e texto livre
+def dirty_frame(rows=3_000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "valor": pd.Series(rng.integers(0, 10**5, rows)).map(lambda v: f" {v // 100},{v % 100:02d} ").astype(object),
+        "data": pd.Series(pd.date_range("2020-01-01", periods=rows, freq="h").strftime("%d/%m/%Y %H:%M")).astype(object),
+        "nome": pd.Series(rng.choice(["  Ana ", "bob  silva", None, "José"], rows)).astype(object),
+        "n": rng.integers(0, 100, rows),
+    })
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_map_columns_parallel_matches_serial(monkeypatch, backend):
+    # Sem o limite de células, para o paralelo rodar mesmo com poucas linhas
+    monkeypatch.setattr(parallel, "PARALLEL_MIN_CELLS", 0)
+    df = dirty_frame()
+    cols = [df[c].str.strip() for c in ["valor", "data", "nome"]]
+    serial = map_columns(infer_column_type, cols, 1, decimal=",")
+    par = map_columns(infer_column_type, cols, 3, backend, decimal=",")
+    assert [r is None for r in par] == [r is None for r in serial]
+    for a, b in zip(serial, par):
+        if a is not None:
+            assert a[0] == b[0] and a[2] == b[2]
+            pd.testing.assert_series_equal(a[1], b[1])
+
+
+def test_steps_parallel_match_serial(monkeypatch):
+    monkeypatch.setattr(parallel, "PARALLEL_MIN_CELLS", 0)
+    df = dirty_frame()
+    specs = [{"op": "clean_text", "columns": ["valor", "data", "nome"]}, {"op": "auto_types", "decimal": ","}]
+    out = {}
+    for workers in (1, 2):
+        current = df
+        for spec in specs:
+            current, _ = apply_step(current, spec, workers=workers)
+        out[workers] = current
+    pd.testing.assert_frame_equal(out[1], out[2])
@@ -0,0 +1,69 @@
+# Testes do plano otimizado (plan.py)
+
+# Importa a biblioteca numpy para gerar os dados
+import numpy as np
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+# Importa o pytest para repetir o teste com várias listas de etapas
+import pytest
+
+# Importa as etapas e o plano
+from cleaning import apply_step
+from plan import optimize, run_plan
+
+
+def dirty_frame(rows=2_000) -> pd.DataFrame:
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        "nome": rng.choice([" ana ", "bob  x", None, "carl"], rows),
+        "valor": rng.choice(["1.234,56", "2,5", None, "10"], rows),
+        "data": rng.choice(["01/02/2023", "15/03/2023", None], rows),
+        "n": rng.normal(0, 1, rows),
+        "m": rng.integers(0, 100, rows).astype(float),
+        "t": rng.choice(["a", "b", None], rows),
+    })
+    df.loc[rng.random(rows) < 0.1, "n"] = np.nan
+    return df
+
+
+def test_optimize_pushes_drop_and_fuses_steps():
+    steps = [
+        {"op": "clean_text", "columns": ["nome", "t"]},
+        {"op": "auto_types", "decimal": ","},
+        {"op": "dropna", "columns": ["n"]},
+        {"op": "remove_outliers", "columns": ["m"]},
+        {"op": "drop_columns", "columns": ["t"]},
+    ]
+    nodes = optimize(steps)
+    # A remoção sobe para o início e a limpeza de texto deixa de processar a coluna removida
+    assert nodes[0] == {"op": "drop_columns", "columns": ["t"]}
+    assert [n["op"] for n in nodes] == ["drop_columns", "map", "filter"]
+    assert nodes[1]["steps"][0]["columns"] == ["nome"]
+    assert [s["op"] for s in nodes[2]["steps"]] == ["dropna", "remove_outliers"]
+
+
+def test_optimize_keeps_drop_after_full_row_duplicates():
+    # Duplicadas na linha inteira dependem de todas as colunas: a remoção não pode passar à frente
+    steps = [{"op": "drop_duplicates"}, {"op": "drop_columns", "columns": ["t"]}]
+    assert [n["op"] for n in optimize(steps)] == ["drop_duplicates", "drop_columns"]
+
+
+@pytest.mark.parametrize("steps", [
+    [{"op": "clean_text", "columns": ["nome", "t"]}, {"op": "auto_types", "decimal": ","},
+     {"op": "dropna", "columns": ["n"]}, {"op": "remove_outliers", "columns": ["n", "m"], "factor": 1.0},
+     {"op": "drop_columns", "columns": ["t"]}],
+    [{"op": "fill_na", "numeric": {"strategy": "mean", "columns": ["n"]},
+      "categorical": {"strategy": "mode", "columns": ["nome"]}},
+     {"op": "drop_columns", "columns": ["data"]}, {"op": "categorize", "columns": ["t"]},
+     {"op": "drop_duplicates", "subset": ["nome"]}],
+    [{"op": "drop_duplicates"}, {"op": "drop_columns", "columns": ["m"]}, {"op": "clean_text", "columns": ["valor"]},
+     {"op": "auto_types", "decimal": ","}, {"op": "remove_outliers", "columns": ["valor"]}],
+])
+def test_run_plan_matches_step_by_step(steps):
+    df = dirty_frame()
+    expected = df
+    for spec in steps:
+        expected, _ = apply_step(expected, spec)
+    got, info = run_plan(df, steps)
+    pd.testing.assert_frame_equal(got, expected)
+    assert info["removed"] == df.shape[0] - expected.shape[0]
@@ -0,0 +1,71 @@
+# Testes dos resumos aproximados (sketches.py)
+
+# Importa a biblioteca numpy para gerar os fluxos de valores
+import numpy as np
+# Importa a biblioteca pandas para manipulação de séries
+import pandas as pd
+
+# Importa o perfil por coluna e os sketches
+from profiling import profile_frame
+from sketches import HyperLogLog, KLLSketch
+
+
+# Posição (0 a 1) de um valor estimado entre os valores ordenados de verdade
+def _rank(sorted_values: np.ndarray, value: float) -> float:
+    return np.searchsorted(sorted_values, value) / len(sorted_values)
+
+
+def test_kll_exact_until_k_values():
+    values = pd.Series(np.random.default_rng(0).normal(size=1_500))
+    sketch = KLLSketch(k=2_000)
+    sketch.update(values)
+    assert sketch.exact
+    assert sketch.quantile(0.25) == values.quantile(0.25)
+
+
+def test_kll_rank_error_bound_and_memory():
+    rng = np.random.default_rng(1)
+    values = np.concatenate([rng.lognormal(size=600_000), rng.normal(50, 5, size=400_000)])
+    sketch = KLLSketch(k=2_000)
+    # Um bloco grande de uma vez e o restante em blocos pequenos
+    sketch.update(pd.Series(values[:700_000]))
+    for start in range(700_000, len(values), 25_000):
+        sketch.update(pd.Series(values[start:start + 25_000]))
+    assert sketch.count == len(values)
+    # Memória do sketch em torno de 3k valores, qualquer que seja o tamanho do fluxo
+    assert sketch.size <= 3 * sketch.k + 2 * len(sketch.levels)
+    # Erro de posição abaixo de 1% em todos os quantis
+    ordered = np.sort(values)
+    for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99):
+        assert abs(_rank(ordered, sketch.quantile(q)) - q) < 0.01
+
+
+def test_hyperloglog_error_bound():
+    rng = np.random.default_rng(2)
+    for distinct in (50, 10_000, 300_000):
+        # Cada valor aparece várias vezes: só os distintos contam
+        values = pd.Series(rng.integers(0, distinct, size=3 * distinct)).map(lambda v: f"id-{v}")
+        true = values.nunique()
+        hll = HyperLogLog(precision=12)
+        hll.add_series(values)
+        # Três erros padrão (≈ 4,9% com precision=12)
+        assert abs(hll.estimate() - true) <= 3 * hll.relative_error * true
+
+
+def test_hyperloglog_merge_is_union():
+    a, b, both = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    left, right = pd.Series(np.arange(0, 60_000)), pd.Series(np.arange(40_000, 100_000))
+    a.add_series(left)
+    b.add_series(right)
+    both.add_series(pd.concat([left, right]))
+    a.merge(b)
+    assert a.estimate() == both.estimate()
+
+
+def test_profile_approx_distinct_close_to_exact():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({"id": rng.integers(0, 50_000, 200_000), "cidade": rng.choice(list("abcdefghij"), 200_000)})
+    exact = profile_frame(df).set_index("coluna")["unicos"]
+    approx = profile_frame(df, approx_distinct=True).set_index("coluna")["unicos"]
+    assert approx["cidade"] == exact["cidade"] == 10
+    assert abs(approx["id"] - exact["id"]) <= 3 * HyperLogLog().relative_error * exact["id"]
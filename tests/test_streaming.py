@@ -0,0 +1,41 @@
+# Testes do pipeline em blocos (streaming.py)
+
+# Importa a biblioteca pandas para manipulação de dados em DataFrames
+import pandas as pd
+
+# Importa a leitura em blocos, a exportação em memória, a reaplicação das etapas e o pipeline
+from export import write_export
+from loading import read_csv_bytes
+from recipe import replay
+from streaming import StreamingPipeline
+
+STEPS = [
+    {"op": "standardize_colnames"},
+    {"op": "clean_text", "columns": ["nome_cliente"]},
+    {"op": "auto_types"},
+    {"op": "dropna", "columns": ["valor"]},
+    {"op": "drop_columns", "columns": ["extra"]},
+]
+
+
+def _streamed(tmp_path, open_chunks, columns=None) -> str:
+    path = tmp_path / "saida.csv"
+    StreamingPipeline(STEPS).run(open_chunks, str(path), columns=columns)
+    return path.read_text(encoding="utf-8-sig")
+
+
+def _in_memory(tmp_path, data: bytes) -> str:
+    df, _ = replay(read_csv_bytes(data, sep=";"), STEPS)
+    path = tmp_path / "memoria.csv"
+    write_export(df, str(path))
+    return path.read_text(encoding="utf-8-sig")
+
+
+def test_header_only_and_all_filtered_match_in_memory_export(tmp_path):
+    for data in (b"Nome Cliente;Valor;Extra\n", b"Nome Cliente;Valor;Extra\n ana ;;x\n"):
+        streamed = _streamed(tmp_path, lambda: read_csv_bytes(data, sep=";", chunksize=10))
+        assert streamed == _in_memory(tmp_path, data) == "nome_cliente;valor\n"
+
+
+def test_no_chunks_writes_header_from_read_columns(tmp_path):
+    assert _streamed(tmp_path, lambda: iter([]), columns=["Nome Cliente", "Valor", "Extra"]) == "nome_cliente;valor\n"